@@ -6,9 +6,6 @@ from pathlib import Path
 module_path = Path(__file__).parent / "modules"
 sys.path.append(str(module_path))
 
-from modules.fact_checker import fact_checker_main
-from modules.image_analyzer import image_analyzer_main
-
 # Must be the first Streamlit command
 st.set_page_config(
     page_title="FactChecker_ID", 
@@ -22,11 +19,15 @@ def main():
     
     # Create tabs
     tab1, tab2 = st.tabs(["📝 Text Fact Checker", "🖼️ Image Analysis"])
-    
+
+    # Each view is imported inside its tab, after the page shell has rendered,
+    # so the title and tabs appear before the views' SDKs finish loading
     with tab1:
+        from modules.fact_checker import fact_checker_main
         fact_checker_main()
-        
+
     with tab2:
+        from modules.image_analyzer import image_analyzer_main
         image_analyzer_main()
 
     # Footer
@@ -0,0 +1,134 @@
+"""HTTP API for the fact-check pipeline, with JSON in and JSON out.
+
+Run one or more worker processes behind any load balancer::
+
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+
+Settings are read from environment variables named like the Streamlit secrets
+(GROQ_API_KEY, VERIFY_CONCURRENCY, CHUNK_WORDS, EVIDENCE_BACKEND, ...). Each
+worker runs at most API_MAX_CONCURRENT_JOBS fact checks at a time; further
+requests wait for a free slot.
+
+Endpoints:
+
+- ``POST /v1/fact-check`` with ``{"text": ..., "language": "id"}`` returns the
+  whole result once every claim is verified.
+- ``POST /v1/fact-check/stream`` takes the same body and streams NDJSON events
+  (``chunk``, ``claims``, ``partial``, ``verdict``, ``warning``, ``error``),
+  ending with ``{"event": "done", ...}``.
+- ``GET /healthz`` for liveness probes.
+
+Both fact-check endpoints accept ``"priority": "batch"`` for bulk jobs, whose
+Groq calls then queue behind interactive ones for the shared rate limit.
+"""
+import asyncio
+import json
+import os
+import threading
+from typing import Literal
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from modules.llm import build_groq_client
+from modules.pipeline import LANGUAGES, FactCheckPipeline, PipelineConfig, event_to_dict
+from modules.rate_limit import BATCH, INTERACTIVE, request_priority
+from modules.tracing import start_trace
+
+API_MAX_CONCURRENT_JOBS = int(os.environ.get("API_MAX_CONCURRENT_JOBS", 4))
+
+try:
+    client = build_groq_client(
+        os.environ["GROQ_API_KEY"],
+        max_connections=int(os.environ.get("GROQ_MAX_CONNECTIONS", 64)),
+        keepalive_connections=int(os.environ.get("GROQ_KEEPALIVE_CONNECTIONS", 32)),
+        keepalive_expiry=float(os.environ.get("GROQ_KEEPALIVE_EXPIRY", 120)),
+        timeout=float(os.environ.get("GROQ_TIMEOUT", 60)),
+    )
+except KeyError:
+    raise RuntimeError("GROQ_API_KEY is not set") from None
+
+pipeline = FactCheckPipeline(client, PipelineConfig.from_mapping(os.environ))
+job_slots = asyncio.Semaphore(API_MAX_CONCURRENT_JOBS)
+
+app = FastAPI(title="FactChecker_ID API")
+
+
+class FactCheckRequest(BaseModel):
+    text: str = Field(..., min_length=1)
+    language: str = "id"
+    priority: Literal["interactive", "batch"] = "interactive"
+
+
+PRIORITIES = {"interactive": INTERACTIVE, "batch": BATCH}
+
+
+def _validate(request: FactCheckRequest) -> str:
+    language = request.language.lower()
+    if language not in LANGUAGES:
+        raise HTTPException(status_code=422, detail=f"Unsupported language; choose from {list(LANGUAGES)}")
+    if len(request.text.split()) > pipeline.config.max_words:
+        raise HTTPException(status_code=413,
+                            detail=f"Text exceeds {pipeline.config.max_words:,} word limit")
+    return language
+
+
+def _run_check(text: str, language: str, priority: int) -> dict:
+    with request_priority(priority), start_trace("fact_check", words=len(text.split())) as trace:
+        result = pipeline.check(text, language)
+    result['trace_id'] = trace.trace_id
+    return result
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.post("/v1/fact-check")
+async def fact_check(request: FactCheckRequest):
+    language = _validate(request)
+    async with job_slots:
+        return await asyncio.to_thread(_run_check, request.text, language,
+                                       PRIORITIES[request.priority])
+
+
+@app.post("/v1/fact-check/stream")
+async def fact_check_stream(request: FactCheckRequest):
+    language = _validate(request)
+    return StreamingResponse(_stream_events(request.text, language, PRIORITIES[request.priority]),
+                             media_type="application/x-ndjson")
+
+
+async def _stream_events(text: str, language: str, priority: int):
+    """Run the pipeline on a worker thread and relay its events as NDJSON lines."""
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    disconnected = threading.Event()
+
+    def produce():
+        try:
+            with request_priority(priority), \
+                    start_trace("fact_check", words=len(text.split())) as trace:
+                for kind, payload in pipeline.fact_check_stream(text, language, cancel=disconnected):
+                    loop.call_soon_threadsafe(events.put_nowait, event_to_dict(kind, payload))
+            done = {'event': "done", 'trace_id': trace.trace_id}
+        except Exception as e:
+            done = {'event': "done", 'error': str(e)}
+        loop.call_soon_threadsafe(events.put_nowait, done)
+
+    async with job_slots:
+        worker = asyncio.ensure_future(asyncio.to_thread(produce))
+        try:
+            while True:
+                event = await events.get()
+                yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+                if event['event'] == "done":
+                    break
+        finally:
+            # A client that hangs up cancels the run: queued chunks and verify
+            # calls are dropped, running chunks stop before their next stage,
+            # and the job slot is held only until the calls in flight return
+            disconnected.set()
+            await worker
@@ -0,0 +1,95 @@
+"""Measure the import cost of the app's modules and heavy dependencies.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``,
+so every measurement is a cold import, as in a newly started container::
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --repeat 7 modules.fact_checker groq
+
+The table reports the median cumulative import time per module across runs,
+and what the app imports before its first render compared to what each view
+adds when it is first opened.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    "streamlit",
+    "groq",
+    "httpx",
+    "wikipedia",
+    "PIL.Image",
+    "google.generativeai",
+    "spacy",
+    "modules.fact_checker",
+    "modules.image_analyzer",
+]
+
+# Imported by Home.py before anything renders; each view is imported on first open
+STARTUP_MODULES = ["streamlit"]
+VIEW_MODULES = {
+    "Text Fact Checker": "modules.fact_checker",
+    "Image Analysis":    "modules.image_analyzer",
+}
+
+
+def measure(module: str) -> float:
+    """Cumulative cold import time of ``module`` in seconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        last_line = (result.stderr.strip().splitlines() or ["import failed"])[-1]
+        raise ImportError(last_line)
+
+    # Lines look like "import time:  self [us] | cumulative | imported package";
+    # the requested module is reported after all of its dependencies
+    for line in reversed(result.stderr.splitlines()):
+        if not line.startswith("import time:"):
+            continue
+        fields = [field.strip() for field in line[len("import time:"):].split("|")]
+        if fields[2].strip() == module:
+            return int(fields[1]) / 1e6
+    raise ImportError(f"{module} not found in -X importtime output")
+
+
+def benchmark(modules, repeat: int):
+    """Return ``{module: median seconds or error message}``."""
+    results = {}
+    for module in modules:
+        try:
+            results[module] = statistics.median(measure(module) for _ in range(repeat))
+        except ImportError as e:
+            results[module] = str(e)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time per module.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per module (median is reported)")
+    args = parser.parse_args()
+
+    results = benchmark(args.modules, args.repeat)
+    width = max(len(module) for module in results)
+    print(f"{'module':<{width}}  cold import")
+    for module, value in results.items():
+        cell = f"{value * 1000:9.1f} ms" if isinstance(value, float) else f"  n/a ({value})"
+        print(f"{module:<{width}}  {cell}")
+
+    startup = [results.get(module) for module in STARTUP_MODULES]
+    if all(isinstance(value, float) for value in startup):
+        print(f"\nHome.py before first render: {sum(startup) * 1000:.1f} ms")
+        for view, module in VIEW_MODULES.items():
+            if isinstance(results.get(module), float):
+                print(f"  first open of {view}: {results[module] * 1000:.1f} ms (includes the above)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+"""Benchmark the fact-check pipeline offline against recorded Groq and Wikipedia responses.
+
+Every article in the corpus (``benchmarks/corpus/*.txt``, Indonesian news by
+default) is run through ``FactCheckPipeline.check`` with local stand-ins for
+``Groq.chat.completions.create`` and ``wikipedia.page``. The stand-ins replay
+responses from ``benchmarks/fixtures`` and sleep for a configurable latency,
+so runs are repeatable and cost nothing::
+
+    python -m benchmarks.pipeline_replay
+    python -m benchmarks.pipeline_replay --repeat 10 --groq-latency 0.8 --wiki-latency 0.2
+    python -m benchmarks.pipeline_replay --json results.json
+
+Record the fixtures once against the live services (needs GROQ_API_KEY)::
+
+    python -m benchmarks.pipeline_replay --record
+
+A request without a recording stops the benchmark with an error, since the
+timings would no longer describe the recorded services. Pass ``--synthesize``
+to answer such requests with a deterministic synthesizer built from the
+prompt instead (for trying the benchmark before any fixtures are recorded);
+synthesized responses are counted in the report. Each run starts with empty
+response and page caches (unless ``--warm``), so every stage does its full work.
+
+The report gives end-to-end p50/p95 latency, and per stage the p50/p95 time,
+span count, LLM calls and prompt tokens per run. LLM calls and tokens are
+attributed to the pipeline stage that made them.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(ROOT, "benchmarks", "corpus")
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+GROQ_FIXTURES = "groq.jsonl"
+WIKI_FIXTURES = "wikipedia.jsonl"
+
+_TEXT = re.compile(r"Text: (.*?)\n\s*\n\s*(?:Return JSON|Rules:)", re.S)
+_NUMBERED_CLAIM = re.compile(r'^\d+\. "(.*?)"$', re.M | re.S)
+_SINGLE_CLAIM = re.compile(r'^Claim: "(.*?)"$', re.M | re.S)
+# Sentence ends, and paragraph breaks (a headline has no closing punctuation)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_NAME = re.compile(r"\b[A-Z][\w-]*(?:\s+[A-Z][\w-]*)*")
+
+
+class FixtureStore:
+    """Append-only JSON-lines file of recorded responses, loaded into memory by key."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fixtures:
+                for line in fixtures:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def add(self, entry: dict) -> None:
+        with self._lock:
+            if entry["key"] in self.entries:
+                return
+            self.entries[entry["key"]] = entry
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as fixtures:
+                fixtures.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+class ReplayStats:
+    """Thread-safe counters of replayed, synthesized and missing responses."""
+
+    def __init__(self):
+        self.counts = {"groq_replayed": 0, "groq_synthesized": 0, "groq_missing": 0,
+                       "wiki_replayed": 0, "wiki_synthesized": 0, "wiki_missing": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def __getitem__(self, name: str) -> int:
+        return self.counts[name]
+
+
+def request_key(request: dict) -> str:
+    from modules.llm import completion_cache_key
+    return completion_cache_key(request["model"], request["messages"], request.get("temperature", 0.2),
+                                request.get("response_format"))
+
+
+def _prompt_of(request: dict) -> str:
+    content = request["messages"][0]["content"]
+    return content if isinstance(content, str) else " ".join(
+        part.get("text", "") for part in content if isinstance(part, dict))
+
+
+def _stable_choice(text: str, options):
+    return options[int(hashlib.sha1(text.encode("utf-8")).hexdigest(), 16) % len(options)]
+
+
+def synthesize_completion(prompt: str) -> str:
+    """A plausible JSON answer for each pipeline prompt, derived only from the prompt."""
+    text_match = _TEXT.search(prompt)
+    text = text_match.group(1).strip() if text_match else ""
+    sentences = [" ".join(s.split()) for s in _SENTENCE.split(text) if len(s.split()) >= 5]
+    keywords = list(dict.fromkeys(name for name in _NAME.findall(text) if len(name) > 3))[:5]
+    claims = [{"claim": s, "topic": (_NAME.findall(s) or ["umum"])[0]}
+              for s in sentences if re.search(r"\d|[A-Z]\w+", s[1:])][:8]
+    verdicts = ("accurate", "accurate", "inaccurate", "subjective")
+
+    if prompt.startswith("Process the following"):
+        answer = {"corrected_text": text, "keywords": keywords, "claims": claims}
+    elif prompt.startswith("Extract key entities"):
+        answer = {"keywords": keywords}
+    elif prompt.startswith("Extract specific"):
+        answer = {"claims": claims}
+    elif prompt.startswith("Correct any spelling"):
+        answer = {"corrected_text": text}
+    elif prompt.startswith("Verify each"):
+        answer = {"results": [
+            {"claim_number": number, "status": _stable_choice(claim, verdicts),
+             "justification": "Synthesized verdict for benchmarking.", "relevant_wiki_quote": ""}
+            for number, claim in enumerate(_NUMBERED_CLAIM.findall(prompt), 1)
+        ]}
+    elif prompt.startswith("Verify the following"):
+        claim = (_SINGLE_CLAIM.findall(prompt) or [""])[0]
+        answer = {"status": _stable_choice(claim, verdicts),
+                  "justification": "Synthesized verdict for benchmarking.", "relevant_wiki_quote": ""}
+    else:
+        answer = {}
+    return json.dumps(answer, ensure_ascii=False)
+
+
+class Latency:
+    """Injected service latency: a base delay with uniform jitter, plus generation time."""
+
+    def __init__(self, base: float, jitter: float, tokens_per_second: float, seed: int):
+        self.base = base
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def first_byte(self) -> float:
+        with self._lock:
+            return max(0.0, self.base + self._random.uniform(-self.jitter, self.jitter))
+
+    def generation(self, completion_tokens: int) -> float:
+        return completion_tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+
+
+class ReplayCompletions:
+    """Stand-in for ``client.chat.completions`` that replays fixtures with injected latency."""
+
+    def __init__(self, store: FixtureStore, latency: Latency, synthesize: bool, stats: ReplayStats):
+        self.store = store
+        self.latency = latency
+        self.synthesize = synthesize
+        self.stats = stats
+
+    def create(self, **request):
+        entry = self.store.get(request_key(request))
+        if entry is None:
+            if not self.synthesize:
+                self.stats.count("groq_missing")
+                raise LookupError(f"No recorded Groq response for prompt: {_prompt_of(request)[:80]!r}")
+            content = synthesize_completion(_prompt_of(request))
+            usage = {"prompt_tokens": len(_prompt_of(request)) // 4,
+                     "completion_tokens": len(content) // 4}
+            self.stats.count("groq_synthesized")
+        else:
+            content, usage = entry["content"], entry["usage"]
+            self.stats.count("groq_replayed")
+        usage = dict(usage, total_tokens=usage["prompt_tokens"] + usage["completion_tokens"])
+
+        time.sleep(self.latency.first_byte())
+        if request.get("stream"):
+            return self._stream(content, usage)
+        time.sleep(self.latency.generation(usage["completion_tokens"]))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(**usage),
+        )
+
+    def _stream(self, content: str, usage: dict):
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+        delay = self.latency.generation(usage["completion_tokens"]) / len(pieces)
+        for piece in pieces:
+            time.sleep(delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))],
+                                  usage=None, x_groq=None)
+        yield SimpleNamespace(choices=[], usage=None, x_groq=SimpleNamespace(usage=SimpleNamespace(**usage)))
+
+
+class RecordingCompletions:
+    """Proxy for a live ``client.chat.completions`` that saves every response as a fixture."""
+
+    def __init__(self, completions, store: FixtureStore):
+        self.completions = completions
+        self.store = store
+
+    def _save(self, request: dict, content: str, usage) -> None:
+        self.store.add({
+            "key": request_key(request),
+            "model": request["model"],
+            "prompt_head": _prompt_of(request)[:120],
+            "content": content,
+            "usage": {"prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                      "completion_tokens": getattr(usage, "completion_tokens", 0) or 0},
+        })
+
+    def create(self, **request):
+        response = self.completions.create(**request)
+        if not request.get("stream"):
+            self._save(request, response.choices[0].message.content, response.usage)
+            return response
+        return self._record_stream(request, response)
+
+    def _record_stream(self, request: dict, stream):
+        parts, usage = [], None
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        self._save(request, "".join(parts), usage)
+
+
+def _wiki_language(wikipedia) -> str:
+    match = re.match(r"https?://([\w-]+)\.wikipedia", wikipedia.API_URL)
+    return match.group(1) if match else "en"
+
+
+def install_wikipedia(mode: str, store: FixtureStore, latency: Latency, synthesize: bool,
+                      stats: ReplayStats, corpus: dict) -> None:
+    """Replace ``wikipedia.page`` with a replaying (or recording) stand-in."""
+    import wikipedia
+    live_page = wikipedia.page
+
+    def key_for(title):
+        return f"{_wiki_language(wikipedia)}:{title}"
+
+    def to_page(entry):
+        if entry.get("missing"):
+            raise wikipedia.exceptions.PageError(entry["title"])
+        if entry.get("options"):
+            raise wikipedia.exceptions.DisambiguationError(entry["title"], entry["options"])
+        return SimpleNamespace(**entry["page"])
+
+    def record_page(title, auto_suggest=False, **kwargs):
+        entry = {"key": key_for(title), "title": title}
+        try:
+            page = live_page(title, auto_suggest=auto_suggest, **kwargs)
+        except wikipedia.exceptions.PageError:
+            store.add(dict(entry, missing=True))
+            raise
+        except wikipedia.exceptions.DisambiguationError as e:
+            store.add(dict(entry, options=e.options))
+            raise
+        store.add(dict(entry, page={field: getattr(page, field)
+                                    for field in ("title", "summary", "content", "url")}))
+        return page
+
+    def replay_page(title, auto_suggest=False, **kwargs):
+        time.sleep(latency.first_byte())
+        entry = store.get(key_for(title))
+        if entry is not None:
+            stats.count("wiki_replayed")
+            return to_page(entry)
+        if not synthesize:
+            stats.count("wiki_missing")
+            raise LookupError(f"No recorded Wikipedia page for {key_for(title)!r}")
+        stats.count("wiki_synthesized")
+        # Build the page from corpus sentences that mention the title
+        mentions = [s for text in corpus.values() for s in _SENTENCE.split(text) if title.lower() in s.lower()]
+        if not mentions:
+            raise wikipedia.exceptions.PageError(title)
+        content = "\n\n".join(mentions)
+        return SimpleNamespace(title=title, summary=mentions[0], content=content,
+                               url=f"https://{_wiki_language(wikipedia)}.wikipedia.org/wiki/{title.replace(' ', '_')}")
+
+    wikipedia.page = record_page if mode == "record" else replay_page
+
+
+def percentile(values, fraction: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)] if ordered else 0.0
+
+
+def load_corpus(pattern: str) -> dict:
+    corpus = {}
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as article:
+            corpus[os.path.splitext(os.path.basename(path))[0]] = article.read()
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fact-check pipeline against recorded responses.")
+    parser.add_argument("--corpus", default=os.path.join(CORPUS_DIR, "*.txt"), help="glob of article files")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    parser.add_argument("--language", default="id")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per article")
+    parser.add_argument("--groq-latency", type=float, default=0.6, help="seconds to first token")
+    parser.add_argument("--groq-jitter", type=float, default=0.2)
+    parser.add_argument("--groq-tokens-per-second", type=float, default=300.0,
+                        help="completion speed (0 returns completions instantly)")
+    parser.add_argument("--wiki-latency", type=float, default=0.25)
+    parser.add_argument("--wiki-jitter", type=float, default=0.1)
+    parser.add_argument("--synthesize", action="store_true",
+                        help="answer requests that have no recording instead of failing")
+    parser.add_argument("--record", action="store_true", help="call the live services and save fixtures")
+    parser.add_argument("--warm", action="store_true", help="keep response and page caches between runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the raw per-run results here")
+    args = parser.parse_args()
+
+    # Caches go to a scratch directory, and the shared rate limiter must not
+    # throttle replayed calls, so both are set before the app modules load
+    os.environ["FACTCHECK_CACHE_DIR"] = tempfile.mkdtemp(prefix="factcheck-bench-")
+    if not args.record:
+        os.environ.setdefault("GROQ_REQUESTS_PER_MINUTE", "1000000")
+        os.environ.setdefault("GROQ_TOKENS_PER_MINUTE", "1000000000")
+    sys.path.insert(0, ROOT)
+
+    from modules.llm import build_groq_client, llm_cache
+    from modules.pipeline import FactCheckPipeline, PipelineConfig
+    from modules.tracing import start_trace
+    from modules.wiki import wiki_disk_cache, wiki_memory_cache
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"no articles match {args.corpus}")
+    groq_store = FixtureStore(os.path.join(args.fixtures, GROQ_FIXTURES))
+    wiki_store = FixtureStore(os.path.join(args.fixtures, WIKI_FIXTURES))
+    stats = ReplayStats()
+    groq_latency = Latency(args.groq_latency, args.groq_jitter, args.groq_tokens_per_second, args.seed)
+    wiki_latency = Latency(args.wiki_latency, args.wiki_jitter, 0, args.seed + 1)
+
+    if args.record:
+        client = build_groq_client(os.environ["GROQ_API_KEY"])
+        client = SimpleNamespace(chat=SimpleNamespace(
+            completions=RecordingCompletions(client.chat.completions, groq_store)))
+    else:
+        client = SimpleNamespace(chat=SimpleNamespace(
+            completions=ReplayCompletions(groq_store, groq_latency, args.synthesize, stats)))
+    install_wikipedia("record" if args.record else "replay", wiki_store, wiki_latency,
+                      args.synthesize, stats, corpus)
+    pipeline = FactCheckPipeline(client, PipelineConfig.from_mapping(os.environ))
+
+    runs = []
+    for name, text in corpus.items():
+        for repeat in range(1 if args.record else args.repeat):
+            if not args.warm:
+                llm_cache.clear()
+                wiki_disk_cache.clear()
+                wiki_memory_cache.clear()
+            with start_trace("fact_check", article=name) as trace:
+                result = pipeline.check(text, args.language)
+            # The pipeline reports a failed lookup as a stage error and carries on
+            if stats["groq_missing"] or stats["wiki_missing"]:
+                parser.exit(1, f"{name}: {stats['groq_missing']} Groq and {stats['wiki_missing']} "
+                               f"Wikipedia requests have no recording in {args.fixtures}. Record them "
+                               f"with --record, or pass --synthesize to answer them offline.\n")
+            runs.append({
+                "article": name,
+                "repeat": repeat,
+                "total_ms": trace.root.duration_ms,
+                "claims": len(result["claims"]),
+                "errors": result["errors"],
+                "stages": {stage["stage"]: stage for stage in trace.summary()},
+            })
+            print(f"{name} #{repeat + 1}: {trace.root.duration_ms / 1000:.2f}s, "
+                  f"{len(result['claims'])} claims", file=sys.stderr)
+
+    if args.record:
+        print(f"Recorded {len(groq_store.entries)} Groq responses and "
+              f"{len(wiki_store.entries)} Wikipedia pages in {args.fixtures}")
+        return
+
+    totals = [run["total_ms"] for run in runs]
+    print(f"\n{len(runs)} runs over {len(corpus)} articles "
+          f"(Groq {args.groq_latency}s ±{args.groq_jitter}, Wikipedia {args.wiki_latency}s ±{args.wiki_jitter})")
+    print(f"end to end: p50 {percentile(totals, 0.5):.0f} ms, p95 {percentile(totals, 0.95):.0f} ms, "
+          f"mean {statistics.mean(totals):.0f} ms")
+    print(f"responses: {stats['groq_replayed']} Groq and {stats['wiki_replayed']} Wikipedia replayed, "
+          f"{stats['groq_synthesized']} Groq and {stats['wiki_synthesized']} Wikipedia synthesized\n")
+
+    names = sorted({name for run in runs for name in run["stages"]} - {"fact_check"})
+    zero = {"total_ms": 0.0, "calls": 0, "llm_calls": 0, "prompt_tokens": 0}
+    rows = []
+    for name in names:
+        per_run = [run["stages"].get(name, zero) for run in runs]
+        times = [stage["total_ms"] for stage in per_run]
+        rows.append((name, percentile(times, 0.5), percentile(times, 0.95),
+                     statistics.mean(stage["calls"] for stage in per_run),
+                     statistics.mean(stage["llm_calls"] for stage in per_run),
+                     statistics.mean(stage["prompt_tokens"] for stage in per_run)))
+    rows.sort(key=lambda row: -row[1])
+
+    width = max(len("stage"), *(len(row[0]) for row in rows))
+    print(f"{'stage':<{width}}  {'p50 ms':>9}  {'p95 ms':>9}  {'spans/run':>9}  {'llm/run':>8}  {'prompt tok/run':>14}")
+    for name, p50, p95, spans, calls, tokens in rows:
+        print(f"{name:<{width}}  {p50:9.0f}  {p95:9.0f}  {spans:9.1f}  {calls:8.1f}  {tokens:14.0f}")
+    print("\nStage times sum the stage's spans, so stages that run concurrently can exceed the end-to-end time.")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as out:
+            json.dump({"args": vars(args), "responses": stats, "runs": runs}, out, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 import streamlit as st
-from groq import Groq
 import base64
 import json
 
-# Initialize Groq client (similar to your existing code)
+from modules.clients import get_groq_client
+from modules.llm import create_completion
+
+# Shared Groq client, reused across calls and sessions
 try:
-    client = Groq(api_key=st.secrets["GROQ_API_KEY"])
+    client = get_groq_client()
 except KeyError:
     st.error("Groq API key not found. Please set GROQ_API_KEY in Streamlit secrets.")
     st.stop()
@@ -16,7 +18,8 @@ def analyze_image_with_vision(image_file):
     
     # Your Groq API call for vision analysis
     try:
-        response = client.chat.completions.create(
+        response = create_completion(
+            client,
             model="meta-llama/llama-4-maverick-17b-128e-instruct",
             messages=[
                 {
@@ -0,0 +1,173 @@
+import functools
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from modules.highlight import Span, find_claim_spans, select_spans
+
+# Lowest word-level similarity (1 - edits / length) accepted for a fuzzy match
+ALIGN_MIN_SIMILARITY = float(os.environ.get("ALIGN_MIN_SIMILARITY", 0.6))
+
+# Shingles occurring more often than this in a document are too common to vote
+MAX_POSTINGS = 64
+# Candidate alignments checked per claim
+MAX_CANDIDATES = 3
+
+_WORD = re.compile(r"\w+")
+
+
+def _normalize(word: str) -> str:
+    """Lower-case and strip diacritics, so "Café" and "cafe" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", word.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _word_cost(a: str, b: str) -> float:
+    """Substitution cost: free for equal words, half for likely typos of each other."""
+    if a == b:
+        return 0.0
+    if len(a) >= 4 and len(b) >= 4 and a[:3] == b[:3]:
+        return 0.5
+    return 1.0
+
+
+class ClaimAligner:
+    """Map paraphrased claims back to character spans of one document.
+
+    The document's words are indexed once by word bigrams (single words as a
+    fallback). A claim's shingles vote for the diagonal (document position
+    minus claim position) they sit on, and the best-voted diagonals are
+    checked with a word-level edit distance restricted to a band around them.
+    Work per claim is bounded by the capped posting lists and the band, so
+    aligning every claim of a document stays roughly linear in its length.
+    Results are cached per claim.
+    """
+
+    def __init__(self, text: str, min_similarity: float = ALIGN_MIN_SIMILARITY):
+        self.text = text
+        self.min_similarity = min_similarity
+        words = list(_WORD.finditer(text))
+        self.tokens = [_normalize(word.group()) for word in words]
+        self.offsets = [word.span() for word in words]
+        self._bigrams = defaultdict(list)
+        self._unigrams = defaultdict(list)
+        for position, token in enumerate(self.tokens):
+            self._unigrams[token].append(position)
+            if position + 1 < len(self.tokens):
+                self._bigrams[(token, self.tokens[position + 1])].append(position)
+        self._cache: Dict[str, Optional[Tuple[int, int, float]]] = {}
+
+    def _candidates(self, tokens: List[str], band: int) -> List[int]:
+        """Most-voted diagonals, at most one per ``band``-wide bucket."""
+        shingles = [((tokens[i], tokens[i + 1]), i) for i in range(len(tokens) - 1)]
+        for index, keyed in ((self._bigrams, shingles),
+                             (self._unigrams, [(token, i) for i, token in enumerate(tokens)])):
+            votes = Counter()
+            for shingle, claim_position in keyed:
+                postings = index.get(shingle)
+                if postings and len(postings) <= MAX_POSTINGS:
+                    for position in postings:
+                        votes[position - claim_position] += 1
+            if votes:
+                break
+        else:
+            return []
+
+        buckets = {}
+        for diagonal, count in votes.items():
+            bucket = buckets.setdefault(diagonal // band, [0, diagonal, 0])
+            bucket[0] += count
+            if count > bucket[2]:
+                bucket[1], bucket[2] = diagonal, count
+        ranked = sorted(buckets.values(), key=lambda bucket: -bucket[0])
+        return [diagonal for _, diagonal, _ in ranked[:MAX_CANDIDATES]]
+
+    def _banded_align(self, tokens: List[str], diagonal: int, band: int) -> Optional[Tuple[int, int, float]]:
+        """Best (first word, end word, similarity) for the claim near ``diagonal``.
+
+        Semi-global edit distance: the claim must be matched whole, the
+        document span may start and end anywhere in the region. Only cells
+        within ``band`` words of the diagonal are computed.
+        """
+        region_start = max(0, diagonal - band)
+        region = self.tokens[region_start:min(len(self.tokens), diagonal + len(tokens) + band)]
+        offset = diagonal - region_start
+        width = len(region)
+        infinity = float("inf")
+
+        previous = [0.0] * (width + 1)
+        previous_start = list(range(width + 1))
+        for i, token in enumerate(tokens, 1):
+            low = max(0, i + offset - band)
+            high = min(width, i + offset + band)
+            current = [infinity] * (width + 1)
+            current_start = [0] * (width + 1)
+            for j in range(low, high + 1):
+                # Claim word with no document counterpart
+                best, start = previous[j] + 1, previous_start[j]
+                if j:
+                    substituted = previous[j - 1] + _word_cost(token, region[j - 1])
+                    if substituted < best:
+                        best, start = substituted, previous_start[j - 1]
+                    # Extra document word inside the span
+                    inserted = current[j - 1] + 1
+                    if inserted < best:
+                        best, start = inserted, current_start[j - 1]
+                current[j], current_start[j] = best, start
+            previous, previous_start = current, current_start
+
+        end = min(range(width + 1), key=lambda j: (previous[j], -j))
+        start = previous_start[end]
+        if end <= start or previous[end] == infinity:
+            return None
+        similarity = 1 - previous[end] / max(len(tokens), end - start)
+        return region_start + start, region_start + end, similarity
+
+    def align(self, claim: str) -> Optional[Tuple[int, int, float]]:
+        """``(start, end, similarity)`` character span of the claim, or None if nothing is close enough."""
+        if claim in self._cache:
+            return self._cache[claim]
+
+        tokens = [_normalize(word) for word in _WORD.findall(claim)]
+        best = None
+        if tokens and self.tokens:
+            band = max(3, len(tokens) // 4)
+            for diagonal in self._candidates(tokens, band):
+                match = self._banded_align(tokens, diagonal, band)
+                if match and (best is None or match[2] > best[2]):
+                    best = match
+
+        result = None
+        if best and best[2] >= self.min_similarity:
+            first, end, similarity = best
+            result = (self.offsets[first][0], self.offsets[end - 1][1], round(similarity, 3))
+        self._cache[claim] = result
+        return result
+
+
+@functools.lru_cache(maxsize=8)
+def aligner_for(text: str) -> ClaimAligner:
+    """Shared aligner per document, so re-rendering the same text reuses its index and offsets."""
+    return ClaimAligner(text)
+
+
+def locate_claims(text: str, claims: Sequence[str]) -> List[Span]:
+    """Non-overlapping ``(start, end, claim_index)`` spans of the claims in ``text``, in text order.
+
+    Exact occurrences are found first in one pass; claims with none (typically
+    paraphrased by the model, or typo-corrected) are then aligned fuzzily
+    into the gaps that remain.
+    """
+    exact = find_claim_spans(text, claims)
+    found = {index for _, _, index in exact}
+    aligner = aligner_for(text)
+    fuzzy = []
+    for index, claim in enumerate(claims):
+        if index in found or not claim:
+            continue
+        match = aligner.align(claim)
+        if match:
+            fuzzy.append((match[0], match[1], index))
+    return select_spans(fuzzy, taken=exact)
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+# Directory holding the on-disk caches, shared by every session and process
+CACHE_DIR = os.environ.get("FACTCHECK_CACHE_DIR", ".cache")
+CACHE_PATH = os.path.join(CACHE_DIR, "factcheck_cache.sqlite3")
+# Writes between full eviction passes, unless the namespace may be over budget sooner
+EVICT_EVERY = 64
+
+logger = logging.getLogger(__name__)
+
+
+def hash_key(*parts: Any) -> str:
+    """Build a stable content-addressed key from JSON-serialisable parts."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def open_connection(path: str = CACHE_PATH) -> sqlite3.Connection:
+    """Open an autocommit WAL-mode connection suitable for several processes."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class DiskCache:
+    """SQLite-backed key/value cache with per-entry TTL and size-bounded LRU eviction.
+
+    Entries live in a single database file so several Streamlit processes can
+    share them. Each cache instance owns one namespace inside that file and
+    evicts its least recently used entries once the namespace grows past
+    ``max_bytes``. The namespace size is measured every ``EVICT_EVERY`` writes
+    and estimated in between, so writes do not scan the namespace. If the
+    database cannot be opened (e.g. a read-only cache directory) the cache
+    logs a warning and does nothing.
+    """
+
+    def __init__(self, namespace: str, max_bytes: int = 64 * 1024 * 1024,
+                 default_ttl: float = 7 * 24 * 3600, path: str = CACHE_PATH):
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.path = path
+        self._local = threading.local()
+        self.available = True
+        # Namespace size as of the last eviction pass, plus bytes written since
+        self._estimated_bytes = None
+        self._writes_since_evict = 0
+        self._evict_lock = threading.Lock()
+
+        try:
+            self._create_table()
+        except (sqlite3.Error, OSError) as e:
+            self.available = False
+            logger.warning("Disk cache %r disabled: cannot open %s: %s", namespace, path, e)
+
+    def _create_table(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS entries (
+                       namespace   TEXT NOT NULL,
+                       key         TEXT NOT NULL,
+                       value       TEXT NOT NULL,
+                       size        INTEGER NOT NULL,
+                       expires_at  REAL NOT NULL,
+                       accessed_at REAL NOT NULL,
+                       PRIMARY KEY (namespace, key)
+                   )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, accessed_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = open_connection(self.path)
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key``, or None if missing or expired."""
+        if not self.available:
+            return None
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                )
+                return None
+            conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            return json.loads(row[0])
+        except (sqlite3.Error, OSError):
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value`` under ``key`` and evict old entries if over budget."""
+        if not self.available:
+            return
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, len(payload), expires_at, now),
+            )
+            with self._evict_lock:
+                self._writes_since_evict += 1
+                if self._estimated_bytes is not None:
+                    self._estimated_bytes += len(payload)
+                due = (self._estimated_bytes is None or self._estimated_bytes > self.max_bytes
+                       or self._writes_since_evict >= EVICT_EVERY)
+                if due:
+                    self._writes_since_evict = 0
+            if due:
+                self._evict(conn, now)
+        except (sqlite3.Error, OSError):
+            pass
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired entries, then least recently used ones until under max_bytes.
+
+        Also re-measures the namespace, which other processes may write to too.
+        """
+        conn.execute(
+            "DELETE FROM entries WHERE namespace = ? AND expires_at < ?",
+            (self.namespace, now),
+        )
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?",
+            (self.namespace,),
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            self._estimated_bytes = total
+            return
+
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries WHERE namespace = ? ORDER BY accessed_at",
+            (self.namespace,),
+        ):
+            victims.append((self.namespace, key))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", victims)
+        self._estimated_bytes = self.max_bytes + excess if excess <= 0 else 0
+
+    def clear(self) -> None:
+        """Remove every entry in this namespace."""
+        if not self.available:
+            return
+        try:
+            self._connect().execute(
+                "DELETE FROM entries WHERE namespace = ?", (self.namespace,)
+            )
+            self._estimated_bytes = 0
+        except (sqlite3.Error, OSError):
+            pass
@@ -0,0 +1,109 @@
+import re
+import threading
+from typing import Dict, List
+
+# Sentence ends followed by whitespace, or paragraph breaks
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+|\n\s*\n")
+
+
+def split_sentences(text: str) -> List[Dict]:
+    """Split text into sentences, keeping each one's character span in the original."""
+    sentences = []
+    start = 0
+    for match in _SENTENCE_SPLIT.finditer(text):
+        if text[start:match.start()].strip():
+            sentences.append({'text': text[start:match.start()], 'start': start, 'end': match.start()})
+        start = match.end()
+    if text[start:].strip():
+        sentences.append({'text': text[start:], 'start': start, 'end': len(text)})
+    return sentences
+
+
+def split_into_chunks(text: str, max_words: int = 1200, overlap_sentences: int = 2) -> List[Dict]:
+    """Split long text on sentence/paragraph boundaries into overlapping chunks.
+
+    Each chunk holds whole sentences up to about ``max_words`` words and repeats
+    the last ``overlap_sentences`` sentences of the previous chunk, so a claim
+    that straddles a boundary is seen whole by at least one chunk. Chunks carry
+    ``start``/``end`` offsets into the original text and ``overlap_end``, the
+    offset where the repeated prefix stops.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+
+    chunks = []
+    current = []
+    overlap = 0
+    words = 0
+    for sentence in sentences:
+        sentence_words = len(sentence['text'].split())
+        if len(current) > overlap and words + sentence_words > max_words:
+            chunks.append((current, overlap))
+            current = current[-overlap_sentences:] if overlap_sentences else []
+            overlap = len(current)
+            words = sum(len(s['text'].split()) for s in current)
+        current.append(sentence)
+        words += sentence_words
+    chunks.append((current, overlap))
+
+    result = []
+    for i, (chunk, overlap) in enumerate(chunks):
+        start, end = chunk[0]['start'], chunk[-1]['end']
+        result.append({
+            'index': i,
+            'text': text[start:end],
+            'start': start,
+            'end': end,
+            'overlap_end': chunk[overlap - 1]['end'] if overlap else start,
+        })
+    return result
+
+
+def _claim_tokens(claim: str) -> frozenset:
+    return frozenset(re.findall(r"\w+", claim.casefold()))
+
+
+class ClaimDeduplicator:
+    """Drops claims already extracted from an earlier chunk, in chunk order.
+
+    Chunks are preprocessed concurrently, but ``accept`` for chunk ``i`` blocks
+    until chunk ``i - 1`` has published its claims, so the outcome does not
+    depend on which chunk finished first. Exact repeats are dropped anywhere in
+    the document; near-duplicates (token Jaccard >= ``threshold``) are dropped
+    against the previous chunk, which is where overlapping seams repeat them.
+    """
+
+    def __init__(self, chunk_count: int, threshold: float = 0.7):
+        self.threshold = threshold
+        self._published = [threading.Event() for _ in range(chunk_count)]
+        self._claims = [[] for _ in range(chunk_count)]
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def accept(self, chunk_index: int, claims: List[Dict]) -> List[Dict]:
+        """Return the claims of ``chunk_index`` that are new, and publish them."""
+        try:
+            if chunk_index:
+                self._published[chunk_index - 1].wait()
+            previous = [_claim_tokens(c['claim']) for c in self._claims[chunk_index - 1]] if chunk_index else []
+
+            accepted = []
+            with self._lock:
+                for claim in claims:
+                    tokens = _claim_tokens(claim['claim'])
+                    if not tokens or tokens in self._seen:
+                        continue
+                    if any(len(tokens & other) / len(tokens | other) >= self.threshold
+                           for other in previous):
+                        continue
+                    self._seen.add(tokens)
+                    accepted.append(claim)
+            self._claims[chunk_index] = accepted
+            return accepted
+        finally:
+            self._published[chunk_index].set()
+
+    def skip(self, chunk_index: int) -> None:
+        """Publish an empty claim list for a chunk that failed to preprocess."""
+        self._published[chunk_index].set()
@@ -0,0 +1,48 @@
+from typing import TYPE_CHECKING
+
+import streamlit as st
+
+from modules.llm import build_groq_client
+
+if TYPE_CHECKING:
+    # build_groq_client imports the SDK on first call; only the annotation needs it here
+    from groq import Groq
+
+# Connection pool shared by every session and worker thread. Verification
+# runs up to VERIFY_CONCURRENCY x CHUNK_CONCURRENCY requests at once and batch
+# image analysis adds IMAGE_BATCH_CONCURRENCY x models, so the defaults leave
+# room for both without opening a new TLS connection per call.
+GROQ_MAX_CONNECTIONS       = int(st.secrets.get("GROQ_MAX_CONNECTIONS", 64))
+GROQ_KEEPALIVE_CONNECTIONS = int(st.secrets.get("GROQ_KEEPALIVE_CONNECTIONS", 32))
+GROQ_KEEPALIVE_EXPIRY      = float(st.secrets.get("GROQ_KEEPALIVE_EXPIRY", 120))
+GROQ_TIMEOUT               = float(st.secrets.get("GROQ_TIMEOUT", 60))
+
+
+@st.cache_resource(show_spinner=False)
+def get_groq_client() -> "Groq":
+    """Process-wide Groq client; its keep-alive pool is reused across calls and sessions.
+
+    Raises KeyError if GROQ_API_KEY is missing, so callers can report it.
+    """
+    return build_groq_client(
+        st.secrets["GROQ_API_KEY"],
+        max_connections=GROQ_MAX_CONNECTIONS,
+        keepalive_connections=GROQ_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+        timeout=GROQ_TIMEOUT,
+    )
+
+
+@st.cache_resource(show_spinner=False)
+def _gemini_sdk():
+    # The Gemini SDK pulls in gRPC and protobuf, so it is imported on first use only
+    import google.generativeai as genai
+    genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
+    return genai
+
+
+@st.cache_resource(show_spinner=False)
+def get_gemini_model(model_name: str, **generation_config):
+    """Process-wide Gemini model per (name, generation config), sharing one configured channel."""
+    genai = _gemini_sdk()
+    return genai.GenerativeModel(model_name=model_name, generation_config=generation_config)
@@ -1,104 +1,41 @@
-from tenacity import retry, stop_after_attempt, wait_exponential
 import streamlit as st
-import wikipedia
-from groq import Groq
 import json
-from typing import List, Dict
-import re
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
 from html import escape
-import functools
+from modules.clients import get_groq_client
+from modules.cache import hash_key
+from modules.highlight import render_spans
+from modules.pipeline import LANGUAGES, FactCheckPipeline, PipelineConfig, ResultCollector, StageMemo
+from modules.tracing import start_trace
 
 
-# Initialize Groq client with API key from environment or Streamlit secrets
+# Shared Groq client, reused across calls and sessions
 try:
-    client = Groq(api_key=st.secrets["GROQ_API_KEY"])
+    client = get_groq_client()
 except KeyError:
     st.error("Groq API key not found. Please set GROQ_API_KEY in Streamlit secrets.")
     st.stop()
 
-# Default language to Indonesian
-wikipedia.set_lang("id")
+# The pipeline core has no Streamlit dependency; this view is one client of it
+pipeline = FactCheckPipeline(client, PipelineConfig.from_mapping(st.secrets))
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-def try_groq_extraction(text: str) -> List[str]:
-    """Attempt to extract keywords using Groq with retry logic"""
-    try:
-        prompt = f"""Extract key entities and search terms from the following text:
-
-        Guidelines:
-        1. Focus on proper nouns, specific names, locations, organizations
-        2. Extract terms most likely to match Wikipedia page titles
-        3. Prioritize complete, precise terms
-        4. Avoid generic or common words
-        5. Consider context and significance
-        6. Correct typos and grammatical errors to ensure accuracy and clarity
-
-        Text: {text}
-
-        Return JSON format:
-        {{
-            "keywords": [
-                "Exact search term 1",
-                "Exact search term 2",
-                ...
-            ]
-        }}"""
-        
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            response_format={"type": "json_object"},
-            temperature=0.2
-        )
-        
-        keywords_data = json.loads(response.choices[0].message.content)
-        return keywords_data.get('keywords', [])
-    except Exception as e:
-        st.warning(f"Groq API error: {str(e)}")
-        return []
-
-def fallback_keyword_extraction(text: str) -> List[str]:
-    """Extract keywords using regex when Groq is unavailable"""
-    # Find capitalized words and phrases
-    capitalized = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text)
-    
-    # Find dates
-    dates = re.findall(r'\b\d{4}\b', text)
-    
-    # Find location patterns
-    locations = re.findall(r'\b(?:di|in|at)\s+([A-Z][a-Z]+(?:\s+[A-Z][a-z]+)*)\b', text)
-    
-    # Combine all findings and remove duplicates
-    all_keywords = list(set(capitalized + dates + locations))
-    
-    # Return top 5 keywords
-    return all_keywords[:5]
+VERDICT_STATUSES = ("accurate", "inaccurate", "subjective")
 
-def extract_keywords(text: str) -> List[str]:
-    """Extract key entities and potential Wikipedia search terms with fallback."""
-    # Try using Groq first
-    keywords = try_groq_extraction(text)
-    
-    # If Groq fails or returns no keywords, use fallback method
-    if not keywords:
-        st.info("Using fallback keyword extraction method...")
-        keywords = fallback_keyword_extraction(text)
-        
-    return keywords
+# Finished runs kept per session for re-rendering on reruns
+FACT_CHECK_MEMO_RUNS = int(st.secrets.get("FACT_CHECK_MEMO_RUNS", 5))
 
 def switch_wikipedia_language(language: str = "id"):
     """Switch Wikipedia language and return current language setting."""
     try:
         # Validate language input
-        valid_languages = ["id", "en", "ms", "ar", "zh", "ja", "es", "fr", "ru"]
+        valid_languages = list(LANGUAGES)
         if language.lower() not in valid_languages:
             st.warning(f"Invalid language. Defaulting to Indonesian. Choose from {valid_languages}")
             language = "id"
         
-        # Set the language globally
-        wikipedia.set_lang(language.lower())
-        
-        # Update session state
+        # Update session state; each fact check passes the language to the pipeline
         st.session_state['current_wiki_language'] = language.lower()
         
         return language.lower()
@@ -106,192 +43,102 @@ def switch_wikipedia_language(language: str = "id"):
         st.error(f"Error switching Wikipedia language: {e}")
         return "id"
 
-def find_best_wikipedia_page(keywords: List[str]) -> Dict:
-    """Find the most relevant Wikipedia pages based on keywords."""
-    # Get current language from session state
-    current_language = st.session_state.get('current_wiki_language', 'id')
-    
-    # Set Wikipedia language
-    wikipedia.set_lang(current_language)
-
-    for keyword in keywords:
-        try:
-            try:
-                page = wikipedia.page(keyword, auto_suggest=False)
-                return {
-                    'title': page.title,
-                    'content': page.content[:5000],
-                    'url': page.url,
-                    'summary': page.summary
-                }
-            except wikipedia.exceptions.DisambiguationError as e:
-                if e.options:
-                    try:
-                        page = wikipedia.page(e.options[0], auto_suggest=False)
-                        return {
-                            'title': page.title,
-                            'content': page.content[:5000],
-                            'url': page.url,
-                            'summary': page.summary
-                        }
-                    except:
-                        continue
-            except wikipedia.exceptions.PageError:
-                continue
-        except Exception as e:
-            st.warning(f"Could not find Wikipedia page for '{keyword}' in {current_language}: {e}")
-    
-    return None
-
-def extract_claims(text: str) -> Dict:
-    """Extract factual claims from the input text."""
-    try:
-        prompt = f"""Extract specific, verifiable factual claims from the following text:
-
-Rules:
-1. Extract claims that are:
-   - Objectively verifiable
-   - Specific and precise
-   - Not subjective opinions
-   - Related to names, events, locations, or statistical facts
-
-2. Format each claim with a clear topic and statement
-
-Text: {text}
-
-Return JSON in this format:
-{{
-    "claims": [
-        {{
-            "claim": "Exact verifiable statement",
-            "topic": "Main subject of the claim"
-        }}
+def claim_card_html(claim: str, result: Dict) -> str:
+    """HTML for one claim card, without indentation or blank lines so it stays one HTML block.
+
+    Partial verdicts show a pending badge until their status has fully arrived,
+    and their justification grows as more of the response streams in.
+    """
+    status = str(result.get('status', '')).lower()
+    status = status if status in VERDICT_STATUSES + ("error",) else None
+    status_class = f"status-{status or 'pending'}"
+    background = {
+        'accurate': '#E8F5E9',
+        'inaccurate': '#FFEBEE',
+        None: '#F5F5F5'
+    }.get(status, '#FFF3E0')
+
+    parts = [
+        f'<div class="claim-result" style="background-color: {background};">'
+        f'<span class="{status_class}">{status.upper() if status else "CHECKING…"}</span>'
+        f'<br><br><strong>Claim:</strong> {escape(claim)}'
+        f'<br><br><strong>Justification:</strong> {escape(str(result.get("justification", "")))}'
+        f'</div>'
     ]
-}}"""
-        
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            response_format={"type": "json_object"},
-            temperature=0.2
+    if result.get('relevant_wiki_quote'):
+        parts.append(f'<div class="wiki-quote">{escape(str(result["relevant_wiki_quote"]))}</div>')
+    if result.get('source_url'):
+        parts.append(f'<p><strong>Source:</strong> '
+                     f'<a href="{escape(str(result["source_url"]))}" target="_blank">Wikipedia</a></p>')
+    return "".join(parts)
+
+class ClaimListView:
+    """Every claim card of a run rendered as one HTML document into a single placeholder.
+
+    Re-renders are throttled to one per ``min_interval`` seconds, so the number
+    of messages sent to the browser depends on how long the run takes, not on
+    how many claims it has. Warnings are collected into one notice the same way.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self.notices = st.empty()
+        self.placeholder = st.empty()
+        self.cards = {}
+        self.warnings = []
+        self._dirty = False
+        self._last_render = 0.0
+
+    def update(self, key, claim: str, result: Dict):
+        """Add or replace a card; cards keep the order they were first added in."""
+        self.cards[key] = (claim, result)
+        self._dirty = True
+        self.flush()
+
+    def load(self, cards: List[Tuple[str, Dict]], warnings: List[str]):
+        """Show a finished list at once, e.g. one replayed from the session memo."""
+        self.cards = {index: card for index, card in enumerate(cards)}
+        self.warnings = list(warnings)
+        self._dirty = True
+        self.flush(force=True)
+
+    def warn(self, message: str):
+        self.warnings.append(message)
+        self._dirty = True
+        self.flush()
+
+    def flush(self, force: bool = False):
+        now = time.monotonic()
+        if not self._dirty or (not force and now - self._last_render < self.min_interval):
+            return
+        if self.warnings:
+            self.notices.warning("\n\n".join(self.warnings))
+        cards = "".join(claim_card_html(claim, result) for claim, result in self.cards.values())
+        self.placeholder.markdown(
+            f'<div class="claim-list" style="max-height: 70vh; overflow-y: auto;">{cards}</div>',
+            unsafe_allow_html=True
         )
-        
-        claims_data = json.loads(response.choices[0].message.content)
-        return claims_data
-    except Exception as e:
-        st.error(f"Error extracting claims: {e}")
-        return {"claims": []}
-
-def verify_claim(claim: str, wiki_content: Dict) -> Dict:
-    """Verify a single claim against Wikipedia content."""
-    if not wiki_content:
-        return {
-            "status": "error",
-            "justification": "No Wikipedia reference found",
-            "source": "N/A"
-        }
-
-    try:
-        prompt = f"""Verify the following claim against the Wikipedia content:
-
-Claim: "{claim}"
-
-Wikipedia Article: {wiki_content['title']}
-Wikipedia Summary: {wiki_content['summary']}
-Wikipedia Content: {wiki_content['content']}
-
-Determine if the claim is:
-- Accurate: Fully supported by Wikipedia
-- Inaccurate: Contradicted by Wikipedia
-- Subjective: Cannot be definitively verified
-
-Respond in JSON format:
-{{
-    "status": "accurate/inaccurate/subjective",
-    "justification": "Detailed explanation with specific references",
-    "relevant_wiki_quote": "Relevant quote from Wikipedia",
-    "source_url": "{wiki_content['url']}"
-}}"""
-
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            response_format={"type": "json_object"},
-            temperature=0.2
-        )
-        
-        return json.loads(response.choices[0].message.content)
-    except Exception as e:
-        st.error(f"Verification error: {e}")
-        return {
-            "status": "error",
-            "justification": "Processing verification failed",
-            "source_url": wiki_content['url']
-        }
-
-def correct_typos(text: str) -> str:
-    """Correct typos in the input text using Groq."""
-    try:
-        prompt = f"""Correct any spelling and grammatical errors in the following text while preserving its meaning:
-
-Text: {text}
-
-Rules:
-1. Maintain the original meaning
-2. Fix spelling errors
-3. Correct grammar mistakes
-4. Keep proper nouns unchanged
-5. Return the corrected text only
-
-Return JSON format:
-{{
-    "corrected_text": "The corrected version of the text"
-}}"""
-
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            response_format={"type": "json_object"},
-            temperature=0.2
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        return result.get('corrected_text', text)
-    except Exception as e:
-        st.warning(f"Error correcting typos: {str(e)}")
-        return text
-
-def highlight_text_with_tooltips(text: str, claims_data: Dict) -> str:
-    """Highlight text with tooltips showing verification status and justification."""
-    highlighted_text = text
-    
-    colors = {
-        'accurate': '#E8F5E9',    # Light green
-        'inaccurate': '#FFEBEE',  # Light red
-        'subjective': '#FFF3E0'   # Light orange
-    }
-    
-    if claims_data and 'claims' in claims_data:
-        sorted_claims = sorted(claims_data['claims'], 
-                             key=lambda x: len(x.get('claim', '')), 
-                             reverse=True)
-        
-        for claim_info in sorted_claims:
-            claim_text = claim_info.get('claim', '')
-            if claim_text:
-                verification_status = claim_info.get('status', 'subjective')
-                justification = claim_info.get('justification', '')
-                color = colors.get(verification_status, colors['subjective'])
-                
-                # Escape HTML special characters
-                escaped_claim = escape(claim_text)
-                tooltip_text = f"{verification_status.upper()}: {justification}"
-                highlighted_html = f'<span style="background-color: {color};" title="{escape(tooltip_text)}">{escaped_claim}</span>'
-                
-                # Replace the claim text with highlighted version
-                highlighted_text = highlighted_text.replace(claim_text, highlighted_html)
-    
-    return highlighted_text
+        self._dirty = False
+        self._last_render = now
+
+def render_performance_panel(trace):
+    """Show per-stage timings, tokens and cache hits of a traced run in the sidebar."""
+    root = trace.root
+    st.sidebar.markdown("### ⏱ Performance")
+    st.sidebar.write(f"Total: {root.duration_ms / 1000:.2f}s")
+    st.sidebar.dataframe(
+        [stage for stage in trace.summary() if stage['stage'] != trace.name],
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.sidebar.download_button(
+        "⬇️ Spans (JSON lines)", trace.to_json_lines(),
+        file_name=f"trace-{trace.trace_id}.jsonl", mime="application/x-ndjson"
+    )
+    st.sidebar.download_button(
+        "⬇️ Spans (OTLP JSON)", json.dumps(trace.to_otlp()),
+        file_name=f"trace-{trace.trace_id}.otlp.json", mime="application/json"
+    )
 
 def fact_checker_main():
     # Streamlit UI Configuration
@@ -352,7 +199,7 @@ def fact_checker_main():
             st.session_state.input_text = input_text
             
             word_count = len(input_text.split())
-            st.text(f"Word Count: {word_count}/40,000")
+            st.text(f"Word Count: {word_count}/{pipeline.config.max_words:,}")
 
             fact_check_clicked = st.button(
                 "🔍 Check Facts",
@@ -363,156 +210,154 @@ def fact_checker_main():
 
     with col2:
         with st.expander("Fact Check Results", expanded=True):
-            if fact_check_clicked and input_text:
-                if word_count > 40000:
-                    st.error("Text exceeds 40,000 word limit. Please shorten your text.")
+            # Results are memoised per session, so reruns (language switch,
+            # any widget) re-render them instead of running the pipeline again
+            language = st.session_state.current_wiki_language
+            run_key = hash_key(input_text, language, pipeline.config.groq_model)
+            results = st.session_state.setdefault('fact_check_results', OrderedDict())
+            run = results.get(run_key) if input_text else None
+
+            if fact_check_clicked and input_text and run is None:
+                if word_count > pipeline.config.max_words:
+                    st.error(f"Text exceeds {pipeline.config.max_words:,} word limit. Please shorten your text.")
                     st.stop()
 
-                with st.spinner("Processing text..."):
-                    # Correct typos first
-                    corrected_text = correct_typos(input_text)
-                    if corrected_text != input_text:
-                        st.info("Text has been corrected for typos")
-                        input_text = corrected_text
-                    
-                    # Extract keywords
-                    keywords = extract_keywords(input_text)
-                    
-                    # Find Wikipedia page
-                    wiki_content = find_best_wikipedia_page(keywords)
-                    
-                    if not wiki_content:
-                        st.warning("Could not find a relevant Wikipedia page.")
-                        st.stop()
-
-                    # Extract claims
-                    claims_data = extract_claims(input_text)
-                    
-                    if claims_data and claims_data.get('claims', []):
-                        accurate_claims = 0
-                        total_claims = len(claims_data['claims'])
-                        
-                        # Process and display each claim
-                        for claim_info in claims_data['claims']:
-                            result = verify_claim(claim_info['claim'], wiki_content)
-                            
-                            if result['status'] == 'accurate':
-                                accurate_claims += 1
-                            
-                            status_class = f"status-{result['status']}"
-                            
-                            st.markdown(
-                                f"""
-                                <div class="claim-result" style="background-color: {
-                                    '#E8F5E9' if result['status'] == 'accurate' else
-                                    '#FFEBEE' if result['status'] == 'inaccurate' else
-                                    '#FFF3E0'
-                                };">
-                                    <span class="{status_class}">{result['status'].upper()}</span>
-                                    <br><br>
-                                    <strong>Claim:</strong> {claim_info['claim']}
-                                    <br><br>
-                                    <strong>Justification:</strong> {result['justification']}
-                                </div>
-                                """,
-                                unsafe_allow_html=True
-                            )
-                            
-                            if result.get('relevant_wiki_quote'):
-                                st.markdown(
-                                    f'<div class="wiki-quote">{result["relevant_wiki_quote"]}</div>',
-                                    unsafe_allow_html=True
-                                )
-                            
-                            if result.get('source_url'):
-                                st.write("**Source:**", f"[Wikipedia]({result['source_url']})")
-                        
-                        # Display credibility score
-                        credibility_score = (accurate_claims / total_claims) * 100 if total_claims > 0 else 0
-                        st.write("Text Credibility Score")
-                        st.progress(credibility_score/100)
-                        st.write(f"{credibility_score:.1f}%")
-                        
-                    else:
-                        st.warning("No verifiable claims found in the text.")
+                with st.spinner("Processing text..."), \
+                        start_trace("fact_check", words=word_count) as trace:
+                    st.session_state.last_trace = trace
+                    run = run_fact_check(input_text, language)
+                results[run_key] = run
+                while len(results) > FACT_CHECK_MEMO_RUNS:
+                    results.popitem(last=False)
+                render_run_summary(run, input_text, col1)
+            elif run is not None:
+                results.move_to_end(run_key)
+                replay_run(run)
+                render_run_summary(run, input_text, col1)
             elif fact_check_clicked and not input_text:
                 st.warning("Please enter some text to fact-check.")
             else:
                 st.info("Enter text and click 'Check Facts' to start fact-checking.")
 
+            # Optional timing breakdown of the most recent run
+            if st.sidebar.checkbox("⏱ Show performance panel", key="show_performance"):
+                if st.session_state.get('last_trace'):
+                    render_performance_panel(st.session_state.last_trace)
+                else:
+                    st.sidebar.caption("Run a fact check to see where the time goes.")
+
             # Display reference information in sidebar
-            if fact_check_clicked and input_text and wiki_content:
+            if run and run['pages']:
+                wiki_pages = run['pages']
                 st.sidebar.write("**Extracted Keywords:**")
-                st.sidebar.write(keywords)
+                st.sidebar.write(run['keywords'])
                 st.sidebar.write("**Primary Reference:**")
-                st.sidebar.write(f"Title: {wiki_content['title']}")
-                st.sidebar.write(f"URL: {wiki_content['url']}")
-
-# New function for typo correction
-def correct_typos(text: str) -> str:
-    """Correct typos in the input text using Groq."""
-    try:
-        prompt = f"""Correct any spelling and grammatical errors in the following text while preserving its meaning:
-
-Text: {text}
-
-Rules:
-1. Maintain the original meaning
-2. Fix spelling errors
-3. Correct grammar mistakes
-4. Keep proper nouns unchanged
-5. Return the corrected text only
-
-Return JSON format:
-{{
-    "corrected_text": "The corrected version of the text"
-}}"""
-
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            response_format={"type": "json_object"},
-            temperature=0.2
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        return result.get('corrected_text', text)
-    except Exception as e:
-        st.warning(f"Error correcting typos: {str(e)}")
-        return text
+                st.sidebar.write(f"Title: {wiki_pages[0]['title']}")
+                st.sidebar.write(f"URL: {wiki_pages[0]['url']}")
+                if len(wiki_pages) > 1:
+                    st.sidebar.write("**Additional Evidence Pages:**")
+                    for page in wiki_pages[1:]:
+                        st.sidebar.write(f"[{page['title']}]({page['url']})")
+
+def run_fact_check(input_text: str, language: str) -> Dict:
+    """Stream the pipeline's results into the page and return them as a replayable record.
+
+    The record is the pipeline's ``check`` result plus the rendered claim cards.
+    Chunk stages are memoised per session too, so after a language switch or a
+    small edit only the stages whose inputs changed call Groq or Wikipedia again.
+    """
+    memo = st.session_state.setdefault('pipeline_memo', StageMemo())
+    collector = ResultCollector(input_text, language)
+    claim_list = ClaimListView(pipeline.config.stream_update_interval)
+    corrected = False
+
+    # Results stream in chunk by chunk, in document order
+    for kind, payload in pipeline.fact_check_stream(input_text, language, memo=memo):
+        collector.add(kind, payload)
+        if kind == "error":
+            st.error(payload)
+            continue
+
+        if kind == "warning":
+            claim_list.warn(payload)
+            continue
+
+        if kind == "chunk":
+            if payload['corrected'] and not corrected:
+                st.info("Text has been corrected for typos")
+                corrected = True
+            continue
+
+        if kind == "claims":
+            # Add a pending card per claim so results stay in document order
+            chunk_index, chunk_claims = payload
+            for index, claim_info in enumerate(chunk_claims):
+                claim_list.update((chunk_index, index), claim_info['claim'], {})
+            continue
+
+        chunk_index, index, result = payload
+        claim = claim_list.cards[(chunk_index, index)][0]
+        claim_list.update((chunk_index, index), claim, result)
+
+    claim_list.flush(force=True)
+    return dict(collector.finish(), cards=list(claim_list.cards.values()))
+
+def replay_run(run: Dict):
+    """Re-render a memoised run exactly as it was shown when it finished."""
+    for message in run['errors']:
+        st.error(message)
+    if run['corrected']:
+        st.info("Text has been corrected for typos")
+    claim_list = ClaimListView(0)
+    claim_list.load(run['cards'], run['warnings'])
+
+def render_run_summary(run: Dict, input_text: str, highlight_column):
+    """Credibility score and highlighted input of a finished run."""
+    verified_claims = run['claims']
+    if not run['pages']:
+        st.warning("Could not find a relevant Wikipedia page.")
+    elif verified_claims:
+        credibility_score = run['credibility_score']
+        st.write("Text Credibility Score")
+        st.progress(credibility_score/100)
+        st.write(f"{credibility_score:.1f}%")
+
+        with highlight_column.expander("Highlighted Claims", expanded=True):
+            st.markdown(
+                highlight_text_with_tooltips(input_text, {'claims': verified_claims}),
+                unsafe_allow_html=True
+            )
+    else:
+        st.warning("No verifiable claims found in the text.")
 
 # Enhanced highlighting function with tooltips
 def highlight_text_with_tooltips(text: str, claims_data: Dict) -> str:
-    """Highlight text with tooltips showing verification status and justification."""
-    highlighted_text = text
-    
+    """Highlight text with tooltips showing verification status and justification.
+
+    Claims are highlighted at their ``span``, as located by the pipeline
+    (exactly, or by fuzzy alignment for paraphrased claims). The output is
+    built with a single join, so no claim can match inside markup inserted
+    for another. The rest of the text is HTML-escaped.
+    """
     colors = {
         'accurate': '#E8F5E9',    # Light green
         'inaccurate': '#FFEBEE',  # Light red
         'subjective': '#FFF3E0'   # Light orange
     }
-    
-    if claims_data and 'claims' in claims_data:
-        sorted_claims = sorted(claims_data['claims'], 
-                             key=lambda x: len(x.get('claim', '')), 
-                             reverse=True)
-        
-        for claim_info in sorted_claims:
-            claim_text = claim_info.get('claim', '')
-            if claim_text:
-                verification_status = claim_info.get('status', 'subjective')
-                justification = claim_info.get('justification', '')
-                color = colors.get(verification_status, colors['subjective'])
-                
-                # Escape HTML special characters
-                escaped_claim = escape(claim_text)
-                tooltip_text = f"{verification_status.upper()}: {justification}"
-                highlighted_html = f'<span style="background-color: {color};" title="{escape(tooltip_text)}">{escaped_claim}</span>'
-                
-                # Replace the claim text with highlighted version
-                highlighted_text = highlighted_text.replace(claim_text, highlighted_html)
-    
-    return highlighted_text
+
+    claims = [claim_info for claim_info in (claims_data or {}).get('claims', [])
+              if claim_info.get('claim')]
+
+    def wrap(index: int, escaped_claim: str) -> str:
+        claim_info = claims[index]
+        verification_status = claim_info.get('status', 'subjective')
+        color = colors.get(verification_status, colors['subjective'])
+        tooltip_text = f"{verification_status.upper()}: {claim_info.get('justification', '')}"
+        return f'<span style="background-color: {color};" title="{escape(tooltip_text)}">{escaped_claim}</span>'
+
+    spans = sorted((claim_info['span'][0], claim_info['span'][1], index)
+                   for index, claim_info in enumerate(claims) if claim_info.get('span'))
+    return render_spans(text, spans, wrap)
 
     with col2:
         st.subheader("Fact Check Results")
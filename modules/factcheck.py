@@ -1,14 +1,16 @@
 import streamlit as st
 import wikipedia
-from groq import Groq
 import json
 from typing import List, Dict
 import re
 from html import escape
 
-# Initialize Groq client with API key from environment or Streamlit secrets
+from modules.clients import get_groq_client
+from modules.llm import create_completion
+
+# Shared Groq client, reused across calls and sessions
 try:
-    client = Groq(api_key=st.secrets["GROQ_API_KEY"])
+    client = get_groq_client()
 except KeyError:
     st.error("Groq API key not found. Please set GROQ_API_KEY in Streamlit secrets.")
     st.stop()
@@ -68,7 +70,8 @@ Return JSON format:
     ]
 }}"""
         
-        response = client.chat.completions.create(
+        response = create_completion(
+            client,
             messages=[{"role": "user", "content": prompt}],
             model="llama-3.3-70b-versatile",
             response_format={"type": "json_object"},
@@ -146,7 +149,8 @@ Return JSON in this format:
     ]
 }}"""
         
-        response = client.chat.completions.create(
+        response = create_completion(
+            client,
             messages=[{"role": "user", "content": prompt}],
             model="llama-3.3-70b-versatile",
             response_format={"type": "json_object"},
@@ -190,7 +194,8 @@ Respond in JSON format:
     "source_url": "{wiki_content['url']}"
 }}"""
 
-        response = client.chat.completions.create(
+        response = create_completion(
+            client,
             messages=[{"role": "user", "content": prompt}],
             model="llama-3.3-70b-versatile",
             response_format={"type": "json_object"},
@@ -0,0 +1,113 @@
+from bisect import bisect_left
+from collections import deque
+from html import escape
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+
+# (start, end, pattern index) of one occurrence in the text, end exclusive
+Span = Tuple[int, int, int]
+
+
+class AhoCorasick:
+    """Automaton that finds every occurrence of many patterns in one pass over a text.
+
+    Matching costs O(len(text) + occurrences) regardless of the number of
+    patterns. Empty patterns never match; a repeated pattern is reported under
+    its first index.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = list(patterns)
+        goto = [{}]
+        output = [-1]
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            node = 0
+            for char in pattern:
+                child = goto[node].get(char)
+                if child is None:
+                    child = len(goto)
+                    goto[node][char] = child
+                    goto.append({})
+                    output.append(-1)
+                node = child
+            if output[node] == -1:
+                output[node] = index
+
+        # Failure links point to the longest proper suffix that is also a trie
+        # node; output links skip straight to the next suffix that ends a pattern
+        fail = [0] * len(goto)
+        output_link = [-1] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                suffix = fail[child]
+                output_link[child] = suffix if output[suffix] != -1 else output_link[suffix]
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+        self._output_link = output_link
+        self._lengths = [len(pattern) for pattern in self.patterns]
+
+    def finditer(self, text: str) -> Iterator[Span]:
+        """Yield ``(start, end, pattern_index)`` for every occurrence, including overlapping ones."""
+        goto, fail, output, output_link, lengths = (
+            self._goto, self._fail, self._output, self._output_link, self._lengths)
+        node = 0
+        for position, char in enumerate(text, 1):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not node:
+                continue
+            hit = node if output[node] != -1 else output_link[node]
+            while hit > 0:
+                index = output[hit]
+                yield position - lengths[index], position, index
+                hit = output_link[hit]
+
+
+def select_spans(matches: Iterable[Span], taken: Sequence[Span] = ()) -> List[Span]:
+    """Pick non-overlapping spans, longest first, returned in text order.
+
+    Spans in ``taken`` (non-overlapping, in text order) are kept as they are
+    and the new matches only fill the gaps between them.
+    """
+    chosen = list(taken)
+    starts = [start for start, _, _ in chosen]
+    for start, end, index in sorted(matches, key=lambda match: (match[0] - match[1], match[0])):
+        position = bisect_left(starts, start)
+        if position and chosen[position - 1][1] > start:
+            continue
+        if position < len(chosen) and chosen[position][0] < end:
+            continue
+        starts.insert(position, start)
+        chosen.insert(position, (start, end, index))
+    return chosen
+
+
+def find_claim_spans(text: str, claims: Sequence[str]) -> List[Span]:
+    """Non-overlapping exact occurrences of the claims in ``text``, longest claim winning overlaps."""
+    return select_spans(AhoCorasick(claims).finditer(text))
+
+
+def render_spans(text: str, spans: Sequence[Span], wrap: Callable[[int, str], str]) -> str:
+    """HTML-escape ``text`` and replace each span with ``wrap(pattern_index, escaped_span_text)``.
+
+    ``spans`` must be non-overlapping and in text order, as ``select_spans`` returns them.
+    """
+    parts = []
+    position = 0
+    for start, end, index in spans:
+        parts.append(escape(text[position:start]))
+        parts.append(wrap(index, escape(text[start:end])))
+        position = end
+    parts.append(escape(text[position:]))
+    return "".join(parts)
@@ -1,10 +1,26 @@
 import streamlit as st
-from groq import Groq
-import google.generativeai as genai
-from PIL import Image, ExifTags
+from PIL import ExifTags
 import base64
+import functools
 import io
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from modules.clients import get_gemini_model, get_groq_client
+from modules.json_stream import stream_json
+from modules.llm import create_completion, stream_chat_completion
+from modules.rate_limit import BATCH, request_priority
+from modules.tracing import propagate
+from modules.image_session import ImageSession, as_session
+from modules.image_hash import PerceptualHashIndex
+from modules.image_batch import (
+    IMAGE_EXTENSIONS, bounded_map, count_uploaded_images, iter_uploaded_images, rows_to_csv, rows_to_jsonl,
+)
+from modules.cache import hash_key
 
 # ── Optional: piexif for richer GPS parsing ───────────────────────────────────
 try:
@@ -23,14 +39,10 @@ def extract_exif_metadata(image_file):
     """
     Extract EXIF metadata from an uploaded image.
     Uses Pillow's ExifTags (always available) and piexif for GPS details.
+    Accepts an ImageSession, so the upload is not re-read or re-decoded.
     """
-    image_file.seek(0)
-    img = Image.open(image_file)
-
-    # File size
-    image_file.seek(0, 2)
-    file_size_kb = round(image_file.seek(0, 2) / 1024, 2)
-    image_file.seek(0)
+    session = as_session(image_file)
+    img = session.image
 
     metadata = {
         "format":       img.format,
@@ -38,12 +50,12 @@ def extract_exif_metadata(image_file):
         "size":         f"{img.width} x {img.height} px",
         "exif":         {},
         "gps":          {},
-        "file_size_kb": file_size_kb,
+        "file_size_kb": round(session.size_bytes / 1024, 2),
     }
 
     # ── Pillow EXIF ───────────────────────────────────────────────────────────
-    if hasattr(img, "_getexif") and img._getexif():
-        for tag_id, value in img._getexif().items():
+    if session.exif:
+        for tag_id, value in session.exif.items():
             tag_name = ExifTags.TAGS.get(tag_id, tag_id)
             if isinstance(value, bytes):
                 continue
@@ -52,8 +64,7 @@ def extract_exif_metadata(image_file):
     # ── piexif GPS block ──────────────────────────────────────────────────────
     if PIEXIF_AVAILABLE:
         try:
-            image_file.seek(0)
-            exif_dict = piexif.load(image_file.read())
+            exif_dict = session.piexif or {}
             gps_block = exif_dict.get("GPS", {})
             if gps_block:
                 def _ratio(val):
@@ -228,6 +239,27 @@ def display_exif_metadata(metadata):
             st.markdown(f"[📍 Open in Google Maps]({gps['maps_link']})")
 
 
+# ═════════════════════════════════════════════════════════════════════════════
+# NEAR-DUPLICATE LOOKUP
+# ═════════════════════════════════════════════════════════════════════════════
+
+# Perceptual hashes of every analysed upload, with their EXIF and analyses
+image_index = PerceptualHashIndex()
+
+
+def display_seen_before(match):
+    """Report that a near-duplicate of this image was uploaded before."""
+    first_seen = datetime.fromtimestamp(match["first_seen"]).strftime("%b %d, %Y %H:%M")
+    times = "once" if match["seen_count"] == 1 else f"{match['seen_count']} times"
+    similarity = round(100 * (1 - match["distance"] / 64))
+    st.info(
+        f"🔁 **Seen before** — a matching image ({similarity}% similar) has been "
+        f"uploaded {times}, first on {first_seen}."
+    )
+    with st.expander("📷 Metadata of the first upload"):
+        display_exif_metadata(match["metadata"])
+
+
 # ═════════════════════════════════════════════════════════════════════════════
 # AI ANALYSIS DISPLAY
 # ═════════════════════════════════════════════════════════════════════════════
@@ -311,13 +343,35 @@ def display_analysis_results(analysis_result):
 # IMAGE ENCODING
 # ═════════════════════════════════════════════════════════════════════════════
 
-def encode_image(image_file):
-    """Convert uploaded image to base64 string."""
-    image_file.seek(0)
-    img = Image.open(image_file)
-    buffered = io.BytesIO()
-    img.save(buffered, format=img.format or "JPEG")
-    return base64.b64encode(buffered.getvalue()).decode()
+# Longest edge each vision backend actually benefits from; larger uploads are downscaled
+MODEL_MAX_EDGE = {
+    "meta-llama/llama-4-maverick-17b-128e-instruct": 1536,
+    "meta-llama/llama-4-scout-17b-16e-instruct":     1536,
+    "gemini-3.1-flash-lite":                         1536,
+}
+DEFAULT_MAX_EDGE    = int(st.secrets.get("IMAGE_MAX_EDGE", 1536))
+JPEG_QUALITY        = int(st.secrets.get("IMAGE_JPEG_QUALITY", 85))
+MAX_PASSTHROUGH_KB  = int(st.secrets.get("IMAGE_MAX_PASSTHROUGH_KB", 1024))
+
+def max_edge_for(model_name):
+    """Longest edge to send to a given model."""
+    return min(MODEL_MAX_EDGE.get(model_name, DEFAULT_MAX_EDGE), DEFAULT_MAX_EDGE)
+
+
+def preprocess_image(image_file, max_edge=DEFAULT_MAX_EDGE, quality=JPEG_QUALITY):
+    """
+    Prepare an upload for a vision model and return ``(memoryview, mime_type)``.
+    Images that already fit within ``max_edge`` and ``MAX_PASSTHROUGH_KB`` in a
+    format the APIs accept are sent untouched. Anything else is rotated upright,
+    downscaled to ``max_edge``, flattened onto white and re-encoded as JPEG.
+    """
+    return as_session(image_file).payload(max_edge, quality, MAX_PASSTHROUGH_KB * 1024)
+
+
+def encode_image(image_file, max_edge=DEFAULT_MAX_EDGE, quality=JPEG_QUALITY):
+    """Convert uploaded image to a base64 string and its MIME type, sized for vision models."""
+    data, mime_type = preprocess_image(image_file, max_edge, quality)
+    return base64.b64encode(data).decode(), mime_type
 
 
 # ═════════════════════════════════════════════════════════════════════════════
@@ -360,61 +414,428 @@ def _parse_json_response(raw_text):
         }
 
 
-def analyze_image_groq(image_file, model_name):
-    """Analyze image using Groq vision models."""
+class AnalysisCancelled(Exception):
+    """Raised inside a backend whose result is no longer needed."""
+
+
+def _dict_only(on_partial):
+    """Only forward partial documents that are already a JSON object."""
+    def forward(partial):
+        if on_partial and isinstance(partial, dict):
+            on_partial(partial)
+    return forward
+
+
+def _until_cancelled(deltas, cancel):
+    """Pass streamed deltas through until ``cancel`` is set, then close the stream."""
     try:
-        client = Groq(api_key=st.secrets["GROQ_API_KEY"])
-        base64_image = encode_image(image_file)
+        for delta in deltas:
+            if cancel is not None and cancel.is_set():
+                raise AnalysisCancelled()
+            yield delta
+    finally:
+        close = getattr(deltas, "close", None)
+        if close:
+            close()
 
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": ANALYSIS_PROMPT},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            },
+
+_CANCELLED = {"error": "cancelled", "status": "cancelled"}
+
+
+def _gemini_text(response):
+    """
+    Yield the text of each streamed Gemini chunk, skipping chunks without text.
+    Closing the generator early cancels the underlying gRPC stream; the SDK's
+    response has no close method, so transports without a cancellable stream
+    are merely left unread.
+    """
+    try:
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+    finally:
+        stream = getattr(response, "_iterator", None)
+        stop = getattr(stream, "cancel", None) or getattr(stream, "close", None)
+        if stop:
+            stop()
+
+
+def analyze_image_groq(image_file, model_name, on_partial=None, cancel=None):
+    """Analyze image using Groq vision models.
+
+    When ``on_partial`` is given the response is streamed and the callback
+    receives the partially parsed analysis as it arrives. When ``cancel`` (a
+    ``threading.Event``) is given the response is also streamed, and reading
+    stops as soon as the event is set.
+    """
+    try:
+        client = get_groq_client()
+        base64_image, mime_type = encode_image(image_file, max_edge_for(model_name))
+
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": ANALYSIS_PROMPT},
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": f"data:{mime_type};base64,{base64_image}"
                         },
-                    ],
-                }
-            ],
+                    },
+                ],
+            }
+        ]
+
+        if on_partial or cancel is not None:
+            deltas = stream_chat_completion(
+                client, messages, model_name, temperature=0.2, max_tokens=2000
+            )
+            deltas = _until_cancelled(deltas, cancel)
+            return _parse_json_response(stream_json(deltas, _dict_only(on_partial)))
+
+        response = create_completion(
+            client,
+            model=model_name,
+            messages=messages,
             max_tokens=2000,
             temperature=0.2,
         )
         return _parse_json_response(response.choices[0].message.content)
 
+    except AnalysisCancelled:
+        return dict(_CANCELLED)
     except Exception as e:
         st.error(f"Error analyzing image with Groq: {e}")
         return {"error": str(e), "status": "failed"}
 
 
-def analyze_image_gemini(image_file):
-    """Analyze image using Google Gemini."""
+def analyze_image_gemini(image_file, on_partial=None, cancel=None):
+    """
+    Analyze image using Google Gemini, streaming partial results to ``on_partial``
+    if given. Streams too when ``cancel`` is given, and stops once it is set.
+    """
     try:
-        genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-        model = genai.GenerativeModel(
-            model_name="models/gemini-3.1-flash-lite",
-            generation_config={
-                "temperature": 0.2,
-                "top_p":       0.95,
-                "top_k":       40,
-                "max_output_tokens": 8192,
-            },
+        model = get_gemini_model(
+            "models/gemini-3.1-flash-lite",
+            temperature=0.2,
+            top_p=0.95,
+            top_k=40,
+            max_output_tokens=8192,
         )
-        image_file.seek(0)
-        img = Image.open(image_file)
+        data, mime_type = preprocess_image(image_file, max_edge_for("gemini-3.1-flash-lite"))
+        # The SDK wraps the payload in a protobuf Blob, which needs real bytes
+        img = {"mime_type": mime_type, "data": data.tobytes()}
+        if on_partial or cancel is not None:
+            response = model.generate_content([ANALYSIS_PROMPT, img], stream=True)
+            deltas = _until_cancelled(_gemini_text(response), cancel)
+            return _parse_json_response(stream_json(deltas, _dict_only(on_partial)))
+
         response = model.generate_content([ANALYSIS_PROMPT, img])
         return _parse_json_response(response.text)
 
+    except AnalysisCancelled:
+        return dict(_CANCELLED)
     except Exception as e:
         st.error(f"Error analyzing image with Gemini: {e}")
         return {"error": str(e), "status": "failed"}
 
 
+# ═════════════════════════════════════════════════════════════════════════════
+# MULTI-MODEL ANALYSIS
+# ═════════════════════════════════════════════════════════════════════════════
+
+MODEL_OPTIONS = {
+    "Llama 4 Maverick (Groq)": "meta-llama/llama-4-maverick-17b-128e-instruct",
+    "Llama 4 Scout (Groq)":    "meta-llama/llama-4-scout-17b-16e-instruct",
+    "Google Gemini Flash":     "gemini-3.1-flash-lite",
+}
+MODEL_LABELS = {name: label for label, name in MODEL_OPTIONS.items()}
+
+ANALYSIS_MODES = {
+    "Single model":              None,
+    "All models · fastest wins": "fastest",
+    "All models · consensus":    "consensus",
+}
+# Successful analyses a consensus waits for before cancelling the rest
+CONSENSUS_QUORUM = int(st.secrets.get("IMAGE_CONSENSUS_QUORUM", 2))
+
+
+def analyze_image(image_file, model_name, on_partial=None, cancel=None):
+    """Analyze an image with whichever backend serves ``model_name``."""
+    if model_name.startswith("gemini"):
+        return analyze_image_gemini(image_file, on_partial=on_partial, cancel=cancel)
+    return analyze_image_groq(image_file, model_name, on_partial=on_partial, cancel=cancel)
+
+
+def analyze_image_parallel(image_file, model_names, wait_for=1, on_result=None):
+    """
+    Send the image to several models at once and return ``{model_name: result}``
+    in completion order. Once ``wait_for`` analyses have succeeded the remaining
+    backends are cancelled: streaming responses stop being read and their
+    connections are closed. ``on_result(model_name, result)`` is called as each
+    backend finishes. Models cancelled before finishing are absent from the result.
+    Returns once every worker has stopped, since they render through the script
+    context; a cancelled worker stops at its next streamed chunk.
+    """
+    session = as_session(image_file)
+    cancel = threading.Event()
+    results = {}
+
+    # Worker threads need the script context so st.error inside the backends renders
+    ctx = get_script_run_ctx()
+    executor = ThreadPoolExecutor(max_workers=max(1, len(model_names)),
+                                  initializer=add_script_run_ctx,
+                                  initargs=(None, ctx))
+    try:
+        futures = {executor.submit(propagate(analyze_image), session, name, None, cancel): name
+                   for name in model_names}
+        succeeded = 0
+        for future in as_completed(futures):
+            name = futures[future]
+            results[name] = future.result()
+            if on_result:
+                on_result(name, results[name])
+            if "error" not in results[name]:
+                succeeded += 1
+                if succeeded >= wait_for:
+                    break
+    finally:
+        cancel.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+    return results
+
+
+def _normalize_item(item):
+    return " ".join(str(item).casefold().strip(" .;:,-").split())
+
+
+def merge_analyses(analyses):
+    """
+    Merge several models' analyses into one consensus result.
+    ``objects_identified`` and ``notable_features`` are unioned case-insensitively
+    and ordered by how many models mention each item; the free-text fields come
+    from the first analysis.
+    """
+    merged = dict(analyses[0])
+    for key in ("objects_identified", "notable_features"):
+        votes = {}
+        for analysis in analyses:
+            seen = set()
+            for item in analysis.get(key) or []:
+                norm = _normalize_item(item)
+                if not norm or norm in seen:
+                    continue
+                seen.add(norm)
+                entry = votes.setdefault(norm, [item, 0, len(votes)])
+                entry[1] += 1
+        ranked = sorted(votes.values(), key=lambda entry: (-entry[1], entry[2]))
+        merged[key] = [item for item, _, _ in ranked]
+    return merged
+
+
+def collect_analyses(session, image_id, model_names, wait_for=1, on_result=None):
+    """
+    Gather analyses from ``model_names`` until ``wait_for`` have succeeded and
+    return ``{model_name: result}``. Stored analyses of near-duplicate images
+    count without calling the model and come first; the rest run in parallel
+    and successful ones are stored. ``on_result(model_name, result, cached)``
+    is called for every analysis collected.
+    """
+    results = {}
+    for name in model_names:
+        cached_analysis = image_index.get_analysis(image_id, name)
+        if cached_analysis is not None:
+            results[name] = cached_analysis
+            if on_result:
+                on_result(name, cached_analysis, True)
+
+    pending = [name for name in model_names if name not in results]
+    if len(results) < wait_for and pending:
+        fresh = analyze_image_parallel(
+            session, pending, wait_for - len(results),
+            (lambda name, result: on_result(name, result, False)) if on_result else None,
+        )
+        for name, result in fresh.items():
+            if "error" not in result:
+                image_index.set_analysis(image_id, name, result)
+        results.update(fresh)
+    return results
+
+
+def combine_analyses(results, policy):
+    """
+    Apply ``policy`` to collected analyses and return ``(analysis, model_names)``,
+    or ``(None, [])`` if every model failed. "consensus" merges all successful
+    analyses; anything else takes the first one.
+    """
+    succeeded = [(name, result) for name, result in results.items() if "error" not in result]
+    if not succeeded:
+        return None, []
+    if policy == "consensus":
+        return merge_analyses([result for _, result in succeeded]), [name for name, _ in succeeded]
+    name, result = succeeded[0]
+    return result, [name]
+
+
+def wait_for_policy(policy, model_count):
+    """Number of successful analyses ``policy`` needs before cancelling the rest."""
+    return min(CONSENSUS_QUORUM, model_count) if policy == "consensus" else 1
+
+
+def display_multi_model_analysis(session, image_id, policy):
+    """Run every model under ``policy`` ("fastest" or "consensus") and render the outcome."""
+    model_names = list(MODEL_OPTIONS.values())
+    wait_for = wait_for_policy(policy, len(model_names))
+
+    status = {}
+    status_placeholder = st.empty()
+    started = time.monotonic()
+
+    def show_status():
+        lines = [f"- **{MODEL_LABELS[name]}** — {status.get(name, '⏳ running…')}"
+                 for name in model_names]
+        status_placeholder.markdown("\n".join(lines))
+
+    def on_result(name, result, cached):
+        elapsed = time.monotonic() - started
+        if cached:
+            status[name] = "⚡ cached"
+        elif "error" in result:
+            status[name] = f"❌ failed after {elapsed:.1f}s"
+        else:
+            status[name] = f"✅ {elapsed:.1f}s"
+        show_status()
+
+    with st.spinner("Analyzing image with all models…"):
+        results = collect_analyses(session, image_id, model_names, wait_for, on_result)
+    for name in model_names:
+        status.setdefault(name, "⏹ cancelled")
+    show_status()
+
+    analysis_result, used = combine_analyses(results, policy)
+    if analysis_result is None:
+        st.error("Analysis failed. Please try again.")
+        return
+
+    if policy == "fastest":
+        st.caption(f"🏁 Fastest result from {MODEL_LABELS[used[0]]}.")
+    else:
+        labels = ", ".join(MODEL_LABELS[name] for name in used)
+        st.caption(f"🤝 Consensus of {labels}; items are ordered by how many models found them.")
+    display_analysis_results(analysis_result)
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# BATCH ANALYSIS
+# ═════════════════════════════════════════════════════════════════════════════
+
+BATCH_CONCURRENCY = int(st.secrets.get("IMAGE_BATCH_CONCURRENCY", 4))
+BATCH_MAX_FILES   = int(st.secrets.get("IMAGE_BATCH_MAX_FILES", 500))
+BATCH_MAX_MB      = int(st.secrets.get("IMAGE_BATCH_MAX_MB", 25))
+
+BATCH_COLUMNS = [
+    "file", "status", "format", "dimensions", "file_size_kb", "camera", "taken_at",
+    "latitude", "longitude", "seen_before", "models", "description",
+    "objects_identified", "text_content", "notable_features", "context", "error",
+]
+
+
+def analyze_batch_item(item, model_names, policy):
+    """
+    Extract EXIF and run the vision backends for one ``(name, bytes)`` batch
+    item, returning its results row. Failures are recorded in the row's
+    ``status`` and ``error`` columns instead of being raised.
+    """
+    name, data = item
+    row = {"file": name}
+    if isinstance(data, Exception):
+        row.update(status="skipped", error=str(data))
+        return row
+
+    try:
+        session = ImageSession(data, name)
+        metadata = extract_exif_metadata(session)
+        image_id, seen_before = image_index.record(*session.perceptual_hashes, metadata)
+        # Bulk uploads queue behind interactive requests for the shared Groq budget
+        with request_priority(BATCH):
+            results = collect_analyses(
+                session, image_id, model_names, wait_for_policy(policy, len(model_names))
+            )
+    except Exception as e:
+        row.update(status="failed", error=str(e))
+        return row
+
+    exif = metadata["exif"]
+    row.update({
+        "format":       metadata["format"],
+        "dimensions":   metadata["size"],
+        "file_size_kb": metadata["file_size_kb"],
+        "camera":       " ".join(exif[k] for k in ("Make", "Model") if k in exif),
+        "taken_at":     exif.get("DateTimeOriginal", exif.get("DateTime", "")),
+        "latitude":     metadata["gps"].get("latitude", ""),
+        "longitude":    metadata["gps"].get("longitude", ""),
+        "seen_before":  seen_before["seen_count"] if seen_before else 0,
+    })
+
+    analysis_result, used = combine_analyses(results, policy)
+    if analysis_result is None:
+        errors = {result.get("error", "") for result in results.values()}
+        row.update(status="failed", error="; ".join(sorted(e for e in errors if e)))
+        return row
+
+    row["status"] = "done"
+    row["models"] = [MODEL_LABELS.get(model, model) for model in used]
+    for key in ("description", "objects_identified", "text_content", "notable_features", "context"):
+        row[key] = analysis_result.get(key, [] if key in ("objects_identified", "notable_features") else "")
+    return row
+
+
+def display_batch_analysis(uploads, model_names, policy):
+    """Analyze several uploads and zip archives through a bounded work queue."""
+    st.subheader("🗂 Batch Analysis")
+
+    # Download buttons rerun the script, so keep finished batches in the session
+    batch_key = hash_key(sorted(u.file_id for u in uploads), model_names, policy)
+    stored = st.session_state.get("image_batch")
+    if stored and stored[0] == batch_key:
+        rows = stored[1]
+        st.dataframe(rows, use_container_width=True)
+    else:
+        total = count_uploaded_images(uploads, BATCH_MAX_FILES)
+        progress = st.progress(0.0, text=f"Analyzing {total} images…")
+        table = st.empty()
+
+        # Worker threads need the script context so st.* calls inside the backends render
+        ctx = get_script_run_ctx()
+        rows = []
+        items = iter_uploaded_images(uploads, BATCH_MAX_MB * 1024 * 1024, BATCH_MAX_FILES)
+        for _, row in bounded_map(functools.partial(analyze_batch_item, model_names=model_names,
+                                                    policy=policy),
+                                  items, BATCH_CONCURRENCY,
+                                  initializer=add_script_run_ctx, initargs=(None, ctx)):
+            rows.append(row)
+            icon = {"done": "✅", "failed": "❌"}.get(row["status"], "⏭")
+            progress.progress(len(rows) / max(total, 1),
+                              text=f"{icon} {row['file']} — {len(rows)}/{total} images")
+            table.dataframe(rows, use_container_width=True)
+        progress.empty()
+        st.session_state["image_batch"] = (batch_key, rows)
+
+    done = sum(1 for row in rows if row.get("status") == "done")
+    st.caption(f"{done} of {len(rows)} images analyzed.")
+
+    col1, col2 = st.columns(2)
+    col1.download_button("⬇️ Download CSV", rows_to_csv(rows, BATCH_COLUMNS),
+                         file_name="image_analysis.csv", mime="text/csv")
+    col2.download_button("⬇️ Download JSONL", rows_to_jsonl(rows),
+                         file_name="image_analysis.jsonl", mime="application/x-ndjson")
+
+
 # ═════════════════════════════════════════════════════════════════════════════
 # MAIN PAGE
 # ═════════════════════════════════════════════════════════════════════════════
@@ -422,49 +843,88 @@ def analyze_image_gemini(image_file):
 def image_analyzer_main():
     """Main function for the image analysis page."""
 
-    model_options = {
-        "Llama 4 Maverick (Groq)": "meta-llama/llama-4-maverick-17b-128e-instruct",
-        "Llama 4 Scout (Groq)":    "meta-llama/llama-4-scout-17b-16e-instruct",
-        "Google Gemini Flash":     "gemini-3.1-flash-lite",
-    }
+    model_options = MODEL_OPTIONS
 
-    selected_model = st.selectbox("Choose an AI Model", list(model_options.keys()))
+    mode = st.radio("Analysis mode", list(ANALYSIS_MODES.keys()), horizontal=True)
+    policy = ANALYSIS_MODES[mode]
+    if policy is None:
+        selected_model = st.selectbox("Choose an AI Model", list(model_options.keys()))
 
-    uploaded_file = st.file_uploader(
-        "Upload an image for analysis",
-        type=["png", "jpg", "jpeg"],
-    )
+    uploads = st.file_uploader(
+        "Upload an image for analysis, or several images / a .zip for a batch",
+        type=[ext.lstrip(".") for ext in IMAGE_EXTENSIONS] + ["zip"],
+        accept_multiple_files=True,
+    ) or []
 
+    if len(uploads) > 1 or any(u.name.lower().endswith(".zip") for u in uploads):
+        if policy is None:
+            model_names = [model_options[selected_model]]
+        else:
+            model_names = list(MODEL_OPTIONS.values())
+        display_batch_analysis(uploads, model_names, policy)
+        return
+
+    uploaded_file = uploads[0] if uploads else None
     if uploaded_file is not None:
 
+        # One read and one decode per upload, reused across reruns and consumers
+        cached = st.session_state.get("image_session")
+        if cached and cached[0] == uploaded_file.file_id:
+            _, session, image_id, seen_before = cached
+        else:
+            session = ImageSession.from_upload(uploaded_file)
+            # Register the sighting once per upload, not on every rerun
+            image_id, seen_before = image_index.record(
+                *session.perceptual_hashes, extract_exif_metadata(session)
+            )
+            st.session_state["image_session"] = (uploaded_file.file_id, session, image_id, seen_before)
+
         # ── Preview ───────────────────────────────────────────────────────────
-        uploaded_file.seek(0)
-        st.image(uploaded_file, caption="Uploaded Image", use_column_width=False, width=480)
+        st.image(session.data, caption="Uploaded Image", use_column_width=False, width=480)
+
+        if seen_before:
+            display_seen_before(seen_before)
 
         st.divider()
 
         # ── EXIF metadata ─────────────────────────────────────────────────────
-        uploaded_file.seek(0)
-        metadata = extract_exif_metadata(uploaded_file)
+        metadata = extract_exif_metadata(session)
         display_exif_metadata(metadata)
 
         st.divider()
 
         # ── AI analysis ───────────────────────────────────────────────────────
         st.subheader("🤖 AI Analysis")
+        if policy is not None:
+            display_multi_model_analysis(session, image_id, policy)
+            return
+
+        model_name = model_options[selected_model]
+
+        # Near-duplicates reuse the stored analysis instead of calling the model
+        cached_analysis = image_index.get_analysis(image_id, model_name)
+        if cached_analysis is not None:
+            st.caption("⚡ Cached analysis of a matching image.")
+            display_analysis_results(cached_analysis)
+            return
+
+        analysis_placeholder = st.empty()
+
+        def show_partial(partial):
+            # Re-render the analysis so far; fields fill in as the model streams
+            with analysis_placeholder.container():
+                display_analysis_results(partial)
+
         with st.spinner("Analyzing image…"):
-            uploaded_file.seek(0)
-            if selected_model.startswith("Google"):
-                analysis_result = analyze_image_gemini(uploaded_file)
-            else:
-                analysis_result = analyze_image_groq(
-                    uploaded_file, model_options[selected_model]
-                )
+            analysis_result = analyze_image(session, model_name, on_partial=show_partial)
 
+        analysis_placeholder.empty()
         if "error" in analysis_result:
             st.error("Analysis failed. Please try again.")
         else:
-            display_analysis_results(analysis_result)
+            image_index.set_analysis(image_id, model_name, analysis_result)
+            with analysis_placeholder.container():
+                display_analysis_results(analysis_result)
 
 
 # ═════════════════════════════════════════════════════════════════════════════
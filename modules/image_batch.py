@@ -0,0 +1,123 @@
+import csv
+import io
+import json
+import os
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def _is_image_name(name: str) -> bool:
+    base = os.path.basename(name)
+    return bool(base) and not base.startswith(".") and base.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _archive_members(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    return [info for info in archive.infolist()
+            if not info.is_dir() and "__MACOSX" not in info.filename and _is_image_name(info.filename)]
+
+
+def count_uploaded_images(uploads: Iterable, max_files: int = 500) -> int:
+    """Number of images ``iter_uploaded_images`` will yield, reading only zip directories."""
+    count = 0
+    for upload in uploads:
+        name = getattr(upload, "name", "upload")
+        if not name.lower().endswith(".zip"):
+            count += 1
+            continue
+        data = upload.getvalue() if hasattr(upload, "getvalue") else upload.read()
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                count += len(_archive_members(archive))
+        except zipfile.BadZipFile:
+            count += 1
+    return min(count, max_files)
+
+
+def iter_uploaded_images(uploads: Iterable, max_bytes: int = 25 * 1024 * 1024,
+                         max_files: int = 500) -> Iterator[Tuple[str, Any]]:
+    """Yield ``(name, bytes_or_error)`` for every image in the uploads, expanding zip archives.
+
+    Archives are read member by member as the caller iterates, so only the
+    images currently being worked on are held in memory. Members larger than
+    ``max_bytes`` uncompressed yield a ``ValueError`` instead of their bytes,
+    and iteration stops after ``max_files`` images.
+    """
+    count = 0
+    for upload in uploads:
+        name = getattr(upload, "name", "upload")
+        data = upload.getvalue() if hasattr(upload, "getvalue") else upload.read()
+        if not name.lower().endswith(".zip"):
+            yield name, data
+            count += 1
+            if count >= max_files:
+                return
+            continue
+
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(data))
+        except zipfile.BadZipFile as e:
+            yield name, ValueError(f"Not a valid zip archive: {e}")
+            continue
+        with archive:
+            for info in _archive_members(archive):
+                member = f"{name}/{info.filename}"
+                if info.file_size > max_bytes:
+                    yield member, ValueError(f"Larger than {max_bytes // (1024 * 1024)} MB uncompressed")
+                else:
+                    yield member, archive.read(info)
+                count += 1
+                if count >= max_files:
+                    return
+
+
+def bounded_map(func: Callable, items: Iterable, max_workers: int = 4, max_pending: int = None,
+                initializer: Callable = None, initargs: Tuple = ()) -> Iterator[Tuple[Any, Any]]:
+    """Run ``func`` over ``items`` on a thread pool, yielding ``(item, result)`` as each finishes.
+
+    ``items`` is consumed lazily and at most ``max_pending`` (default twice
+    ``max_workers``) calls are queued or running at once, so a large batch
+    never loads all of its inputs up front. Exceptions raised by ``func``
+    propagate when its result is yielded.
+    """
+    max_workers = max(1, max_workers)
+    max_pending = max(max_workers, max_pending or 2 * max_workers)
+    items = iter(items)
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=initializer,
+                            initargs=initargs) as executor:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[executor.submit(func, item)] = item
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+
+def rows_to_csv(rows: List[Dict], columns: List[str]) -> str:
+    """Serialise result rows as CSV, joining list values with "; "."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({
+            key: "; ".join(map(str, value)) if isinstance(value, list) else value
+            for key, value in row.items()
+        })
+    return buffer.getvalue()
+
+
+def rows_to_jsonl(rows: List[Dict]) -> str:
+    """Serialise result rows as JSON Lines."""
+    return "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows)
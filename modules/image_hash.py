@@ -0,0 +1,317 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from modules import cache
+from modules.cache import CACHE_PATH, open_connection
+
+HASH_BITS = 64
+# Largest pHash Hamming distance still treated as the same picture
+MAX_DISTANCE = int(os.environ.get("IMAGE_HASH_MAX_DISTANCE", 6))
+# Images not seen for this long are forgotten, along with their analyses
+IMAGE_HASH_TTL = float(os.environ.get("IMAGE_HASH_TTL", 90 * 24 * 3600))
+# Budget for stored images and analyses; least recently seen images go first
+IMAGE_HASH_MAX_BYTES = int(os.environ.get("IMAGE_HASH_MAX_BYTES", 64 * 1024 * 1024))
+# Approximate bytes per stored image besides its metadata (hashes, bands, row overhead)
+_IMAGE_ROW_BYTES = 256
+
+_ORIENTATION_TAG = 0x0112
+_DCT_SIZE = 32
+_DCT_KEEP = 8
+# cos((2x + 1) * u * pi / 2N) for the low frequencies kept by pHash
+_DCT_COS = [
+    [math.cos((2 * x + 1) * u * math.pi / (2 * _DCT_SIZE)) for x in range(_DCT_SIZE)]
+    for u in range(_DCT_KEEP)
+]
+
+
+def _normalized_thumbnail(img: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """Upright, alpha-flattened grayscale thumbnail, so re-saves of one picture agree."""
+    if img.getexif().get(_ORIENTATION_TAG, 1) != 1:
+        img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    return img.convert("L").resize(size, Image.LANCZOS, reducing_gap=2.0)
+
+
+def dhash(img: Image.Image) -> int:
+    """64-bit difference hash: whether each pixel is brighter than its right neighbour."""
+    thumb = _normalized_thumbnail(img, (9, 8))
+    pixels = list(thumb.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left, right = pixels[row * 9 + col], pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def phash(img: Image.Image) -> int:
+    """64-bit DCT hash: low-frequency coefficients of a 32x32 thumbnail against their median."""
+    thumb = _normalized_thumbnail(img, (_DCT_SIZE, _DCT_SIZE))
+    pixels = list(thumb.getdata())
+    rows = [pixels[y * _DCT_SIZE:(y + 1) * _DCT_SIZE] for y in range(_DCT_SIZE)]
+
+    # Separable 2-D DCT-II, computing only the 8x8 low-frequency block
+    row_dct = [[sum(c * p for c, p in zip(cos_u, row)) for cos_u in _DCT_COS] for row in rows]
+    coefficients = [
+        sum(cos_v[y] * row_dct[y][u] for y in range(_DCT_SIZE))
+        for cos_v in _DCT_COS
+        for u in range(_DCT_KEEP)
+    ]
+    # The DC term only reflects overall brightness, so leave it out of the median
+    median = sorted(coefficients[1:])[len(coefficients[1:]) // 2]
+    value = 0
+    for coefficient in coefficients:
+        value = (value << 1) | (coefficient > median)
+    return value
+
+
+def compute_hashes(img: Image.Image) -> Tuple[int, int]:
+    """Return ``(phash, dhash)`` for a PIL image."""
+    return phash(img), dhash(img)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def _bands(value: int, count: int):
+    """Split a hash into ``count`` contiguous bit bands of near-equal width."""
+    bands = []
+    start = 0
+    for i in range(count):
+        width = HASH_BITS // count + (i < HASH_BITS % count)
+        bands.append((value >> start) & ((1 << width) - 1))
+        start += width
+    return bands
+
+
+class PerceptualHashIndex:
+    """Near-duplicate image index with cached analyses, stored in the shared cache database.
+
+    Each distinct picture is stored once with its pHash, dHash, the EXIF of the
+    first upload and a sighting counter. Lookups use multi-index hashing: the
+    pHash is split into ``max_distance + 1`` bands, so any hash within
+    ``max_distance`` bits shares at least one band exactly, and only images
+    sharing a band are compared bit by bit. dHash must also agree loosely,
+    which filters out accidental pHash collisions.
+
+    Like ``DiskCache``, the index is bounded: images not seen for ``ttl``
+    seconds are dropped, then the least recently seen ones until images and
+    analyses fit in ``max_bytes``. An image's analyses are dropped with it.
+    The check runs every ``cache.EVICT_EVERY`` new images.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_distance: int = MAX_DISTANCE,
+                 max_bytes: int = IMAGE_HASH_MAX_BYTES, ttl: float = IMAGE_HASH_TTL):
+        self.path = path
+        self.max_distance = max_distance
+        self.band_count = max_distance + 1
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._inserts_since_evict = None
+        self._evict_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS image_hashes (
+                       id         INTEGER PRIMARY KEY,
+                       phash      TEXT NOT NULL,
+                       dhash      TEXT NOT NULL,
+                       metadata   TEXT NOT NULL,
+                       first_seen REAL NOT NULL,
+                       last_seen  REAL NOT NULL,
+                       seen_count INTEGER NOT NULL
+                   )"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS image_hash_bands (
+                       band     INTEGER NOT NULL,
+                       value    INTEGER NOT NULL,
+                       image_id INTEGER NOT NULL
+                   )"""
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS image_hash_bands_lookup ON image_hash_bands (band, value)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS image_hash_bands_image ON image_hash_bands (image_id)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS image_hashes_lru ON image_hashes (last_seen)"
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS image_analyses (
+                       image_id   INTEGER NOT NULL,
+                       model      TEXT NOT NULL,
+                       result     TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       PRIMARY KEY (image_id, model)
+                   )"""
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = open_connection(self.path)
+        return conn
+
+    def lookup(self, phash_value: int, dhash_value: int) -> Optional[Dict]:
+        """Return the closest stored image within ``max_distance``, or None.
+
+        The match is a dict with ``id``, ``distance``, ``metadata``,
+        ``first_seen``, ``last_seen`` and ``seen_count``.
+        """
+        bands = _bands(phash_value, self.band_count)
+        clauses = " OR ".join("(b.band = ? AND b.value = ?)" for _ in bands)
+        params = [p for i, value in enumerate(bands) for p in (i, value)]
+        try:
+            rows = self._connect().execute(
+                f"""SELECT DISTINCT h.id, h.phash, h.dhash, h.metadata,
+                           h.first_seen, h.last_seen, h.seen_count
+                    FROM image_hash_bands b JOIN image_hashes h ON h.id = b.image_id
+                    WHERE {clauses}""",
+                params,
+            ).fetchall()
+        except sqlite3.Error:
+            return None
+
+        best = None
+        for image_id, p, d, metadata, first_seen, last_seen, seen_count in rows:
+            distance = hamming(phash_value, int(p, 16))
+            if distance > self.max_distance or hamming(dhash_value, int(d, 16)) > 2 * self.max_distance:
+                continue
+            if best is None or distance < best["distance"]:
+                best = {
+                    "id":         image_id,
+                    "distance":   distance,
+                    "metadata":   json.loads(metadata),
+                    "first_seen": first_seen,
+                    "last_seen":  last_seen,
+                    "seen_count": seen_count,
+                }
+        return best
+
+    def record(self, phash_value: int, dhash_value: int, metadata: Dict) -> Tuple[int, Optional[Dict]]:
+        """Register a sighting and return ``(image_id, previous_match)``.
+
+        A near-duplicate bumps the stored image's counter and keeps its original
+        metadata; anything else is added as a new image with ``previous_match``
+        None. Returns ``(None, None)`` if the database is unavailable.
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            # Lookup and insert in one write transaction so concurrent uploads of
+            # the same picture do not both register it as new
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                match = self.lookup(phash_value, dhash_value)
+                if match:
+                    conn.execute(
+                        "UPDATE image_hashes SET last_seen = ?, seen_count = seen_count + 1 WHERE id = ?",
+                        (now, match["id"]),
+                    )
+                    return match["id"], match
+                image_id = self._insert(conn, phash_value, dhash_value, metadata, now)
+            if self._eviction_due():
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    self._evict(conn, now, keep=image_id)
+            return image_id, None
+        except sqlite3.Error:
+            return None, None
+
+    def _eviction_due(self) -> bool:
+        with self._evict_lock:
+            if self._inserts_since_evict is not None and self._inserts_since_evict + 1 < cache.EVICT_EVERY:
+                self._inserts_since_evict += 1
+                return False
+            self._inserts_since_evict = 0
+            return True
+
+    def _evict(self, conn: sqlite3.Connection, now: float, keep: Optional[int] = None) -> None:
+        """Forget expired images, then least recently seen ones until under ``max_bytes``."""
+        victims = [row[0] for row in conn.execute(
+            "SELECT id FROM image_hashes WHERE last_seen < ?", (now - self.ttl,))]
+
+        total = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(metadata)), 0) + COUNT(*) * ? FROM image_hashes",
+            (_IMAGE_ROW_BYTES,),
+        ).fetchone()[0] + conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(result)), 0) FROM image_analyses"
+        ).fetchone()[0]
+        excess = total - self.max_bytes
+        if excess > 0:
+            expired = set(victims)
+            for image_id, size in conn.execute(
+                """SELECT h.id, LENGTH(h.metadata) + ? +
+                          COALESCE((SELECT SUM(LENGTH(a.result)) FROM image_analyses a
+                                    WHERE a.image_id = h.id), 0)
+                   FROM image_hashes h ORDER BY h.last_seen""",
+                (_IMAGE_ROW_BYTES,),
+            ):
+                if excess <= 0:
+                    break
+                if image_id == keep:
+                    continue
+                if image_id not in expired:
+                    victims.append(image_id)
+                excess -= size
+
+        if victims:
+            rows = [(image_id,) for image_id in victims]
+            conn.executemany("DELETE FROM image_hash_bands WHERE image_id = ?", rows)
+            conn.executemany("DELETE FROM image_analyses WHERE image_id = ?", rows)
+            conn.executemany("DELETE FROM image_hashes WHERE id = ?", rows)
+
+    def _insert(self, conn, phash_value, dhash_value, metadata, now) -> int:
+        cursor = conn.execute(
+            "INSERT INTO image_hashes (phash, dhash, metadata, first_seen, last_seen, seen_count) "
+            "VALUES (?, ?, ?, ?, ?, 1)",
+            (f"{phash_value:016x}", f"{dhash_value:016x}",
+             json.dumps(metadata, ensure_ascii=False, default=str), now, now),
+        )
+        image_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO image_hash_bands VALUES (?, ?, ?)",
+            [(i, value, image_id) for i, value in enumerate(_bands(phash_value, self.band_count))],
+        )
+        return image_id
+
+    def get_analysis(self, image_id: Optional[int], model: str) -> Optional[Dict]:
+        """Return the cached analysis of an image by ``model``, or None."""
+        if image_id is None:
+            return None
+        try:
+            row = self._connect().execute(
+                "SELECT result FROM image_analyses WHERE image_id = ? AND model = ?",
+                (image_id, model),
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def set_analysis(self, image_id: Optional[int], model: str, result: Dict) -> None:
+        """Cache a successful analysis of an image by ``model``."""
+        if image_id is None:
+            return
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO image_analyses VALUES (?, ?, ?, ?)",
+                (image_id, model, json.dumps(result, ensure_ascii=False), time.time()),
+            )
+        except sqlite3.Error:
+            pass
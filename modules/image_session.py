@@ -0,0 +1,146 @@
+import io
+import threading
+
+from PIL import Image, ImageOps
+
+from modules.image_hash import compute_hashes
+
+# ── Optional: piexif for richer GPS parsing ───────────────────────────────────
+try:
+    import piexif
+    PIEXIF_AVAILABLE = True
+except ImportError:
+    PIEXIF_AVAILABLE = False
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Formats vision APIs accept as-is, with their MIME types
+PASSTHROUGH_MIME = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+_ORIENTATION_TAG = 0x0112
+
+
+class ImageSession:
+    """
+    One uploaded image, read once and decoded at most once.
+
+    The upload bytes are read a single time and shared through ``view``, a
+    zero-copy ``memoryview``. The decoded image, EXIF data, perceptual hashes
+    and encoded model payloads are computed lazily on first use and cached, so
+    EXIF extraction, preview and every vision backend reuse the same objects.
+    Safe to share between threads.
+    """
+
+    def __init__(self, data, name=None):
+        self.data = bytes(data) if not isinstance(data, bytes) else data
+        self.view = memoryview(self.data)
+        self.name = name
+        self._lock = threading.RLock()
+        self._image = None
+        self._exif = None
+        self._piexif = None
+        self._hashes = None
+        self._payloads = {}
+
+    @classmethod
+    def from_upload(cls, upload):
+        """Read a Streamlit UploadedFile (or any binary file object) exactly once."""
+        if hasattr(upload, "getvalue"):
+            data = upload.getvalue()
+        else:
+            upload.seek(0)
+            data = upload.read()
+        return cls(data, getattr(upload, "name", None))
+
+    @property
+    def size_bytes(self):
+        return len(self.data)
+
+    @property
+    def image(self):
+        """
+        The shared PIL image. Opening only parses the header; Pillow decodes the
+        pixels on first pixel access and keeps them. Do not mutate it.
+        """
+        with self._lock:
+            if self._image is None:
+                self._image = Image.open(io.BytesIO(self.data))
+            return self._image
+
+    @property
+    def exif(self):
+        """Pillow's raw EXIF dict (tag id -> value), or an empty dict."""
+        with self._lock:
+            if self._exif is None:
+                img = self.image
+                raw = img._getexif() if hasattr(img, "_getexif") else None
+                self._exif = raw or {}
+            return self._exif
+
+    @property
+    def piexif(self):
+        """piexif's parsed EXIF dict, or None when piexif is missing or parsing fails."""
+        if not PIEXIF_AVAILABLE:
+            return None
+        with self._lock:
+            if self._piexif is None:
+                try:
+                    self._piexif = piexif.load(self.data)
+                except Exception:
+                    self._piexif = {}
+            return self._piexif or None
+
+    @property
+    def perceptual_hashes(self):
+        """``(phash, dhash)`` of the picture, for near-duplicate lookups."""
+        with self._lock:
+            if self._hashes is None:
+                self._hashes = compute_hashes(self.image)
+            return self._hashes
+
+    def payload(self, max_edge, quality=85, max_passthrough_bytes=1024 * 1024):
+        """
+        Return ``(memoryview, mime_type)`` sized for a vision model.
+        Uploads that already fit in a format the APIs accept are returned as a
+        view of the original bytes; anything else is rotated upright, downscaled
+        to ``max_edge``, flattened onto white and re-encoded as JPEG. Results are
+        cached per ``(max_edge, quality)``.
+        """
+        key = (max_edge, quality, max_passthrough_bytes)
+        with self._lock:
+            if key in self._payloads:
+                return self._payloads[key]
+
+            img = self.image
+            fits = max(img.size) <= max_edge and self.size_bytes <= max_passthrough_bytes
+            if fits and img.format in PASSTHROUGH_MIME:
+                result = (self.view, PASSTHROUGH_MIME[img.format])
+            else:
+                result = (self._encode(img, max_edge, quality), "image/jpeg")
+            self._payloads[key] = result
+            return result
+
+    @staticmethod
+    def _encode(img, max_edge, quality):
+        # Every step below returns a new image, so the shared decode is left intact
+        if img.getexif().get(_ORIENTATION_TAG, 1) != 1:
+            img = ImageOps.exif_transpose(img)
+        if img.mode in ("RGBA", "LA", "P"):
+            img = img.convert("RGBA")
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A"))
+            img = background
+        elif img.mode != "RGB":
+            img = img.convert("RGB")
+        scale = max_edge / max(img.size)
+        if scale < 1:
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.resize(size, Image.LANCZOS)
+
+        buffered = io.BytesIO()
+        img.save(buffered, format="JPEG", quality=quality, optimize=True)
+        return buffered.getbuffer()
+
+
+def as_session(image):
+    """Accept either an ImageSession or an uploaded file object."""
+    return image if isinstance(image, ImageSession) else ImageSession.from_upload(image)
@@ -0,0 +1,228 @@
+import json
+import time
+from typing import Any, Callable, Iterable
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_LITERAL_CHARS = set("0123456789+-.eEtruefalsn")
+
+
+class _Frame:
+    __slots__ = ("container", "key", "state")
+
+    def __init__(self, container, state):
+        self.container = container
+        self.key = None
+        self.state = state
+
+
+class IncrementalJSONParser:
+    """Resumable JSON parser that exposes the partial document while text streams in.
+
+    ``consume`` only scans the new characters, so parsing a streamed response
+    costs O(total length). Text before the first ``{`` or ``[`` (such as a
+    markdown fence) is skipped. ``value`` is the document built so far: strings
+    that are still streaming appear truncated, and containers hold the items
+    seen so far. Reading it joins the string being streamed, so callers that
+    poll it on every delta (``feed`` does) pay for that string's length each time.
+    """
+
+    def __init__(self):
+        self._value = None
+        self.done = False
+        self.error = None
+        self._stack = []
+        self._started = False
+        self._string = None      # list of characters of the string being read
+        self._synced_length = 0  # characters of it already exposed in its slot
+        self._string_is_key = False
+        self._string_slot = None
+        self._escape = None
+        self._literal = None
+
+    # ── public API ───────────────────────────────────────────────────────────
+
+    @property
+    def value(self) -> Any:
+        self._sync_string()
+        return self._value
+
+    def consume(self, text: str) -> None:
+        """Parse the next piece of streamed text without building the partial document."""
+        if self.done or self.error:
+            return
+        try:
+            for char in text:
+                self._consume(char)
+                if self.done:
+                    break
+        except ValueError as e:
+            self.error = str(e)
+
+    def feed(self, text: str) -> Any:
+        """Consume the next piece of streamed text and return the partial document."""
+        self.consume(text)
+        return self.value
+
+    # ── state machine ────────────────────────────────────────────────────────
+
+    def _consume(self, char: str):
+        if self._string is not None:
+            self._consume_string(char)
+            return
+        if self._literal is not None:
+            if char in _LITERAL_CHARS:
+                self._literal.append(char)
+                return
+            self._finish_literal()
+
+        if not self._started:
+            if char in "{[":
+                self._started = True
+                self._start_value(char)
+            return
+        if char.isspace():
+            return
+
+        frame = self._stack[-1]
+        if isinstance(frame.container, dict):
+            if frame.state in ("key_or_end", "key") and char == '"':
+                self._string, self._string_is_key, self._synced_length = [], True, 0
+            elif frame.state == "key_or_end" and char == "}":
+                self._pop()
+            elif frame.state == "colon" and char == ":":
+                frame.state = "after_colon"
+            elif frame.state == "after_colon":
+                self._start_value(char)
+            elif frame.state == "comma_or_end" and char == ",":
+                frame.state = "key"
+            elif frame.state == "comma_or_end" and char == "}":
+                self._pop()
+            else:
+                raise ValueError(f"Unexpected {char!r} in object")
+        else:
+            if frame.state == "value_or_end" and char == "]":
+                self._pop()
+            elif frame.state in ("value_or_end", "value"):
+                self._start_value(char)
+            elif frame.state == "comma_or_end" and char == ",":
+                frame.state = "value"
+            elif frame.state == "comma_or_end" and char == "]":
+                self._pop()
+            else:
+                raise ValueError(f"Unexpected {char!r} in array")
+
+    def _start_value(self, char: str):
+        if char == "{":
+            container = {}
+            self._assign(container)
+            self._stack.append(_Frame(container, "key_or_end"))
+        elif char == "[":
+            container = []
+            self._assign(container)
+            self._stack.append(_Frame(container, "value_or_end"))
+        elif char == '"':
+            self._string, self._string_is_key, self._synced_length = [], False, 0
+            self._string_slot = self._assign("")
+        elif char in _LITERAL_CHARS:
+            self._literal = [char]
+        else:
+            raise ValueError(f"Unexpected {char!r} at start of value")
+
+    def _assign(self, value):
+        """Attach a value to the current container; return the slot it landed in."""
+        if not self._stack:
+            self._value = value
+            return None
+        frame = self._stack[-1]
+        frame.state = "comma_or_end"
+        if isinstance(frame.container, dict):
+            frame.container[frame.key] = value
+            return (frame.container, frame.key)
+        frame.container.append(value)
+        return (frame.container, len(frame.container) - 1)
+
+    def _pop(self):
+        self._stack.pop()
+        if not self._stack:
+            self.done = True
+
+    def _consume_string(self, char: str):
+        if self._escape is not None:
+            if self._escape == "" and char != "u":
+                self._string.append(_ESCAPES.get(char, char))
+                self._escape = None
+            else:
+                self._escape += char
+                if len(self._escape) == 5:
+                    self._string.append(chr(int(self._escape[1:], 16)))
+                    self._escape = None
+        elif char == "\\":
+            self._escape = ""
+        elif char == '"':
+            self._finish_string()
+        else:
+            self._string.append(char)
+
+    def _joined_string(self, partial: bool = False) -> str:
+        text = "".join(self._string)
+        # Re-pair UTF-16 surrogates produced by \uXXXX escapes, holding back
+        # a high surrogate whose partner has not arrived yet
+        if any("\ud800" <= c <= "\udfff" for c in text):
+            if partial and "\ud800" <= text[-1] <= "\udbff":
+                text = text[:-1]
+            text = text.encode("utf-16", "surrogatepass").decode("utf-16", "replace")
+        return text
+
+    def _finish_string(self):
+        text = self._joined_string()
+        self._string = None
+        if self._string_is_key:
+            frame = self._stack[-1]
+            frame.key = text
+            frame.state = "colon"
+        else:
+            self._store_string(text)
+            self._string_slot = None
+
+    def _sync_string(self):
+        """Expose the string currently being streamed in its slot, if it grew since last time."""
+        if (self._string is not None and not self._string_is_key and self._string_slot
+                and len(self._string) != self._synced_length):
+            self._store_string(self._joined_string(partial=True))
+            self._synced_length = len(self._string)
+
+    def _store_string(self, text: str):
+        if self._string_slot is None:
+            self._value = text
+            return
+        container, key = self._string_slot
+        container[key] = text
+
+    def _finish_literal(self):
+        raw = "".join(self._literal)
+        self._literal = None
+        self._assign(json.loads(raw))
+
+
+def stream_json(deltas: Iterable[str], on_partial: Callable[[Any], None],
+                min_interval: float = 0.2) -> str:
+    """Feed streamed text deltas through the parser, reporting the partial document.
+
+    ``on_partial`` is called at most once per ``min_interval`` seconds, and only
+    once something has been parsed. The partial document is only built for
+    those calls, keeping the whole stream linear in its length. Returns the
+    complete text.
+    """
+    parser = IncrementalJSONParser()
+    parts = []
+    last_update = float("-inf")
+    for delta in deltas:
+        parts.append(delta)
+        parser.consume(delta)
+        now = time.monotonic()
+        if now - last_update >= min_interval:
+            partial = parser.value
+            if partial is not None:
+                on_partial(partial)
+                last_update = now
+    return "".join(parts)
@@ -0,0 +1,171 @@
+import json
+import os
+from typing import Dict, Iterator, List, Optional
+
+from modules.cache import DiskCache, hash_key
+from modules.rate_limit import groq_scheduler
+from modules.tracing import LLM_SPAN, detached_span, span
+
+# Shared response cache for deterministic-enough LLM calls
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+llm_cache = DiskCache("llm", max_bytes=LLM_CACHE_MAX_BYTES, default_ttl=LLM_CACHE_TTL)
+
+# Completion tokens reserved against the tokens-per-minute budget when a call sets no max_tokens
+GROQ_COMPLETION_TOKEN_ESTIMATE = int(os.environ.get("GROQ_COMPLETION_TOKEN_ESTIMATE", 512))
+
+
+def build_groq_client(api_key: str, max_connections: int = 64, keepalive_connections: int = 32,
+                      keepalive_expiry: float = 120.0, timeout: float = 60.0):
+    """Groq client over a pooled keep-alive HTTP connection, usable with or without Streamlit."""
+    import httpx
+    from groq import Groq
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(timeout, connect=10.0),
+    )
+    # Retries are left to the shared scheduler, which sees every caller's rate limits
+    return Groq(api_key=api_key, http_client=http_client, max_retries=0)
+
+
+def estimate_tokens(request: Dict) -> int:
+    """Rough token cost of a chat request: about 4 characters per prompt token plus the completion budget."""
+    chars = 0
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            chars += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+    return chars // 4 + int(request.get("max_tokens") or GROQ_COMPLETION_TOKEN_ESTIMATE)
+
+
+def create_completion(client, **request):
+    """``client.chat.completions.create`` through the shared rate-limit scheduler.
+
+    The response's rate-limit headers resize the scheduler's budgets. Calls are
+    queued at the priority set with ``modules.rate_limit.request_priority``.
+    """
+    completions = client.chat.completions
+    raw_create = getattr(getattr(completions, "with_raw_response", None), "create", None)
+
+    def send():
+        if raw_create is None:
+            return completions.create(**request)
+        raw = raw_create(**request)
+        groq_scheduler.update(raw.headers)
+        return raw.parse()
+
+    return groq_scheduler.call(send, estimate_tokens(request))
+
+
+def completion_cache_key(model: str, messages: List[Dict], temperature: float,
+                         response_format: Optional[Dict] = None) -> str:
+    """Cache key for a chat completion: (model, prompt hash, temperature, response_format)."""
+    prompt_hash = hash_key(messages)
+    return hash_key(model, prompt_hash, temperature, response_format)
+
+
+def _record_usage(current, usage) -> None:
+    """Copy token counts from an API usage object onto a span."""
+    if usage is None:
+        return
+    for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = getattr(usage, field, None)
+        if value is not None:
+            current.add(f"llm.{field}", value)
+
+
+def chat_completion(client, messages: List[Dict], model: str, temperature: float = 0.2,
+                    response_format: Optional[Dict] = None, use_cache: bool = True) -> str:
+    """Run a Groq chat completion and return the message content, via the response cache.
+
+    JSON-mode responses are only cached when they parse, so a malformed answer
+    is retried on the next call instead of being replayed for the whole TTL.
+    """
+    with span(LLM_SPAN, **{"llm.model": model, "llm.stream": False}) as current:
+        key = completion_cache_key(model, messages, temperature, response_format)
+        if use_cache:
+            cached = llm_cache.get(key)
+            current.set("cache.hit", cached is not None)
+            if cached is not None:
+                return cached
+
+        kwargs = {"messages": messages, "model": model, "temperature": temperature}
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+        response = create_completion(client, **kwargs)
+        _record_usage(current, getattr(response, "usage", None))
+        content = response.choices[0].message.content
+
+        if use_cache and content:
+            if response_format and response_format.get("type") == "json_object":
+                try:
+                    json.loads(content)
+                except json.JSONDecodeError:
+                    return content
+            llm_cache.set(key, content)
+        return content
+
+
+def stream_chat_completion(client, messages: List[Dict], model: str, temperature: float = 0.2,
+                           response_format: Optional[Dict] = None, use_cache: bool = True,
+                           **kwargs) -> Iterator[str]:
+    """Stream a Groq chat completion as text deltas, via the same response cache.
+
+    A cached response is yielded as a single delta. A streamed response is
+    cached once it has finished, under the same rules as ``chat_completion``;
+    closing the generator early closes the HTTP stream and caches nothing.
+    Extra keyword arguments (e.g. ``max_tokens``) are passed to the API and
+    make the response uncacheable.
+    """
+    use_cache = use_cache and not kwargs
+    with detached_span(LLM_SPAN, **{"llm.model": model, "llm.stream": True}) as current:
+        key = completion_cache_key(model, messages, temperature, response_format)
+        if use_cache:
+            cached = llm_cache.get(key)
+            current.set("cache.hit", cached is not None)
+            if cached is not None:
+                yield cached
+                return
+
+        request = {"messages": messages, "model": model, "temperature": temperature,
+                   "stream": True, **kwargs}
+        if response_format is not None:
+            request["response_format"] = response_format
+
+        parts = []
+        stream = create_completion(client, **request)
+        try:
+            for chunk in stream:
+                # Groq reports usage on the final chunk, under x_groq
+                usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+                _record_usage(current, usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        current.set("llm.first_token_ms", round(current.duration_ms, 1))
+                    parts.append(delta)
+                    yield delta
+        finally:
+            # A consumer that stops early (e.g. a cancelled request) releases the connection
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+
+        content = "".join(parts)
+        if use_cache and content:
+            if response_format and response_format.get("type") == "json_object":
+                try:
+                    json.loads(content)
+                except json.JSONDecodeError:
+                    return
+            llm_cache.set(key, content)
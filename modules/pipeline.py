@@ -0,0 +1,859 @@
+"""Fact-check pipeline core: preprocessing, evidence lookup and claim verification.
+
+Nothing here imports Streamlit. Problems that do not stop a run are reported
+through ``warn`` and surface as ``("warning", message)`` events, so the same
+pipeline backs the Streamlit view and the HTTP API in ``api.py``.
+"""
+import contextvars
+import functools
+import json
+import logging
+import queue
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from modules.alignment import locate_claims
+from modules.cache import hash_key
+from modules.chunking import ClaimDeduplicator, split_into_chunks
+from modules.json_stream import stream_json
+from modules.llm import chat_completion, stream_chat_completion
+from modules.retrieval import EvidenceIndex
+from modules.tracing import current_span, propagate, span, traced
+from modules.wiki import resolve_wikipedia_pages
+from modules.wiki_dump import LocalDumpBackend
+
+logger = logging.getLogger(__name__)
+
+# Wikipedia editions the pipeline can check against
+LANGUAGES = ("id", "en", "ms", "ar", "zh", "ja", "es", "fr", "ru")
+
+# Where the current run's warnings go; unset outside a run, so they are logged
+_warning_sink = contextvars.ContextVar("warning_sink", default=None)
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    """Tuning knobs of the pipeline, named after their (upper-case) secret / env keys."""
+
+    groq_model: str = "llama-3.3-70b-versatile"
+    # Maximum number of verify_claim calls in flight at once
+    verify_concurrency: int = 8
+    # Claims verified together in one call (1 disables batching), and the largest batch prompt
+    verify_batch_size: int = 5
+    verify_batch_max_chars: int = 24000
+    # Long inputs are processed as overlapping chunks of about chunk_words words
+    chunk_words: int = 1200
+    chunk_overlap_sentences: int = 2
+    chunk_concurrency: int = 4
+    # Minimum seconds between progressive updates of a streaming verdict
+    stream_update_interval: float = 0.2
+    # Number of Wikipedia pages pooled as evidence, and passages selected per claim
+    evidence_pages: int = 3
+    evidence_passages: int = 4
+    # Evidence source: live Wikipedia API ("wikipedia") or a local dump index ("local")
+    evidence_backend: str = "wikipedia"
+    wiki_dump_dir: str = "wiki_index"
+    max_words: int = 40000
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping) -> "PipelineConfig":
+        """Read settings from upper-case keys, e.g. ``st.secrets`` or ``os.environ``."""
+        values = {}
+        for field in fields(cls):
+            key = field.name.upper()
+            if key in mapping:
+                values[field.name] = type(field.default)(mapping[key])
+        return cls(**values)
+
+
+class StageMemo:
+    """Bounded, thread-safe memo of per-chunk stage results, e.g. one per user session.
+
+    Passed to ``fact_check_stream`` so a re-run only repeats the stages whose
+    inputs changed: preprocessing is keyed by (model, chunk text), evidence
+    lookup and verification by (model, language, keywords, claims).
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+def warn(message: str) -> None:
+    """Report a recoverable problem to the running fact check, or the log outside one."""
+    sink = _warning_sink.get()
+    if sink:
+        sink(message)
+    else:
+        logger.warning(message)
+
+
+def fallback_keyword_extraction(text: str) -> List[str]:
+    """Extract keywords using regex when Groq is unavailable"""
+    # Find capitalized words and phrases
+    capitalized = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text)
+
+    # Find dates
+    dates = re.findall(r'\b\d{4}\b', text)
+
+    # Find location patterns
+    locations = re.findall(r'\b(?:di|in|at)\s+([A-Z][a-Z]+(?:\s+[A-Z][a-z]+)*)\b', text)
+
+    # Combine all findings and remove duplicates
+    all_keywords = list(set(capitalized + dates + locations))
+
+    # Return top 5 keywords
+    return all_keywords[:5]
+
+
+def to_wiki_content(page: Dict) -> Dict:
+    """Trim a full page to the title/content/url/summary dict used for single-page checks."""
+    return {
+        'title': page['title'],
+        'content': page['content'][:5000],
+        'url': page['url'],
+        'summary': page['summary']
+    }
+
+
+def page_reference(page: Dict) -> Dict:
+    """The title/url/summary of a page, without its (large) content."""
+    return {'title': page['title'], 'url': page['url'], 'summary': page['summary']}
+
+
+def _valid_items(value, keep: Callable[[Any], bool]) -> List:
+    """Items of a model-returned list that pass ``keep``; null, strings and other non-lists give []."""
+    return [item for item in value if keep(item)] if isinstance(value, list) else []
+
+
+def _is_claim(item) -> bool:
+    return isinstance(item, dict) and isinstance(item.get('claim'), str) and bool(item['claim'].strip())
+
+
+def _report_batch_partial(on_partial: Callable[[int, Dict], None], batch: List[int],
+                          position: int, partial: Dict):
+    """Translate a claim's position inside a batch back to its index in the claim list."""
+    on_partial(batch[position], partial)
+
+
+class FactCheckPipeline:
+    """The fact-check pipeline over one Groq client. Safe to share across threads."""
+
+    def __init__(self, client, config: Optional[PipelineConfig] = None):
+        self.client = client
+        self.config = config or PipelineConfig()
+        self.local_backend = (LocalDumpBackend(self.config.wiki_dump_dir)
+                              if self.config.evidence_backend == "local" else None)
+
+    def try_groq_extraction(self, text: str) -> List[str]:
+        """Attempt to extract keywords using Groq (rate limits are retried by the scheduler)"""
+        try:
+            prompt = f"""Extract key entities and search terms from the following text:
+
+Guidelines:
+1. Focus on proper nouns, specific names, locations, organizations
+2. Extract terms most likely to match Wikipedia page titles
+3. Prioritize complete, precise terms
+4. Avoid generic or common words
+5. Consider context and significance
+6. Correct typos and grammatical errors to ensure accuracy and clarity
+
+Text: {text}
+
+Return JSON format:
+{{
+    "keywords": [
+        "Exact search term 1",
+        "Exact search term 2",
+        ...
+    ]
+}}"""
+
+            content = chat_completion(
+                self.client,
+                messages=[{"role": "user", "content": prompt}],
+                model=self.config.groq_model,
+                response_format={"type": "json_object"},
+                temperature=0.2
+            )
+
+            keywords_data = json.loads(content)
+            return keywords_data.get('keywords', [])
+        except Exception as e:
+            warn(f"Groq API error: {str(e)}")
+            return []
+
+    @traced("extract_keywords")
+    def extract_keywords(self, text: str) -> List[str]:
+        """Extract key entities and potential Wikipedia search terms with fallback."""
+        # Try using Groq first
+        keywords = self.try_groq_extraction(text)
+
+        # If Groq fails or returns no keywords, use fallback method
+        if not keywords:
+            warn("Using fallback keyword extraction method...")
+            keywords = fallback_keyword_extraction(text)
+
+        return keywords
+
+    @traced("find_wikipedia_pages")
+    def find_wikipedia_pages(self, keywords: List[str], language: str = "id",
+                             limit: Optional[int] = None) -> List[Dict]:
+        """Find up to `limit` relevant Wikipedia pages based on keywords, best first."""
+        limit = limit or self.config.evidence_pages
+
+        def warn_missing(keyword, e):
+            warn(f"Could not find Wikipedia page for '{keyword}' in {language}: {e}")
+
+        if self.local_backend:
+            # Title lookups first, then top up from the full-text passage index
+            pages = resolve_wikipedia_pages(keywords, language, limit=limit,
+                                            on_error=warn_missing, fetch=self.local_backend.page)
+            if len(pages) < limit:
+                titles = {page['title'] for page in pages}
+                for page in self.local_backend.search_pages(" ".join(keywords), language, limit):
+                    if page['title'] not in titles:
+                        titles.add(page['title'])
+                        pages.append(page)
+            return pages[:limit]
+
+        # Resolve all keywords concurrently; earlier keywords rank higher
+        return resolve_wikipedia_pages(keywords, language, limit=limit, on_error=warn_missing)
+
+    @traced("extract_claims")
+    def extract_claims(self, text: str) -> Dict:
+        """Extract factual claims from the input text."""
+        try:
+            prompt = f"""Extract specific, verifiable factual claims from the following text:
+
+Rules:
+1. Extract claims that are:
+   - Objectively verifiable
+   - Specific and precise
+   - Not subjective opinions
+   - Related to names, events, locations, or statistical facts
+
+2. Format each claim with a clear topic and statement
+
+Text: {text}
+
+Return JSON in this format:
+{{
+    "claims": [
+        {{
+            "claim": "Exact verifiable statement",
+            "topic": "Main subject of the claim"
+        }}
+    ]
+}}"""
+
+            content = chat_completion(
+                self.client,
+                messages=[{"role": "user", "content": prompt}],
+                model=self.config.groq_model,
+                response_format={"type": "json_object"},
+                temperature=0.2
+            )
+
+            claims_data = json.loads(content)
+            return claims_data
+        except Exception as e:
+            warn(f"Error extracting claims: {e}")
+            return {"claims": []}
+
+    def stream_json_completion(self, prompt: str, on_partial: Callable[[object], None],
+                               min_interval: Optional[float] = None) -> str:
+        """Stream a JSON-mode completion, passing the partial document to `on_partial`.
+
+        Updates are throttled to one per `min_interval` seconds. Returns the full
+        response text once the stream ends.
+        """
+        deltas = stream_chat_completion(
+            self.client,
+            messages=[{"role": "user", "content": prompt}],
+            model=self.config.groq_model,
+            response_format={"type": "json_object"},
+            temperature=0.2
+        )
+        if min_interval is None:
+            min_interval = self.config.stream_update_interval
+        return stream_json(deltas, on_partial, min_interval)
+
+    @traced("verify_claim")
+    def verify_claim(self, claim: str, wiki_content: Dict,
+                     on_partial: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Verify a single claim against Wikipedia content.
+
+        When `on_partial` is given the response is streamed, and the callback
+        receives the partially parsed verdict as it arrives.
+        """
+        if not wiki_content:
+            return {
+                "status": "error",
+                "justification": "No Wikipedia reference found",
+                "source": "N/A"
+            }
+
+        try:
+            prompt = f"""Verify the following claim against the Wikipedia content:
+
+Claim: "{claim}"
+
+Wikipedia Article: {wiki_content['title']}
+Wikipedia Summary: {wiki_content['summary']}
+Wikipedia Content: {wiki_content['content']}
+
+Determine if the claim is:
+- Accurate: Fully supported by Wikipedia
+- Inaccurate: Contradicted by Wikipedia
+- Subjective: Cannot be definitively verified
+
+Respond in JSON format:
+{{
+    "status": "accurate/inaccurate/subjective",
+    "justification": "Detailed explanation with specific references",
+    "relevant_wiki_quote": "Relevant quote from Wikipedia",
+    "source_url": "{wiki_content['url']}"
+}}"""
+
+            if on_partial:
+                content = self.stream_json_completion(
+                    prompt,
+                    lambda partial: isinstance(partial, dict) and on_partial(partial)
+                )
+            else:
+                content = chat_completion(
+                    self.client,
+                    messages=[{"role": "user", "content": prompt}],
+                    model=self.config.groq_model,
+                    response_format={"type": "json_object"},
+                    temperature=0.2
+                )
+        
+            return json.loads(content)
+        except Exception as e:
+            warn(f"Verification error: {e}")
+            return {
+                "status": "error",
+                "justification": "Processing verification failed",
+                "source_url": wiki_content['url']
+            }
+
+    @traced("verify_claims_batch")
+    def verify_claims_batch(self, claims: List[str], wiki_content: Dict,
+                            on_partial: Optional[Callable[[int, Dict], None]] = None) -> Optional[List[Dict]]:
+        """Verify several claims against shared Wikipedia content in a single call.
+
+        Returns one result per claim, in order, or None when the prompt would be too
+        large or the response does not contain a well-formed verdict for every claim.
+        When `on_partial` is given the response is streamed and the callback
+        receives (claim position, partial verdict) for each verdict as it arrives.
+        """
+        numbered_claims = "\n".join(f'{i}. "{claim}"' for i, claim in enumerate(claims, 1))
+        prompt = f"""Verify each of the following claims against the Wikipedia content:
+
+Claims:
+{numbered_claims}
+
+Wikipedia Article: {wiki_content['title']}
+Wikipedia Summary: {wiki_content['summary']}
+Wikipedia Content: {wiki_content['content']}
+
+Determine for each claim if it is:
+- Accurate: Fully supported by Wikipedia
+- Inaccurate: Contradicted by Wikipedia
+- Subjective: Cannot be definitively verified
+
+Respond in JSON format with exactly one result per claim, in the same order:
+{{
+    "results": [
+        {{
+            "claim_number": 1,
+            "status": "accurate/inaccurate/subjective",
+            "justification": "Detailed explanation with specific references",
+            "relevant_wiki_quote": "Relevant quote from Wikipedia",
+            "source_url": "{wiki_content['url']}"
+        }}
+    ]
+}}"""
+        if len(prompt) > self.config.verify_batch_max_chars:
+            return None
+
+        def report_partial(partial):
+            results = partial.get('results') if isinstance(partial, dict) else None
+            for position, item in enumerate(results if isinstance(results, list) else []):
+                if isinstance(item, dict) and position < len(claims):
+                    on_partial(position, item)
+
+        try:
+            if on_partial:
+                content = self.stream_json_completion(prompt, report_partial)
+            else:
+                content = chat_completion(
+                    self.client,
+                    messages=[{"role": "user", "content": prompt}],
+                    model=self.config.groq_model,
+                    response_format={"type": "json_object"},
+                    temperature=0.2
+                )
+            results = json.loads(content).get('results', [])
+            by_number = {int(r['claim_number']): r for r in results
+                         if isinstance(r, dict) and r.get('status') and 'claim_number' in r}
+        except Exception:
+            return None
+
+        if sorted(by_number) != list(range(1, len(claims) + 1)):
+            return None
+        return [
+            {
+                "status": str(by_number[i]['status']).lower(),
+                "justification": by_number[i].get('justification', ''),
+                "relevant_wiki_quote": by_number[i].get('relevant_wiki_quote', ''),
+                "source_url": by_number[i].get('source_url') or wiki_content['url'],
+            }
+            for i in range(1, len(claims) + 1)
+        ]
+
+    def verify_claim_batch_with_evidence(self, claims: List[str], wiki_content: Dict,
+                                         evidence_index: Optional[EvidenceIndex] = None,
+                                         on_partial: Optional[Callable[[int, Dict], None]] = None) -> List[Dict]:
+        """Verify a batch of claims in one call, falling back to one call per claim.
+
+        The fallback calls run one after another on the calling thread, which
+        is already a verify worker, so they do not add to the verify concurrency.
+        """
+        evidence = (evidence_index.evidence_for_claims(claims) if evidence_index else None) or wiki_content
+        results = self.verify_claims_batch(claims, evidence, on_partial) if evidence else None
+        if results is not None:
+            return results
+
+        return [self.verify_claim_with_evidence(claim, wiki_content, evidence_index,
+                                                functools.partial(on_partial, position) if on_partial else None)
+                for position, claim in enumerate(claims)]
+
+    def verify_claim_with_evidence(self, claim: str, wiki_content: Dict,
+                                   evidence_index: Optional[EvidenceIndex] = None,
+                                   on_partial: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """Verify a claim against its own top passages, falling back to the primary page."""
+        evidence = evidence_index.evidence_for(claim) if evidence_index else None
+        return self.verify_claim(claim, evidence or wiki_content, on_partial)
+
+    def verify_claims_concurrently(self, claims: List[Dict], wiki_content: Dict,
+                                   evidence_index: Optional[EvidenceIndex] = None,
+                                   max_workers: Optional[int] = None,
+                                   batch_size: Optional[int] = None,
+                                   on_partial: Optional[Callable[[int, Dict], None]] = None,
+                                   executor: Optional[ThreadPoolExecutor] = None) -> Iterator[Tuple[int, Dict]]:
+        """Verify claims on a bounded thread pool, yielding (index, result) in claim order.
+
+        All claims are submitted up front, so total wall-clock time is close to the
+        slowest single verify_claim call. Each result is yielded as soon as it and
+        every claim before it have finished, keeping the UI in original order.
+        When an evidence index is given, each claim is checked against its own
+        passages instead of the primary page. With ``batch_size`` > 1, claims are
+        grouped so each group shares one evidence block and one LLM call.
+        `on_partial` receives (claim index, partial verdict) while responses stream.
+        Calls go to ``executor`` when one is given (shared by all chunks of a
+        run, so ``max_workers`` is ignored), otherwise to a pool of their own.
+        """
+        if not claims:
+            return
+
+        batch_size = batch_size or self.config.verify_batch_size
+        batches = [list(range(start, min(start + max(1, batch_size), len(claims))))
+                   for start in range(0, len(claims), max(1, batch_size))]
+        if executor is None:
+            workers = max(1, min(max_workers or self.config.verify_concurrency, len(batches)))
+            with ThreadPoolExecutor(max_workers=workers) as own_executor:
+                yield from self.verify_claims_concurrently(claims, wiki_content, evidence_index,
+                                                           batch_size=batch_size, on_partial=on_partial,
+                                                           executor=own_executor)
+            return
+
+        if batch_size > 1:
+            futures = [executor.submit(propagate(self.verify_claim_batch_with_evidence),
+                                       [claims[i]['claim'] for i in batch],
+                                       wiki_content, evidence_index,
+                                       functools.partial(_report_batch_partial, on_partial, batch)
+                                       if on_partial else None)
+                       for batch in batches]
+            for batch, future in zip(batches, futures):
+                for index, result in zip(batch, future.result()):
+                    yield index, result
+        else:
+            futures = [executor.submit(propagate(self.verify_claim_with_evidence), claim_info['claim'],
+                                       wiki_content, evidence_index,
+                                       functools.partial(on_partial, index) if on_partial else None)
+                       for index, claim_info in enumerate(claims)]
+            for index, future in enumerate(futures):
+                yield index, future.result()
+
+    @traced("correct_typos")
+    def correct_typos(self, text: str) -> str:
+        """Correct typos in the input text using Groq."""
+        try:
+            prompt = f"""Correct any spelling and grammatical errors in the following text while preserving its meaning:
+
+Text: {text}
+
+Rules:
+1. Maintain the original meaning
+2. Fix spelling errors
+3. Correct grammar mistakes
+4. Keep proper nouns unchanged
+5. Return the corrected text only
+
+Return JSON format:
+{{
+    "corrected_text": "The corrected version of the text"
+}}"""
+
+            content = chat_completion(
+                self.client,
+                messages=[{"role": "user", "content": prompt}],
+                model=self.config.groq_model,
+                response_format={"type": "json_object"},
+                temperature=0.2
+            )
+        
+            result = json.loads(content)
+            return result.get('corrected_text', text)
+        except Exception as e:
+            warn(f"Error correcting typos: {str(e)}")
+            return text
+
+    @traced("preprocess_fused")
+    def try_groq_preprocessing(self, text: str) -> Optional[Dict]:
+        """Correct typos, extract keywords and extract claims in a single Groq call.
+
+        Returns None when the call fails or the response has no corrected text.
+        """
+        try:
+            prompt = f"""Process the following text in three steps and return all results together:
+
+Step 1 - Correct any spelling and grammatical errors while preserving its meaning:
+1. Maintain the original meaning
+2. Fix spelling errors and grammar mistakes
+3. Keep proper nouns unchanged
+
+Step 2 - Extract key entities and search terms from the corrected text:
+1. Focus on proper nouns, specific names, locations, organizations
+2. Extract terms most likely to match Wikipedia page titles
+3. Prioritize complete, precise terms
+4. Avoid generic or common words
+
+Step 3 - Extract specific, verifiable factual claims from the corrected text that are:
+- Objectively verifiable
+- Specific and precise
+- Not subjective opinions
+- Related to names, events, locations, or statistical facts
+
+Text: {text}
+
+Return JSON format:
+{{
+    "corrected_text": "The corrected version of the text",
+    "keywords": [
+        "Exact search term 1",
+        "Exact search term 2"
+    ],
+    "claims": [
+        {{
+            "claim": "Exact verifiable statement",
+            "topic": "Main subject of the claim"
+        }}
+    ]
+}}"""
+
+            content = chat_completion(
+                self.client,
+                messages=[{"role": "user", "content": prompt}],
+                model=self.config.groq_model,
+                response_format={"type": "json_object"},
+                temperature=0.2
+            )
+            result = json.loads(content)
+            if not isinstance(result, dict):
+                return None
+            if not isinstance(result.get('corrected_text'), str) or not result['corrected_text'].strip():
+                return None
+            return result
+        except Exception:
+            return None
+
+    @traced("preprocess")
+    def preprocess_text(self, text: str) -> Dict:
+        """Return corrected text, keywords and claims, using one fused call when possible.
+
+        Any part missing from the fused response is filled in by the original
+        single-purpose function, so the three separate calls remain the fallback.
+        """
+        fused = self.try_groq_preprocessing(text) or {}
+
+        corrected_text = fused.get('corrected_text') or self.correct_typos(text)
+
+        keywords = _valid_items(fused.get('keywords'), lambda k: isinstance(k, str) and k.strip())
+        if not keywords:
+            keywords = self.extract_keywords(corrected_text)
+
+        claims = _valid_items(fused.get('claims'), _is_claim)
+        if not claims:
+            extracted = self.extract_claims(corrected_text)
+            claims = _valid_items(extracted.get('claims') if isinstance(extracted, dict) else None, _is_claim)
+
+        return {
+            'corrected_text': corrected_text,
+            'keywords': keywords,
+            'claims': claims
+        }
+
+    @traced("chunk")
+    def _process_chunk(self, chunk: Dict, language: str, deduplicator: ClaimDeduplicator,
+                       events: queue.Queue, memo: Optional[StageMemo] = None,
+                       verify_executor: Optional[ThreadPoolExecutor] = None,
+                       cancel: Optional[threading.Event] = None):
+        """Preprocess, look up evidence for and verify one chunk, pushing events to its queue.
+
+        With a ``memo``, stages whose inputs were seen before are replayed from it.
+        Verification runs on ``verify_executor``, shared by all chunks of the run.
+        Once ``cancel`` is set the chunk stops before its next stage.
+        """
+        current_span().set("chunk.index", chunk['index'])
+        token = _warning_sink.set(lambda message: events.put(("warning", message)))
+
+        def cancelled():
+            if cancel is not None and cancel.is_set():
+                current_span().set("chunk.cancelled", True)
+                return True
+            return False
+
+        try:
+            preprocess_key = hash_key("preprocess", self.config.groq_model, chunk['text'])
+            preprocessed = memo.get(preprocess_key) if memo else None
+            current_span().set("memo.preprocess", preprocessed is not None)
+            if preprocessed is None:
+                if cancelled():
+                    deduplicator.skip(chunk['index'])
+                    return
+                try:
+                    preprocessed = self.preprocess_text(chunk['text'])
+                except Exception:
+                    deduplicator.skip(chunk['index'])
+                    raise
+                if memo:
+                    memo.set(preprocess_key, preprocessed)
+            claims = deduplicator.accept(chunk['index'], preprocessed['claims'])
+            chunk_info = {
+                'index': chunk['index'],
+                'corrected': preprocessed['corrected_text'] != chunk['text'],
+                'keywords': preprocessed['keywords'],
+            }
+
+            verify_key = hash_key("verify", self.config.groq_model, language,
+                                  preprocessed['keywords'], [claim['claim'] for claim in claims])
+            verified = memo.get(verify_key) if memo else None
+            current_span().set("memo.verify", verified is not None)
+            if verified is not None:
+                pages, results = verified
+                events.put(("chunk", dict(chunk_info, pages=pages)))
+                if results:
+                    events.put(("claims", (chunk['index'], claims)))
+                    for index, result in enumerate(results):
+                        events.put(("verdict", (chunk['index'], index, result)))
+                return
+
+            if cancelled():
+                return
+            wiki_pages = self.find_wikipedia_pages(preprocessed['keywords'], language)
+            events.put(("chunk", dict(chunk_info, pages=wiki_pages)))
+            results = []
+
+            # Without a reference page the chunk's claims cannot be checked
+            if wiki_pages and claims:
+                if cancelled():
+                    return
+                events.put(("claims", (chunk['index'], claims)))
+                wiki_content = to_wiki_content(wiki_pages[0])
+                with span("evidence_index", pages=len(wiki_pages)):
+                    evidence_index = EvidenceIndex(wiki_pages, passages_per_claim=self.config.evidence_passages)
+                verified = self.verify_claims_concurrently(
+                    claims, wiki_content, evidence_index,
+                    on_partial=lambda index, partial: events.put(
+                        ("partial", (chunk['index'], index, dict(partial)))
+                    ),
+                    executor=verify_executor
+                )
+                for index, result in verified:
+                    results.append(result)
+                    events.put(("verdict", (chunk['index'], index, result)))
+
+            # Failed lookups and verifications are retried on the next run
+            if memo and wiki_pages and all(result.get('status') != "error" for result in results):
+                memo.set(verify_key, ([page_reference(page) for page in wiki_pages], results))
+        except Exception as e:
+            events.put(("error", f"Error processing part {chunk['index'] + 1}: {e}"))
+        finally:
+            _warning_sink.reset(token)
+            events.put(("done", None))
+
+    def fact_check_stream(self, text: str, language: str = "id",
+                          memo: Optional[StageMemo] = None,
+                          cancel: Optional[threading.Event] = None) -> Iterator[Tuple[str, object]]:
+        """Run the fact-check pipeline over long text, yielding events as results arrive.
+
+        The text is split into overlapping chunks on sentence/paragraph boundaries,
+        and chunks are processed concurrently. Claims repeated across chunk seams are
+        dropped. Events are yielded in chunk order:
+
+        - ``("chunk", {...})`` once a chunk's keywords and evidence pages are known
+        - ``("claims", (chunk_index, claims))`` before a chunk's claims are verified
+        - ``("partial", (chunk_index, claim_index, verdict))`` while a verdict streams in
+        - ``("verdict", (chunk_index, claim_index, result))`` for every verified claim
+        - ``("warning", message)`` for recoverable problems, e.g. a keyword with no page
+        - ``("error", message)`` if a chunk fails
+
+        Chunk stages found in ``memo`` are replayed instead of run; their
+        evidence pages then carry only title, url and summary.
+
+        Setting ``cancel``, or closing the generator early, stops the run:
+        queued chunks and verifications are dropped and running chunks stop
+        before their next stage. Closing returns once the running calls end.
+        """
+        chunks = split_into_chunks(text, self.config.chunk_words, self.config.chunk_overlap_sentences)
+        if not chunks:
+            return
+
+        deduplicator = ClaimDeduplicator(len(chunks))
+        queues = [queue.Queue() for _ in chunks]
+        cancel = cancel or threading.Event()
+
+        # One verify pool for the whole run, so verify_concurrency bounds the
+        # calls in flight across all chunks, not within each one
+        workers = max(1, min(self.config.chunk_concurrency, len(chunks)))
+        verify_executor = ThreadPoolExecutor(max_workers=max(1, self.config.verify_concurrency))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        finished = False
+        try:
+            for chunk, events in zip(chunks, queues):
+                executor.submit(propagate(self._process_chunk), chunk, language, deduplicator,
+                                events, memo, verify_executor, cancel)
+
+            # Chunks start in order, so the one waited on always runs and
+            # reports "done", even after a cancel
+            for events in queues:
+                while not cancel.is_set():
+                    kind, payload = events.get()
+                    if kind == "done":
+                        break
+                    yield kind, payload
+            finished = True
+        finally:
+            if not finished:
+                cancel.set()
+            verify_executor.shutdown(wait=False, cancel_futures=cancel.is_set())
+            executor.shutdown(cancel_futures=cancel.is_set())
+            verify_executor.shutdown()
+
+    def check(self, text: str, language: str = "id") -> Dict:
+        """Run the whole pipeline and return the JSON-serialisable result.
+
+        Each claim carries ``span``, the ``[start, end]`` character offsets of
+        the claim in ``text`` (found exactly or by fuzzy alignment), or None.
+        Raises ValueError when the text is longer than ``config.max_words`` words.
+        """
+        word_count = len(text.split())
+        if word_count > self.config.max_words:
+            raise ValueError(f"Text exceeds {self.config.max_words:,} word limit")
+
+        collector = ResultCollector(text, language)
+        for kind, payload in self.fact_check_stream(text, language):
+            collector.add(kind, payload)
+        return collector.finish()
+
+
+class ResultCollector:
+    """Folds ``fact_check_stream`` events into the JSON-serialisable result of a run.
+
+    ``check`` returns ``finish()``; streaming clients feed it the events they
+    render, so every client reports the same claims and credibility score.
+    """
+
+    def __init__(self, text: str, language: str):
+        self.text = text
+        self.result = {
+            'language': language,
+            'words': len(text.split()),
+            'corrected': False,
+            'keywords': [],
+            'pages': [],
+            'claims': [],
+            'credibility_score': None,
+            'warnings': [],
+            'errors': [],
+        }
+        self._claims = {}
+
+    def add(self, kind: str, payload) -> None:
+        result = self.result
+        event = event_to_dict(kind, payload)
+        if kind == "chunk":
+            result['corrected'] = result['corrected'] or event['corrected']
+            result['keywords'].extend(k for k in event['keywords'] if k not in result['keywords'])
+            titles = {page['title'] for page in result['pages']}
+            result['pages'].extend(p for p in event['pages'] if p['title'] not in titles)
+        elif kind == "claims":
+            for index, claim_info in enumerate(event['claims']):
+                self._claims[(event['chunk'], index)] = dict(claim_info, chunk=event['chunk'])
+        elif kind == "verdict":
+            self._claims[(event['chunk'], event['claim'])].update(event['result'])
+        elif kind in ("warning", "error"):
+            result[kind + 's'].append(event['message'])
+
+    def finish(self) -> Dict:
+        """Verified claims with their spans in the text, and the credibility score."""
+        result = self.result
+        result['claims'] = [dict(claim, span=None) for claim in self._claims.values() if 'status' in claim]
+        for start, end, index in locate_claims(self.text, [claim['claim'] for claim in result['claims']]):
+            result['claims'][index]['span'] = [start, end]
+        if result['claims']:
+            accurate = sum(claim['status'] == 'accurate' for claim in result['claims'])
+            result['credibility_score'] = round(accurate / len(result['claims']) * 100, 1)
+        return result
+
+
+def event_to_dict(kind: str, payload) -> Dict:
+    """JSON form of a ``fact_check_stream`` event, with evidence pages trimmed to their reference."""
+    if kind == "chunk":
+        return {
+            'event': kind,
+            'chunk': payload['index'],
+            'corrected': payload['corrected'],
+            'keywords': payload['keywords'],
+            'pages': [page_reference(page) for page in payload['pages']],
+        }
+    if kind == "claims":
+        chunk_index, claims = payload
+        return {'event': kind, 'chunk': chunk_index, 'claims': claims}
+    if kind in ("partial", "verdict"):
+        chunk_index, index, result = payload
+        return {'event': kind, 'chunk': chunk_index, 'claim': index, 'result': result}
+    return {'event': kind, 'message': str(payload)}
@@ -0,0 +1,224 @@
+"""Process-wide scheduler for rate-limited API calls (Groq).
+
+Every call first takes one request and an estimate of its tokens from token
+buckets. The per-minute request budget is local (``GROQ_REQUESTS_PER_MINUTE``),
+because Groq's ``x-ratelimit-*-requests`` headers describe the daily request
+budget; those size a separate daily bucket. The ``x-ratelimit-*-tokens``
+headers are per minute and resize the token bucket as they arrive. Waiting callers are served by priority, with interactive
+requests ahead of batch work and first come first served within each level.
+429s and transient server errors are retried with jittered exponential
+backoff, or after ``retry-after`` when the server sends it. A 429 pauses the
+whole queue, not just the caller that hit it.
+"""
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Mapping, Optional
+
+INTERACTIVE = 0
+BATCH = 1
+
+# Starting budgets until the first response reports the account's real limits
+GROQ_REQUESTS_PER_MINUTE = float(os.environ.get("GROQ_REQUESTS_PER_MINUTE", 30))
+GROQ_TOKENS_PER_MINUTE = float(os.environ.get("GROQ_TOKENS_PER_MINUTE", 12000))
+GROQ_MAX_RETRIES = int(os.environ.get("GROQ_MAX_RETRIES", 4))
+GROQ_RETRY_BASE_DELAY = float(os.environ.get("GROQ_RETRY_BASE_DELAY", 1.0))
+GROQ_RETRY_MAX_DELAY = float(os.environ.get("GROQ_RETRY_MAX_DELAY", 30.0))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Raised by the Groq SDK for network failures, which carry no status code
+RETRY_ERRORS = ("APIConnectionError", "APITimeoutError")
+
+_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a reset/retry header: ``"7.66s"``, ``"2m59.56s"``, ``"250ms"`` or ``"12"``."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Budget that refills continuously at ``rate`` units per second up to ``capacity``."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` is available (requests larger than the bucket wait for a full one)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, limit: Optional[float], remaining: Optional[float],
+             reset: Optional[float], now: float) -> None:
+        """Adopt the server's view of this budget from one response's headers.
+
+        The local level only ever moves down to ``remaining``: calls still in
+        flight have been taken locally but are not yet counted by the server.
+        """
+        self._refill(now)
+        if limit:
+            self.capacity = limit
+        if remaining is not None:
+            self.level = min(self.level, remaining)
+            if reset and self.capacity > remaining:
+                # The server refills the used part by the reset time
+                self.rate = (self.capacity - remaining) / reset
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Schedule the calls made in this block (and in workers it propagates to) at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class RateLimitScheduler:
+    """Admit calls under request and token budgets, in priority order, retrying throttled ones."""
+
+    def __init__(self, requests_per_minute: float = GROQ_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = GROQ_TOKENS_PER_MINUTE,
+                 max_retries: int = GROQ_MAX_RETRIES,
+                 base_delay: float = GROQ_RETRY_BASE_DELAY,
+                 max_delay: float = GROQ_RETRY_MAX_DELAY):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        # Requests per day, known once a response reports it
+        self.daily_requests: Optional[TokenBucket] = None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._paused_until = 0.0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _acquire(self, tokens: int, priority: int) -> None:
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    delay = None
+                    if self._waiting[0] == ticket:
+                        now = time.monotonic()
+                        delay = max(self._paused_until - now,
+                                    self.requests.wait_time(1, now),
+                                    self.tokens.wait_time(tokens, now),
+                                    self.daily_requests.wait_time(1, now) if self.daily_requests else 0.0)
+                        if delay <= 0:
+                            self.requests.take(1, now)
+                            self.tokens.take(tokens, now)
+                            if self.daily_requests:
+                                self.daily_requests.take(1, now)
+                            return
+                    self._condition.wait(delay)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+    def update(self, headers: Optional[Mapping]) -> None:
+        """Resize the token and daily request buckets from ``x-ratelimit-*`` response headers.
+
+        The per-minute request bucket is left alone: Groq's request headers
+        count requests per day.
+        """
+        if not headers:
+            return
+
+        def number(name):
+            value = headers.get(name)
+            try:
+                return float(value) if value is not None else None
+            except ValueError:
+                return None
+
+        with self._condition:
+            now = time.monotonic()
+            daily_limit = number("x-ratelimit-limit-requests")
+            if daily_limit and self.daily_requests is None:
+                self.daily_requests = TokenBucket(daily_limit, daily_limit / 86400)
+            for kind, bucket in (("requests", self.daily_requests), ("tokens", self.tokens)):
+                if bucket is not None:
+                    bucket.sync(number(f"x-ratelimit-limit-{kind}"),
+                                number(f"x-ratelimit-remaining-{kind}"),
+                                parse_duration(headers.get(f"x-ratelimit-reset-{kind}")), now)
+            self._condition.notify_all()
+
+    def _pause(self, seconds: float) -> None:
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, func: Callable, tokens: int = 0, priority: Optional[int] = None):
+        """Run ``func()`` once the budgets allow it, retrying rate-limited and transient failures.
+
+        ``tokens`` is the estimated prompt plus completion size of the call, and
+        ``priority`` defaults to the one set with ``request_priority``. Other
+        errors, and the last failure once retries run out, propagate.
+        """
+        priority = current_priority() if priority is None else priority
+        for attempt in range(self.max_retries + 1):
+            self._acquire(tokens, priority)
+            try:
+                return func()
+            except Exception as e:
+                response = getattr(e, "response", None)
+                status = getattr(e, "status_code", None)
+                if status is None and type(e).__name__ not in RETRY_ERRORS:
+                    raise
+                if status is not None and status not in RETRY_STATUSES:
+                    raise
+                if attempt == self.max_retries:
+                    raise
+
+                headers = getattr(response, "headers", None)
+                self.update(headers)
+                retry_after = parse_duration(headers.get("retry-after")) if headers else None
+                if status == 429 and retry_after is not None:
+                    self._pause(retry_after)
+                time.sleep(self._backoff(attempt, retry_after))
+
+
+groq_scheduler = RateLimitScheduler()
@@ -0,0 +1,161 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Common Indonesian and English function words that carry no retrieval signal
+STOPWORDS = {
+    "yang", "dan", "di", "ke", "dari", "ini", "itu", "dengan", "untuk", "pada",
+    "adalah", "dalam", "tidak", "akan", "oleh", "sebagai", "juga", "atau", "karena",
+    "telah", "tersebut", "ia", "para", "pun", "bahwa", "sudah", "saat", "lebih",
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "at", "by", "for",
+    "with", "is", "are", "was", "were", "be", "been", "as", "that", "this", "it",
+    "from", "his", "her", "its", "their", "has", "have", "had", "not",
+}
+
+# Wikipedia plain-text section headings look like "== History =="
+_HEADING = re.compile(r"^\s*=+\s*(.*?)\s*=+\s*$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords and single characters removed."""
+    return [t for t in re.findall(r"\w+", text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def split_passages(page: Dict, max_chars: int = 800) -> List[Dict]:
+    """Split a page's content into passages of roughly ``max_chars`` characters.
+
+    Paragraphs are packed together until the limit is reached; paragraphs that
+    are longer on their own are split on sentence boundaries. Each passage keeps
+    the page title, url and the section heading it came from.
+    """
+    passages = []
+    section = ""
+    buffer = []
+    size = 0
+
+    def flush():
+        nonlocal buffer, size
+        if buffer:
+            passages.append({
+                'title': page['title'],
+                'url': page['url'],
+                'section': section,
+                'text': " ".join(buffer),
+            })
+        buffer, size = [], 0
+
+    for paragraph in page.get('content', "").split("\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        heading = _HEADING.match(paragraph)
+        if heading:
+            flush()
+            section = heading.group(1)
+            continue
+
+        pieces = [paragraph] if len(paragraph) <= max_chars else _SENTENCE_END.split(paragraph)
+        for piece in pieces:
+            if size and size + len(piece) > max_chars:
+                flush()
+            buffer.append(piece)
+            size += len(piece) + 1
+    flush()
+    return passages
+
+
+class BM25Index:
+    """In-memory Okapi BM25 index over a list of passages."""
+
+    def __init__(self, passages: List[Dict], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = []
+        self.doc_freqs = Counter()
+        for passage in passages:
+            # Section headings and titles are strong topical hints, so index them too
+            tokens = tokenize(f"{passage['title']} {passage.get('section', '')} {passage['text']}")
+            freqs = Counter(tokens)
+            self.term_freqs.append((freqs, len(tokens)))
+            self.doc_freqs.update(freqs.keys())
+        total = sum(length for _, length in self.term_freqs)
+        self.avg_len = total / len(passages) if passages else 0.0
+
+    def _idf(self, term: str) -> float:
+        n = len(self.passages)
+        df = self.doc_freqs.get(term, 0)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[float, Dict]]:
+        """Return up to ``k`` (score, passage) pairs with a positive score, best first."""
+        terms = set(tokenize(query))
+        if not terms or not self.passages:
+            return []
+
+        idf = {term: self._idf(term) for term in terms if term in self.doc_freqs}
+        scored = []
+        for passage, (freqs, length) in zip(self.passages, self.term_freqs):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_len or 1))
+            for term, weight in idf.items():
+                tf = freqs.get(term)
+                if tf:
+                    score += weight * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, passage))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:k]
+
+
+class EvidenceIndex:
+    """Passage index over several Wikipedia pages that builds per-claim evidence."""
+
+    def __init__(self, pages: List[Dict], passages_per_claim: int = 4,
+                 summary_chars: int = 1500):
+        self.pages = {page['title']: page for page in pages}
+        self.passages_per_claim = passages_per_claim
+        self.summary_chars = summary_chars
+        self.index = BM25Index([p for page in pages for p in split_passages(page)])
+
+    def evidence_for(self, claim: str) -> Optional[Dict]:
+        """Return a title/summary/content/url dict built from the claim's top passages.
+
+        Returns None when no passage shares a term with the claim.
+        """
+        return self._evidence_from_hits(self.index.search(claim, self.passages_per_claim))
+
+    def evidence_for_claims(self, claims: List[str]) -> Optional[Dict]:
+        """Return one evidence dict covering the top passages of every claim.
+
+        Passages shared between claims are included once, so a batch of claims
+        about the same topic costs little more than a single claim.
+        """
+        best = {}
+        for claim in claims:
+            for score, passage in self.index.search(claim, self.passages_per_claim):
+                key = id(passage)
+                if key not in best or best[key][0] < score:
+                    best[key] = (score, passage)
+        hits = sorted(best.values(), key=lambda item: item[0], reverse=True)
+        return self._evidence_from_hits(hits)
+
+    def _evidence_from_hits(self, hits: List[Tuple[float, Dict]]) -> Optional[Dict]:
+        if not hits:
+            return None
+
+        best_page = self.pages[hits[0][1]['title']]
+        titles = list(dict.fromkeys(passage['title'] for _, passage in hits))
+        content = "\n\n".join(
+            f"[{passage['title']}{' - ' + passage['section'] if passage['section'] else ''}] {passage['text']}"
+            for _, passage in hits
+        )
+        return {
+            'title': " / ".join(titles),
+            'summary': best_page['summary'][:self.summary_chars],
+            'content': content,
+            'url': best_page['url'],
+        }
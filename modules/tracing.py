@@ -0,0 +1,280 @@
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Append every finished trace to this file as JSON lines, one span per line
+TRACE_LOG_PATH = os.environ.get("TRACE_LOG_PATH")
+SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "factchecker")
+# Span name of one LLM API call; its tokens are also charged to the calling stage
+LLM_SPAN = "llm.chat"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_log_lock = threading.Lock()
+
+
+class Span:
+    """One timed stage or external call, with free-form attributes."""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "start_ns", "end_ns",
+                 "_start_perf", "attributes", "error")
+
+    def __init__(self, name: str, trace: "Trace", parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._start_perf = time.perf_counter_ns()
+        self.attributes = dict(attributes)
+        self.error = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: float) -> None:
+        """Accumulate a numeric attribute, e.g. tokens over several calls."""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def finish(self) -> None:
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._start_perf)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned when no trace is active, so instrumentation costs nothing."""
+
+    duration_ms = 0.0
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, amount):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """All spans recorded for one pipeline run. Spans may finish on any thread."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    @property
+    def root(self) -> Optional[Span]:
+        return self.spans[0] if self.spans else None
+
+    def to_dicts(self) -> List[Dict]:
+        with self._lock:
+            return [span.to_dict() for span in self.spans]
+
+    def to_json_lines(self) -> str:
+        """Structured log export: one JSON object per span."""
+        return "".join(json.dumps(span, ensure_ascii=False, default=str) + "\n"
+                       for span in self.to_dicts())
+
+    def to_otlp(self) -> Dict:
+        """OpenTelemetry OTLP/JSON export, accepted by any OTLP HTTP collector."""
+        def attribute(key, value):
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        spans = []
+        for span in self.to_dicts():
+            otlp_span = {
+                "traceId": span["trace_id"],
+                "spanId": span["span_id"],
+                "name": span["name"],
+                "kind": 1,
+                "startTimeUnixNano": str(span["start_ns"]),
+                "endTimeUnixNano": str(span["end_ns"] or span["start_ns"]),
+                "attributes": [attribute(k, v) for k, v in span["attributes"].items()],
+                "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1},
+            }
+            if span["parent_id"]:
+                otlp_span["parentSpanId"] = span["parent_id"]
+            spans.append(otlp_span)
+
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "modules.tracing"}, "spans": spans}],
+        }]}
+
+    def summary(self) -> List[Dict]:
+        """Per-stage totals (calls, time, tokens, cache hits), slowest stage first.
+
+        Each ``llm.chat`` call is also charged, with its tokens, to the stage
+        that made it (its parent span), so ``llm_calls`` and the token columns
+        show what every pipeline stage spent. The ``llm.chat`` row itself
+        keeps the totals over all calls.
+        """
+        spans = self.to_dicts()
+        by_id = {span["span_id"]: span for span in spans}
+        stages = {}
+
+        def stage_for(name):
+            return stages.setdefault(name, {
+                "stage": name, "calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cache_hits": 0, "cache_misses": 0, "errors": 0,
+            })
+
+        for span in spans:
+            stage = stage_for(span["name"])
+            attributes = span["attributes"]
+            stage["calls"] += 1
+            stage["llm_calls"] += span["name"] == LLM_SPAN
+            stage["total_ms"] += span["duration_ms"]
+            stage["max_ms"] = max(stage["max_ms"], span["duration_ms"])
+            stage["prompt_tokens"] += attributes.get("llm.prompt_tokens", 0)
+            stage["completion_tokens"] += attributes.get("llm.completion_tokens", 0)
+            if "cache.hit" in attributes:
+                stage["cache_hits" if attributes["cache.hit"] else "cache_misses"] += 1
+            stage["errors"] += bool(span["error"])
+
+            parent = by_id.get(span["parent_id"])
+            if span["name"] == LLM_SPAN and parent is not None:
+                owner = stage_for(parent["name"])
+                owner["llm_calls"] += 1
+                owner["prompt_tokens"] += attributes.get("llm.prompt_tokens", 0)
+                owner["completion_tokens"] += attributes.get("llm.completion_tokens", 0)
+        for stage in stages.values():
+            stage["total_ms"] = round(stage["total_ms"], 1)
+            stage["max_ms"] = round(stage["max_ms"], 1)
+        return sorted(stages.values(), key=lambda stage: -stage["total_ms"])
+
+
+def current_span():
+    """The innermost active span, or a no-op span when nothing is being traced."""
+    return _current_span.get() or NOOP_SPAN
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Any]:
+    """Time a block as a child of the current span. A no-op outside ``start_trace``."""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(name, parent.trace, parent.span_id, attributes)
+    parent.trace._add(child)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.finish()
+        _current_span.reset(token)
+
+
+@contextmanager
+def detached_span(name: str, **attributes) -> Iterator[Any]:
+    """Like ``span``, but without becoming the current span.
+
+    Use inside generators: their body runs in the consumer's context between
+    yields, so making the span current there would misparent the consumer's spans.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(name, parent.trace, parent.span_id, attributes)
+    parent.trace._add(child)
+    try:
+        yield child
+    except GeneratorExit:
+        child.set("cancelled", True)
+        raise
+    except BaseException as e:
+        child.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        child.finish()
+
+
+@contextmanager
+def start_trace(name: str, **attributes) -> Iterator[Trace]:
+    """Record a new trace whose root span covers the block, and yield it."""
+    trace = Trace(name)
+    root = Span(name, trace, None, attributes)
+    trace._add(root)
+    token = _current_span.set(root)
+    try:
+        yield trace
+    except BaseException as e:
+        root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        root.finish()
+        _current_span.reset(token)
+        if TRACE_LOG_PATH:
+            _append_log(trace)
+
+
+def _append_log(trace: Trace) -> None:
+    try:
+        with _log_lock, open(TRACE_LOG_PATH, "a", encoding="utf-8") as log:
+            log.write(trace.to_json_lines())
+    except OSError:
+        pass
+
+
+def traced(name: str) -> Callable:
+    """Decorator recording every call of a function as a span called ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(func: Callable) -> Callable:
+    """Bind ``func`` to the caller's trace context, for handing to a worker thread.
+
+    Thread pools do not inherit context variables, so wrap each callable at
+    submit time: ``executor.submit(propagate(func), *args)``.
+    """
+    return functools.partial(contextvars.copy_context().run, func)
@@ -0,0 +1,205 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import wikipedia
+
+from modules.cache import DiskCache, hash_key
+from modules.tracing import propagate, span
+
+# Found pages change slowly; misses are retried sooner in case the page gets created
+WIKI_CACHE_TTL = float(os.environ.get("WIKI_CACHE_TTL", 3 * 24 * 3600))
+WIKI_NEGATIVE_TTL = float(os.environ.get("WIKI_NEGATIVE_TTL", 6 * 3600))
+WIKI_MEMORY_ENTRIES = int(os.environ.get("WIKI_MEMORY_ENTRIES", 256))
+
+# Maximum number of candidate titles looked up at the same time
+WIKI_LOOKUP_CONCURRENCY = int(os.environ.get("WIKI_LOOKUP_CONCURRENCY", 8))
+
+wiki_disk_cache = DiskCache("wiki", max_bytes=512 * 1024 * 1024, default_ttl=WIKI_CACHE_TTL)
+
+# Marker stored for PageError / unresolvable disambiguation outcomes
+_MISSING = {"missing": True}
+
+
+class _MemoryLRU:
+    """Small thread-safe in-process LRU with per-entry expiry, in front of the disk cache."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+wiki_memory_cache = _MemoryLRU(WIKI_MEMORY_ENTRIES)
+
+
+class _LanguageGate:
+    """Serialise language switches of the wikipedia package across threads.
+
+    The package keeps its API URL in a module global, so live lookups in
+    different languages must not overlap. Any number of lookups in the same
+    language may run at once; one in another language waits for them to finish.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._language = None
+        self._active = 0
+
+    @contextmanager
+    def use(self, language: str):
+        with self._condition:
+            while self._active and self._language != language:
+                self._condition.wait()
+            if self._language != language:
+                wikipedia.set_lang(language)
+                self._language = language
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                if not self._active:
+                    self._condition.notify_all()
+
+
+language_gate = _LanguageGate()
+
+
+def normalize_title(title: str) -> str:
+    """Normalise a title the way MediaWiki does: collapse spaces, capitalise first letter."""
+    title = re.sub(r"[\s_]+", " ", title).strip()
+    return title[:1].upper() + title[1:]
+
+
+def _page_to_dict(page) -> Dict:
+    return {
+        'title': page.title,
+        'summary': page.summary,
+        'content': page.content,
+        'url': page.url,
+    }
+
+
+def _fetch_uncached(title: str, language: str) -> Optional[Dict]:
+    """Look a title up live, following the first disambiguation option like before."""
+    with language_gate.use(language):
+        return _fetch_page(title)
+
+
+def _fetch_page(title: str) -> Optional[Dict]:
+    try:
+        return _page_to_dict(wikipedia.page(title, auto_suggest=False))
+    except wikipedia.exceptions.DisambiguationError as e:
+        if not e.options:
+            return None
+        try:
+            return _page_to_dict(wikipedia.page(e.options[0], auto_suggest=False))
+        except (wikipedia.exceptions.PageError, wikipedia.exceptions.DisambiguationError):
+            return None
+    except wikipedia.exceptions.PageError:
+        return None
+
+
+def _ttl_for(entry: Dict) -> float:
+    return WIKI_NEGATIVE_TTL if entry.get("missing") else WIKI_CACHE_TTL
+
+
+def fetch_wikipedia_page(title: str, language: str) -> Optional[Dict]:
+    """Return title/summary/content/url for a Wikipedia title, or None if there is no page.
+
+    Results are cached per (language, normalised title) in memory and on disk.
+    Misses are cached too, with a shorter TTL. Network errors are not cached and
+    propagate to the caller. Safe to call concurrently for different languages.
+    """
+    key = hash_key(language, normalize_title(title))
+
+    with span("wikipedia.fetch", **{"wiki.title": title, "wiki.language": language}) as current:
+        entry = wiki_memory_cache.get(key)
+        layer = "memory"
+        if entry is None:
+            entry = wiki_disk_cache.get(key)
+            layer = "disk"
+            if entry is None:
+                layer = None
+                page = _fetch_uncached(title, language)
+                entry = _MISSING if page is None else page
+                wiki_disk_cache.set(key, entry, ttl=_ttl_for(entry))
+            wiki_memory_cache.set(key, entry, ttl=_ttl_for(entry))
+
+        current.set("cache.hit", layer is not None)
+        if layer:
+            current.set("cache.layer", layer)
+        current.set("wiki.found", not entry.get("missing"))
+
+    return None if entry.get("missing") else entry
+
+
+def resolve_wikipedia_pages(keywords: List[str], language: str, limit: int = 1,
+                            max_workers: int = WIKI_LOOKUP_CONCURRENCY,
+                            on_error: Optional[Callable[[str, Exception], None]] = None,
+                            fetch: Callable[[str, str], Optional[Dict]] = fetch_wikipedia_page) -> List[Dict]:
+    """Look up all candidate keywords concurrently and return up to ``limit`` distinct pages.
+
+    Pages are ranked by keyword order, so the result is the same as probing the
+    keywords one by one. A page is accepted as soon as every earlier keyword has
+    resolved as a miss; lookups that can no longer change the result are then
+    cancelled. ``on_error`` is called with (keyword, exception) for failed lookups.
+    ``fetch`` selects the evidence backend; it defaults to the cached live API.
+    """
+    candidates = list(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))
+    if not candidates:
+        return []
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(candidates))))
+    futures = [executor.submit(propagate(fetch), keyword, language) for keyword in candidates]
+
+    pages = []
+    seen_titles = set()
+    try:
+        for keyword, future in zip(candidates, futures):
+            try:
+                page = future.result()
+            except Exception as e:
+                if on_error:
+                    on_error(keyword, e)
+                continue
+            if page and page['title'] not in seen_titles:
+                seen_titles.add(page['title'])
+                pages.append(page)
+                if len(pages) >= limit:
+                    break
+    finally:
+        # Queued lookups are dropped; ones already in flight finish into the cache
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return pages
@@ -0,0 +1,412 @@
+"""Offline Wikipedia evidence backend built from an XML or JSONL dump.
+
+Build an index once per language, then point ``WIKI_DUMP_DIR`` at the parent
+directory and set ``EVIDENCE_BACKEND = "local"``::
+
+    python -m modules.wiki_dump idwiki-latest-pages-articles.xml.bz2 wiki_index/id --lang id
+
+An index directory contains:
+
+- ``pages.jsonl``   one page per line (title/summary/content/url)
+- ``titles.idx``    sorted ``casefolded title<TAB>page offset`` lines, redirects included
+- ``passages.jsonl`` one passage per line, pointing back at its page
+- ``passages.len``  uint32 token length of every passage
+- ``terms.idx``     sorted ``term<TAB>postings start,count`` lines
+- ``postings.bin``  uint32 (passage id, term frequency) pairs
+- ``*.pos``         uint64 line offsets for the sorted and jsonl files
+
+Every file is memory-mapped and searched in place, so opening an index is
+cheap and title lookups are a binary search. Full-text search reads at most
+``MAX_TERM_POSTINGS`` postings per query term, so its cost is bounded by the
+query rather than by the dump size.
+"""
+import argparse
+import bz2
+import gzip
+import json
+import math
+import mmap
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from modules.retrieval import split_passages, tokenize
+from modules.wiki import normalize_title
+
+# Postings read per query term; terms in more passages than this are skipped
+# (their idf is close to zero) unless the query has no rarer term
+MAX_TERM_POSTINGS = 20000
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# DUMP READING
+# ═════════════════════════════════════════════════════════════════════════════
+
+_REDIRECT = re.compile(r"^#(?:REDIRECT|ALIH)\s*\[\[([^\]|#]+)", re.IGNORECASE)
+_MEDIA_LINK = re.compile(
+    r"\[\[(?:File|Image|Berkas|Gambar|Category|Kategori):[^\[\]]*(?:\[\[[^\[\]]*\]\][^\[\]]*)*\]\]",
+    re.IGNORECASE,
+)
+
+
+def _open_dump(path: str):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rb")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _replace_innermost(pattern: str, repl: str, text: str) -> str:
+    """Apply a regex repeatedly so nested constructs are removed from the inside out."""
+    regex = re.compile(pattern, re.DOTALL)
+    previous = None
+    while previous != text:
+        previous = text
+        text = regex.sub(repl, text)
+    return text
+
+
+def strip_wikitext(text: str) -> str:
+    """Reduce wikitext to plain text with ``== Heading ==`` lines, like the live API content."""
+    text = re.sub(r"<!--.*?-->", "", text, flags=re.DOTALL)
+    text = re.sub(r"<ref[^>/]*/>", "", text)
+    text = re.sub(r"<ref[^>]*>.*?</ref>", "", text, flags=re.DOTALL)
+    text = _replace_innermost(r"\{\{[^{}]*\}\}", "", text)
+    text = _replace_innermost(r"\{\|[^{}]*?\|\}", "", text)
+    text = _MEDIA_LINK.sub("", text)
+    text = _replace_innermost(r"\[\[(?:[^\[\]|]*\|)?([^\[\]|]*)\]\]", r"\1", text)
+    text = re.sub(r"\[https?://\S+\s+([^\]]*)\]", r"\1", text)
+    text = re.sub(r"\[https?://\S+\]", "", text)
+    text = re.sub(r"'{2,}", "", text)
+    text = re.sub(r"<[^>]+>", "", text)
+    text = re.sub(r"^[*#:;]+\s*", "", text, flags=re.MULTILINE)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+def _summary_of(content: str) -> str:
+    """The lead section: everything before the first heading."""
+    lead = re.split(r"^\s*==", content, maxsplit=1, flags=re.MULTILINE)[0]
+    return lead.strip()
+
+
+def iter_dump_pages(path: str) -> Iterator[Dict]:
+    """Yield ``{'title', 'content'}`` or ``{'title', 'redirect'}`` records from a dump.
+
+    JSONL dumps need a ``title`` and a ``text`` or ``content`` field per line and
+    may carry a ``url``. XML dumps are MediaWiki ``pages-articles`` exports; only
+    main-namespace pages are kept.
+    """
+    if path.endswith((".jsonl", ".jsonl.gz", ".jsonl.bz2", ".json", ".json.gz", ".json.bz2")):
+        with _open_dump(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                content = record.get("content") or record.get("text") or ""
+                if record.get("title") and content:
+                    yield {"title": record["title"], "content": content, "url": record.get("url")}
+        return
+
+    with _open_dump(path) as f:
+        title, ns = None, None
+        for _, elem in ET.iterparse(f, events=("end",)):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if tag == "title":
+                title = elem.text
+            elif tag == "ns":
+                ns = elem.text
+            elif tag == "text" and title and ns == "0":
+                raw = elem.text or ""
+                redirect = _REDIRECT.match(raw)
+                if redirect:
+                    yield {"title": title, "redirect": redirect.group(1).strip()}
+                else:
+                    yield {"title": title, "content": strip_wikitext(raw)}
+            elif tag == "page":
+                title, ns = None, None
+                elem.clear()
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# INDEX BUILDING
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _title_key(title: str) -> str:
+    return normalize_title(title).casefold()
+
+
+def _write_sorted_index(path: str, entries: Dict[str, str]) -> None:
+    """Write ``key<TAB>value`` lines sorted by UTF-8 key bytes, plus a .pos offset file."""
+    positions = array("Q")
+    with open(path, "wb") as f:
+        for key in sorted(entries, key=lambda k: k.encode("utf-8")):
+            positions.append(f.tell())
+            f.write(f"{key}\t{entries[key]}\n".encode("utf-8"))
+    with open(path + ".pos", "wb") as f:
+        positions.tofile(f)
+
+
+def build_dump_index(dump_path: str, out_dir: str, language: str,
+                     max_passages_per_page: int = 200) -> Dict:
+    """Build a local evidence index from a Wikipedia dump and return its metadata.
+
+    Postings are accumulated in memory as compact uint32 arrays, so building a
+    full-language index needs a few GB of RAM; ``max_passages_per_page`` caps
+    the contribution of very long articles.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    base_url = f"https://{language}.wikipedia.org/wiki/"
+
+    titles = {}
+    redirects = {}
+    postings = defaultdict(lambda: array("I"))
+    passage_lengths = array("I")
+    page_positions = array("Q")
+    passage_positions = array("Q")
+
+    with open(os.path.join(out_dir, "pages.jsonl"), "wb") as pages_file, \
+            open(os.path.join(out_dir, "passages.jsonl"), "wb") as passages_file:
+        for record in iter_dump_pages(dump_path):
+            if "redirect" in record:
+                redirects[_title_key(record["title"])] = _title_key(record["redirect"])
+                continue
+
+            content = record["content"]
+            page = {
+                "title": record["title"],
+                "summary": _summary_of(content),
+                "content": content,
+                "url": record.get("url") or base_url + quote(record["title"].replace(" ", "_")),
+            }
+            offset = pages_file.tell()
+            page_positions.append(offset)
+            pages_file.write(json.dumps(page, ensure_ascii=False).encode("utf-8") + b"\n")
+            titles.setdefault(_title_key(page["title"]), offset)
+
+            for passage in split_passages(page)[:max_passages_per_page]:
+                passage_id = len(passage_lengths)
+                tokens = tokenize(f"{page['title']} {passage['section']} {passage['text']}")
+                passage_lengths.append(len(tokens))
+                passage_positions.append(passages_file.tell())
+                passages_file.write(json.dumps(
+                    {"p": offset, "s": passage["section"], "t": passage["text"]},
+                    ensure_ascii=False,
+                ).encode("utf-8") + b"\n")
+                for term, tf in Counter(tokens).items():
+                    postings[term].extend((passage_id, tf))
+
+    # Redirects point at the target page's offset, when the target was indexed
+    for source, target in redirects.items():
+        if source not in titles and target in titles:
+            titles[source] = titles[target]
+    _write_sorted_index(os.path.join(out_dir, "titles.idx"),
+                        {key: str(offset) for key, offset in titles.items()})
+
+    terms = {}
+    with open(os.path.join(out_dir, "postings.bin"), "wb") as f:
+        start = 0
+        for term in sorted(postings):
+            pairs = postings[term]
+            pairs.tofile(f)
+            terms[term] = f"{start},{len(pairs) // 2}"
+            start += len(pairs) // 2
+    _write_sorted_index(os.path.join(out_dir, "terms.idx"), terms)
+
+    with open(os.path.join(out_dir, "passages.len"), "wb") as f:
+        passage_lengths.tofile(f)
+    with open(os.path.join(out_dir, "passages.jsonl.pos"), "wb") as f:
+        passage_positions.tofile(f)
+    with open(os.path.join(out_dir, "pages.jsonl.pos"), "wb") as f:
+        page_positions.tofile(f)
+
+    meta = {
+        "language": language,
+        "pages": len(page_positions),
+        "passages": len(passage_lengths),
+        "avg_passage_len": (sum(passage_lengths) / len(passage_lengths)) if passage_lengths else 0.0,
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+# ═════════════════════════════════════════════════════════════════════════════
+# INDEX READING
+# ═════════════════════════════════════════════════════════════════════════════
+
+def _map(path: str):
+    """Memory-map a file read-only; empty files map to an empty bytes object."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _line_at(data, offset: int) -> bytes:
+    end = data.find(b"\n", offset)
+    return data[offset:end if end != -1 else len(data)]
+
+
+class _SortedIndex:
+    """Binary search over a memory-mapped sorted ``key<TAB>value`` file."""
+
+    def __init__(self, path: str):
+        self.data = _map(path)
+        self.positions = memoryview(_map(path + ".pos")).cast("B").cast("Q")
+
+    def get(self, key: str) -> Optional[str]:
+        target = key.encode("utf-8")
+        lo, hi = 0, len(self.positions)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            line = _line_at(self.data, self.positions[mid])
+            line_key, _, value = line.partition(b"\t")
+            if line_key == target:
+                return value.decode("utf-8")
+            if line_key < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+
+class LocalDumpIndex:
+    """Read-only view over one language's index directory."""
+
+    def __init__(self, index_dir: str, k1: float = 1.5, b: float = 0.75,
+                 max_postings: int = MAX_TERM_POSTINGS):
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.k1 = k1
+        self.b = b
+        self.max_postings = max_postings
+        self.titles = _SortedIndex(os.path.join(index_dir, "titles.idx"))
+        self.terms = _SortedIndex(os.path.join(index_dir, "terms.idx"))
+        self.pages = _map(os.path.join(index_dir, "pages.jsonl"))
+        self.passages = _map(os.path.join(index_dir, "passages.jsonl"))
+        self.passage_positions = memoryview(
+            _map(os.path.join(index_dir, "passages.jsonl.pos"))).cast("B").cast("Q")
+        self.passage_lengths = memoryview(
+            _map(os.path.join(index_dir, "passages.len"))).cast("B").cast("I")
+        self.postings = memoryview(_map(os.path.join(index_dir, "postings.bin"))).cast("B").cast("I")
+
+    def _page_at(self, offset: int) -> Dict:
+        return json.loads(_line_at(self.pages, offset))
+
+    def page(self, title: str) -> Optional[Dict]:
+        """Exact (case-insensitive, redirect-aware) title lookup."""
+        offset = self.titles.get(_title_key(title))
+        return self._page_at(int(offset)) if offset is not None else None
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[float, Dict]]:
+        """BM25 full-text search returning (score, passage) pairs, best first.
+
+        Terms with more than ``max_postings`` passages are skipped. When every
+        query term is that common, only the first ``max_postings`` passages of
+        the rarest one are scored.
+        """
+        n = self.meta["passages"]
+        avg_len = self.meta["avg_passage_len"] or 1
+        scores = defaultdict(float)
+
+        entries = []
+        for term in set(tokenize(query)):
+            entry = self.terms.get(term)
+            if entry is not None:
+                start, count = (int(x) for x in entry.split(","))
+                entries.append((count, start))
+        entries.sort()
+
+        for rank, (count, start) in enumerate(entries):
+            if count > self.max_postings and rank:
+                break
+            idf = math.log(1 + (n - count + 0.5) / (count + 0.5))
+            pairs = self.postings[start * 2:(start + min(count, self.max_postings)) * 2]
+            for i in range(0, len(pairs), 2):
+                passage_id, tf = pairs[i], pairs[i + 1]
+                length = self.passage_lengths[passage_id]
+                norm = self.k1 * (1 - self.b + self.b * length / avg_len)
+                scores[passage_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        results = []
+        for passage_id, score in best:
+            record = json.loads(_line_at(self.passages, self.passage_positions[passage_id]))
+            page = self._page_at(record["p"])
+            results.append((score, {
+                'title': page['title'],
+                'url': page['url'],
+                'section': record["s"],
+                'text': record["t"],
+            }))
+        return results
+
+
+class LocalDumpBackend:
+    """Evidence backend serving pages from per-language indexes under ``root``.
+
+    ``page(title, language)`` has the same contract as ``wiki.fetch_wikipedia_page``:
+    a title/summary/content/url dict, or None when there is no such page.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def index(self, language: str) -> Optional[LocalDumpIndex]:
+        with self._lock:
+            if language not in self._indexes:
+                index_dir = os.path.join(self.root, language)
+                self._indexes[language] = (
+                    LocalDumpIndex(index_dir)
+                    if os.path.exists(os.path.join(index_dir, "meta.json")) else None
+                )
+            return self._indexes[language]
+
+    def page(self, title: str, language: str) -> Optional[Dict]:
+        index = self.index(language)
+        if index is None:
+            raise FileNotFoundError(f"No local Wikipedia index for '{language}' in {self.root}")
+        return index.page(title)
+
+    def search_pages(self, query: str, language: str, limit: int = 3) -> List[Dict]:
+        """Pages owning the best full-text passage matches for ``query``, best first."""
+        index = self.index(language)
+        if index is None:
+            return []
+        pages = []
+        seen = set()
+        for _, passage in index.search(query, k=limit * 4):
+            if passage['title'] in seen:
+                continue
+            seen.add(passage['title'])
+            page = index.page(passage['title'])
+            if page is not None:
+                pages.append(page)
+            if len(pages) >= limit:
+                break
+        return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a local Wikipedia evidence index from a dump.")
+    parser.add_argument("dump", help="pages-articles XML or JSONL dump (.bz2/.gz accepted)")
+    parser.add_argument("out_dir", help="index directory, e.g. wiki_index/id")
+    parser.add_argument("--lang", required=True, help="Wikipedia language code, e.g. id or en")
+    parser.add_argument("--max-passages-per-page", type=int, default=200)
+    args = parser.parse_args()
+
+    meta = build_dump_index(args.dump, args.out_dir, args.lang, args.max_passages_per_page)
+    print(json.dumps(meta, indent=2))
+
+
+if __name__ == "__main__":
+    main()
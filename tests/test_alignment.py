@@ -0,0 +1,56 @@
+from modules.alignment import ClaimAligner, aligner_for, locate_claims
+
+TEXT = ("Gunung Merapi meletus pada hari Sabtu pagi. Abu vulkanik menyebar hingga "
+        "Yogyakarta dan Magelang. Badan Geologi menaikkan status gunung menjadi Awas. "
+        "Sekitar 2.000 warga dievakuasi ke tempat pengungsian.")
+
+
+def covered(span):
+    return TEXT[span[0]:span[1]]
+
+
+def test_exact_claim_gets_its_span():
+    claim = "Badan Geologi menaikkan status gunung menjadi Awas"
+    assert locate_claims(TEXT, [claim]) == [(TEXT.index(claim), TEXT.index(claim) + len(claim), 0)]
+
+
+def test_paraphrase_and_typos_align_to_original_words():
+    match = ClaimAligner(TEXT).align("Badan Geologi menaikan status Gunung Merapi menjadi Awas")
+    assert match is not None
+    start, end, similarity = match
+    assert covered((start, end)).startswith("Badan Geologi")
+    assert covered((start, end)).endswith("Awas")
+    assert 0.6 <= similarity < 1
+
+
+def test_diacritics_and_case_are_ignored():
+    match = ClaimAligner("Le café est à Paris.").align("LE CAFE EST A PARIS")
+    assert match == (0, 19, 1.0)
+
+
+def test_unrelated_claim_is_not_aligned():
+    assert ClaimAligner(TEXT).align("Presiden meresmikan jalan tol baru di Sumatra") is None
+
+
+def test_locate_claims_returns_non_overlapping_spans_in_text_order():
+    claims = [
+        "Sekitar 2.000 warga dievakuasi",
+        "Gunung Merapi meletus hari Sabtu",
+        "abu vulkanik menyebar sampai Yogyakarta dan Magelang",
+        "",
+    ]
+    spans = locate_claims(TEXT, claims)
+    assert [index for _, _, index in spans] == [1, 2, 0]
+    assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
+    assert covered(spans[0][:2]).startswith("Gunung Merapi meletus")
+
+
+def test_aligner_is_shared_per_document():
+    assert aligner_for(TEXT) is aligner_for(TEXT)
+
+
+def test_long_document_alignment_stays_local():
+    filler = " ".join(f"kata{i}" for i in range(20000))
+    text = f"{filler} Danau Toba adalah danau vulkanik terbesar di Asia Tenggara. {filler}"
+    start, end, _ = ClaimAligner(text).align("Danau Toba merupakan danau vulkanik terbesar di Asia Tenggara")
+    assert text[start:end] == "Danau Toba adalah danau vulkanik terbesar di Asia Tenggara"
@@ -0,0 +1,88 @@
+import os
+import stat
+import time
+
+import pytest
+
+from modules import cache
+from modules.cache import DiskCache, hash_key
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.sqlite3")
+
+
+def test_hash_key_is_stable_and_order_insensitive_for_dicts():
+    assert hash_key("a", {"x": 1, "y": 2}) == hash_key("a", {"y": 2, "x": 1})
+    assert hash_key("a", 1) != hash_key("a", "1")
+
+
+def test_round_trip_and_namespaces(path):
+    first, second = DiskCache("one", path=path), DiskCache("two", path=path)
+    first.set("k", {"claims": ["x"], "n": 1})
+    assert first.get("k") == {"claims": ["x"], "n": 1}
+    assert second.get("k") is None
+    first.clear()
+    assert first.get("k") is None
+
+
+def test_expired_entries_are_not_returned(path):
+    store = DiskCache("ttl", path=path)
+    store.set("k", "v", ttl=-1)
+    assert store.get("k") is None
+
+
+def test_least_recently_used_entries_are_evicted(path, monkeypatch):
+    monkeypatch.setattr(cache, "EVICT_EVERY", 1)
+    store = DiskCache("lru", max_bytes=25, path=path)  # two 10-byte entries fit
+    store.set("a", "x" * 8)
+    time.sleep(0.01)
+    store.set("b", "y" * 8)
+    time.sleep(0.01)
+    assert store.get("a") == "x" * 8  # a is now more recent than b
+    time.sleep(0.01)
+    store.set("c", "z" * 8)
+    assert store.get("b") is None
+    assert store.get("a") == "x" * 8 and store.get("c") == "z" * 8
+
+
+def test_eviction_pass_runs_only_periodically_under_budget(path, monkeypatch):
+    store = DiskCache("periodic", max_bytes=10 ** 6, path=path)
+    passes = []
+    original = store._evict
+    monkeypatch.setattr(store, "_evict", lambda conn, now: (passes.append(now), original(conn, now)))
+    for i in range(cache.EVICT_EVERY * 2 + 1):
+        store.set(str(i), i)
+    # The first write measures the namespace; after that once every EVICT_EVERY writes
+    assert len(passes) == 3
+
+
+def test_budget_overrun_triggers_eviction_before_the_periodic_pass(path):
+    store = DiskCache("overrun", max_bytes=100, path=path)
+    for i in range(10):
+        store.set(str(i), "v" * 40)
+    total = store._connect().execute(
+        "SELECT SUM(size) FROM entries WHERE namespace = 'overrun'").fetchone()[0]
+    assert total <= 100
+
+
+@pytest.mark.skipif(os.name != "posix" or os.geteuid() == 0, reason="needs a non-root POSIX user")
+def test_unwritable_directory_disables_the_cache(tmp_path):
+    locked = tmp_path / "locked"
+    locked.mkdir()
+    locked.chmod(stat.S_IRUSR | stat.S_IXUSR)
+    store = DiskCache("ro", path=str(locked / "sub" / "cache.sqlite3"))
+    assert not store.available
+    store.set("k", "v")
+    assert store.get("k") is None
+
+
+def test_unopenable_path_disables_the_cache(tmp_path):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    store = DiskCache("broken", path=str(not_a_dir / "cache.sqlite3"))
+    assert not store.available
+    store.set("k", "v")
+    assert store.get("k") is None
+    store.clear()
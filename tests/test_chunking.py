@@ -0,0 +1,79 @@
+import threading
+
+from modules.chunking import ClaimDeduplicator, split_into_chunks, split_sentences
+
+
+def test_split_sentences_keeps_offsets():
+    text = "Judul Berita\n\nKalimat pertama. Kalimat kedua!  Ketiga?"
+    sentences = split_sentences(text)
+    assert [s['text'] for s in sentences] == ["Judul Berita", "Kalimat pertama.", "Kalimat kedua!", "Ketiga?"]
+    assert all(text[s['start']:s['end']] == s['text'] for s in sentences)
+
+
+def test_short_text_is_one_chunk():
+    text = "Satu kalimat. Dua kalimat."
+    assert split_into_chunks(text, max_words=100) == [
+        {'index': 0, 'text': text, 'start': 0, 'end': len(text), 'overlap_end': 0}]
+    assert split_into_chunks("   ") == []
+
+
+def test_chunks_overlap_by_whole_sentences_and_cover_the_text():
+    sentences = [f"Kalimat nomor {i} berisi lima kata." for i in range(40)]
+    text = " ".join(sentences)
+    chunks = split_into_chunks(text, max_words=30, overlap_sentences=2)
+
+    assert len(chunks) > 1
+    assert chunks[0]['start'] == 0 and chunks[-1]['end'] == len(text)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk['text'] == text[chunk['start']:chunk['end']]
+        # The repeated prefix is exactly the last two sentences of the previous chunk
+        assert chunk['start'] < previous['end'] == chunk['overlap_end']
+        assert text[chunk['start']:chunk['overlap_end']].count("Kalimat") == 2
+        assert len(chunk['text'].split()) <= 30 + 6
+
+
+def test_oversized_sentence_still_makes_progress():
+    text = " ".join(["kata"] * 50) + ". Pendek sekali."
+    chunks = split_into_chunks(text, max_words=10, overlap_sentences=1)
+    assert chunks[-1]['end'] == len(text)
+
+
+def claims(*texts):
+    return [{'claim': text} for text in texts]
+
+
+def test_deduplicator_drops_exact_and_seam_repeats():
+    dedup = ClaimDeduplicator(3)
+    first = dedup.accept(0, claims("Merapi meletus pada hari Sabtu", "Status gunung menjadi Awas"))
+    second = dedup.accept(1, claims("merapi meletus pada hari sabtu.",
+                                    "Status gunung Merapi menjadi Awas",
+                                    "Sekitar 2.000 warga dievakuasi"))
+    third = dedup.accept(2, claims("Status gunung Merapi menjadi Awas sekarang", "Merapi meletus pada hari Sabtu"))
+
+    assert len(first) == 2
+    assert [c['claim'] for c in second] == ["Sekitar 2.000 warga dievakuasi"]
+    # Near-duplicates only count against the previous chunk; exact repeats count anywhere
+    assert [c['claim'] for c in third] == ["Status gunung Merapi menjadi Awas sekarang"]
+
+
+def test_deduplicator_runs_in_chunk_order_regardless_of_finish_order():
+    dedup = ClaimDeduplicator(2)
+    results = {}
+
+    def accept_second():
+        results[1] = dedup.accept(1, claims("Danau Toba terbentuk dari letusan supervulkan"))
+
+    later = threading.Thread(target=accept_second)
+    later.start()
+    later.join(timeout=0.1)
+    assert later.is_alive()  # waits for chunk 0
+
+    results[0] = dedup.accept(0, claims("Danau Toba terbentuk dari letusan supervulkan"))
+    later.join(timeout=5)
+    assert len(results[0]) == 1 and results[1] == []
+
+
+def test_skipped_chunk_unblocks_the_next():
+    dedup = ClaimDeduplicator(2)
+    dedup.skip(0)
+    assert len(dedup.accept(1, claims("Borobudur dibangun pada abad ke-9"))) == 1
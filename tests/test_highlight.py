@@ -0,0 +1,58 @@
+import random
+from html import escape
+
+from modules.highlight import AhoCorasick, find_claim_spans, render_spans, select_spans
+
+
+def brute_force(patterns, text):
+    found = set()
+    for index, pattern in enumerate(patterns):
+        if not pattern or patterns.index(pattern) != index:
+            continue
+        start = text.find(pattern)
+        while start != -1:
+            found.add((start, start + len(pattern), index))
+            start = text.find(pattern, start + 1)
+    return found
+
+
+def test_finds_overlapping_and_nested_occurrences():
+    patterns = ["he", "she", "his", "hers"]
+    assert set(AhoCorasick(patterns).finditer("ushers")) == {(1, 4, 1), (2, 4, 0), (2, 6, 3)}
+
+
+def test_empty_and_repeated_patterns():
+    matches = list(AhoCorasick(["", "ab", "ab"]).finditer("abab"))
+    assert matches == [(0, 2, 1), (2, 4, 1)]
+
+
+def test_matches_brute_force_on_random_text():
+    rng = random.Random(7)
+    for _ in range(200):
+        text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 60)))
+        patterns = ["".join(rng.choice("abc") for _ in range(rng.randint(0, 5)))
+                    for _ in range(rng.randint(1, 8))]
+        assert set(AhoCorasick(patterns).finditer(text)) == brute_force(patterns, text)
+
+
+def test_select_spans_prefers_longest_and_keeps_text_order():
+    matches = [(0, 3, 0), (2, 8, 1), (9, 12, 2), (10, 11, 3)]
+    assert select_spans(matches) == [(2, 8, 1), (9, 12, 2)]
+
+
+def test_select_spans_fills_gaps_around_taken_spans():
+    taken = [(5, 10, 0)]
+    assert select_spans([(0, 6, 1), (0, 5, 2), (10, 12, 3)], taken=taken) == [
+        (0, 5, 2), (5, 10, 0), (10, 12, 3)]
+
+
+def test_find_claim_spans_longest_claim_wins():
+    text = "Jakarta is the capital of Indonesia."
+    claims = ["the capital", "Jakarta is the capital of Indonesia", "Mars"]
+    assert find_claim_spans(text, claims) == [(0, 35, 1)]
+
+
+def test_render_spans_escapes_text_and_wraps_spans():
+    text = "a < b & c"
+    html = render_spans(text, [(4, 5, 0)], lambda index, inner: f"<mark data-i={index}>{inner}</mark>")
+    assert html == f"{escape('a < ')}<mark data-i=0>b</mark>{escape(' & c')}"
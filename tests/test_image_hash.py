@@ -0,0 +1,111 @@
+import io
+import time
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+from modules import cache
+from modules.image_hash import PerceptualHashIndex, _bands, compute_hashes, hamming
+
+
+def gradient(width=64, height=48, flip=False):
+    img = Image.new("RGB", (width, height))
+    img.putdata([((x * 4) % 256, (y * 5) % 256, ((x if not flip else width - x) * y) % 256)
+                 for y in range(height) for x in range(width)])
+    return img
+
+
+def checkerboard(size=64, cell=8):
+    img = Image.new("L", (size, size))
+    img.putdata([255 * (((x // cell) + (y // cell)) % 2) for y in range(size) for x in range(size)])
+    return img
+
+
+def resaved(img, **options):
+    buffer = io.BytesIO()
+    img.save(buffer, **options)
+    return Image.open(io.BytesIO(buffer.getvalue()))
+
+
+def test_hashes_survive_recompression_and_resizing():
+    original = gradient()
+    p, d = compute_hashes(original)
+    p2, d2 = compute_hashes(resaved(original.resize((128, 96)), format="JPEG", quality=60))
+    assert hamming(p, p2) <= 6
+    assert hamming(d, d2) <= 12
+
+
+def test_different_pictures_are_far_apart():
+    assert hamming(compute_hashes(gradient())[0], compute_hashes(checkerboard())[0]) > 6
+
+
+def test_bands_cover_every_bit():
+    value = 0x0123456789ABCDEF
+    for count in (1, 3, 7, 64):
+        bands = _bands(value, count)
+        assert len(bands) == count
+        rebuilt, shift = 0, 0
+        for i, band in enumerate(bands):
+            rebuilt |= band << shift
+            shift += 64 // count + (i < 64 % count)
+        assert rebuilt == value
+
+
+@pytest.fixture
+def index(tmp_path):
+    return PerceptualHashIndex(path=str(tmp_path / "cache.sqlite3"), max_distance=6)
+
+
+def test_near_duplicate_is_recognised_and_counted(index):
+    first_id, previous = index.record(0xF0F0F0F0F0F0F0F0, 0x1234, {"camera": "X100"})
+    assert previous is None
+    # Three bits away in the pHash: the same picture
+    second_id, previous = index.record(0xF0F0F0F0F0F0F0F0 ^ 0b10101, 0x1234, {"camera": "other"})
+    assert second_id == first_id
+    assert previous["distance"] == 3
+    assert previous["metadata"] == {"camera": "X100"}
+    assert index.lookup(0xF0F0F0F0F0F0F0F0, 0x1234)["seen_count"] == 2
+
+
+def test_distant_hash_is_a_new_image(index):
+    first_id, _ = index.record(0, 0, {})
+    second_id, previous = index.record(0xFF, 0, {})
+    assert previous is None and second_id != first_id
+
+
+def test_analyses_are_cached_per_model(index):
+    image_id, _ = index.record(1, 1, {})
+    index.set_analysis(image_id, "groq", {"summary": "a"})
+    assert index.get_analysis(image_id, "groq") == {"summary": "a"}
+    assert index.get_analysis(image_id, "gemini") is None
+    assert index.get_analysis(None, "groq") is None
+
+
+def test_least_recently_seen_images_are_evicted_with_their_analyses(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "EVICT_EVERY", 1)
+    index = PerceptualHashIndex(path=str(tmp_path / "cache.sqlite3"), max_bytes=3 * 300)
+    hashes = [0, 0xFFFFFFFF, 0xFFFFFFFF00000000, 0x0F0F0F0F0F0F0F0F]
+    ids = []
+    for i in range(3):
+        image_id, _ = index.record(hashes[i], 0, {"n": i})
+        index.set_analysis(image_id, "groq", {"summary": "x"})
+        ids.append(image_id)
+        time.sleep(0.01)
+    index.record(0, 0, {})  # image 0 was seen again, so image 1 is now the oldest
+    index.record(hashes[3], 0, {"n": 3})
+
+    assert index.lookup(hashes[1], 0) is None
+    assert index.get_analysis(ids[1], "groq") is None
+    assert index.lookup(0, 0) is not None
+    assert index.get_analysis(ids[0], "groq") == {"summary": "x"}
+
+
+def test_images_expire_after_ttl(tmp_path):
+    index = PerceptualHashIndex(path=str(tmp_path / "cache.sqlite3"), ttl=0.05)
+    index.record(0, 0, {})
+    time.sleep(0.1)
+    # The first new image recorded by an index object runs eviction
+    index._inserts_since_evict = None
+    index.record(0xFFFFFFFF, 0, {})
+    assert index.lookup(0, 0) is None
@@ -0,0 +1,137 @@
+import json
+import random
+import time
+
+import pytest
+
+from modules.json_stream import IncrementalJSONParser, stream_json
+
+
+def random_document(rng, depth=0):
+    kind = rng.choice(["object", "array", "string", "number", "literal"] if depth < 4 else
+                      ["string", "number", "literal"])
+    if kind == "object":
+        return {random_string(rng): random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))}
+    if kind == "array":
+        return [random_document(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    if kind == "string":
+        return random_string(rng)
+    if kind == "number":
+        return rng.choice([rng.randint(-10 ** 6, 10 ** 6), rng.uniform(-1e6, 1e6), 0, -0.5, 1e-7])
+    return rng.choice([True, False, None])
+
+
+def random_string(rng):
+    alphabet = 'abc xyz"\\/\n\té中\U0001f600'
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+
+
+def random_deltas(rng, text):
+    deltas, position = [], 0
+    while position < len(text):
+        size = rng.randint(1, 8)
+        deltas.append(text[position:position + size])
+        position += size
+    return deltas
+
+
+def parse_in_pieces(deltas):
+    parser = IncrementalJSONParser()
+    for delta in deltas:
+        parser.feed(delta)
+    return parser
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_matches_json_loads_for_any_split(seed):
+    rng = random.Random(seed)
+    document = {"results": [random_document(rng) for _ in range(rng.randint(1, 3))]}
+    text = json.dumps(document, ensure_ascii=rng.random() < 0.5, indent=rng.choice([None, 2]))
+    parser = parse_in_pieces(random_deltas(rng, text))
+    assert parser.error is None
+    assert parser.done
+    assert parser.value == json.loads(text)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_partial_documents_only_grow(seed):
+    rng = random.Random(seed)
+    document = {"results": [{"claim_number": i, "status": "accurate",
+                             "justification": random_string(rng) * 3} for i in range(3)]}
+    text = json.dumps(document)
+    parser = IncrementalJSONParser()
+    previous = None
+    for delta in random_deltas(rng, text):
+        partial = json.loads(json.dumps(parser.feed(delta)))
+        results = partial.get("results", []) if partial else []
+        if previous is not None:
+            assert len(results) >= len(previous)
+            for before, after in zip(previous, results):
+                for key, value in before.items():
+                    if isinstance(value, str):
+                        assert after[key].startswith(value)
+        previous = results
+    assert parser.value == document
+
+
+def test_skips_markdown_fence_and_trailing_text():
+    parser = parse_in_pieces(['```json\n{"a": ', '[1, "x"]}', '\n```'])
+    assert parser.done
+    assert parser.value == {"a": [1, "x"]}
+
+
+def test_truncated_string_is_exposed():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"status": "accurate", "justification": "The tow') == {
+        "status": "accurate", "justification": "The tow"}
+    assert parser.feed('er is 330 m"}') == {"status": "accurate", "justification": "The tower is 330 m"}
+
+
+def test_escapes_and_surrogate_pairs():
+    text = '{"s": "a\\"b\\\\c\\n\\u00e9\\ud83d\\ude00"}'
+    parser = parse_in_pieces(list(text))
+    assert parser.value == json.loads(text)
+
+
+def test_invalid_input_sets_error_and_keeps_partial():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1, }')
+    assert parser.error
+    assert parser.value == {"a": 1}
+    # Further input is ignored once the document is broken
+    assert parser.feed('"b": 2}') == {"a": 1}
+
+
+def test_value_is_not_built_until_read():
+    parser = IncrementalJSONParser()
+    parser.consume('{"text": "abc')
+    assert parser.value == {"text": "abc"}
+    parser.consume('def')
+    assert parser.value == {"text": "abcdef"}
+
+
+def test_stream_json_returns_full_text_and_throttles_updates():
+    deltas = ['{"results": [', '{"status": "accurate"}', ', {"status": "subjective"}', ']}']
+    partials = []
+    text = stream_json(deltas, partials.append, min_interval=3600)
+    assert text == "".join(deltas)
+    assert len(partials) == 1
+
+    partials.clear()
+    stream_json(deltas, lambda partial: partials.append(json.dumps(partial)), min_interval=0)
+    assert json.loads(partials[-1]) == json.loads(text)
+
+
+def test_stream_json_skips_updates_before_the_document_starts():
+    partials = []
+    stream_json(["Sure! ", "```json\n", '{"a": 1}'], partials.append, min_interval=0)
+    assert partials and all(partial is not None for partial in partials)
+
+
+def test_long_string_streams_in_linear_time():
+    text = json.dumps({"justification": "x" * 400_000})
+    deltas = [text[i:i + 4] for i in range(0, len(text), 4)]
+    start = time.perf_counter()
+    stream_json(deltas, lambda partial: None)
+    # Re-joining the string on every delta took minutes at this size
+    assert time.perf_counter() - start < 10
@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("wikipedia")
+
+from modules.pipeline import ResultCollector
+
+TEXT = "Borobudur dibangun pada abad ke-9. Candi ini terletak di Magelang."
+
+
+def collect(events):
+    collector = ResultCollector(TEXT, "id")
+    for kind, payload in events:
+        collector.add(kind, payload)
+    return collector.finish()
+
+
+def chunk(index, keywords, titles, corrected=False):
+    pages = [{"title": title, "url": f"https://id.wikipedia.org/wiki/{title}", "summary": "", "content": "x"}
+             for title in titles]
+    return "chunk", {"index": index, "corrected": corrected, "keywords": keywords, "pages": pages}
+
+
+def test_merges_chunks_and_keeps_only_verified_claims_with_spans():
+    result = collect([
+        chunk(0, ["Borobudur"], ["Borobudur"]),
+        ("claims", (0, [{"claim": "Borobudur dibangun pada abad ke-9", "topic": "Borobudur"},
+                        {"claim": "Candi ini terletak di Magelang", "topic": "Magelang"}])),
+        chunk(1, ["Borobudur", "Magelang"], ["Borobudur", "Magelang"], corrected=True),
+        ("claims", (1, [{"claim": "Tidak ada di teks", "topic": "x"}])),
+        ("verdict", (0, 0, {"status": "accurate", "justification": "ok"})),
+        ("verdict", (0, 1, {"status": "inaccurate", "justification": "no"})),
+        ("warning", "no page for 'x'"),
+    ])
+
+    assert result["words"] == len(TEXT.split())
+    assert result["corrected"] is True
+    assert result["keywords"] == ["Borobudur", "Magelang"]
+    assert [page["title"] for page in result["pages"]] == ["Borobudur", "Magelang"]
+    assert "content" not in result["pages"][0]
+    assert [claim["claim"] for claim in result["claims"]] == ["Borobudur dibangun pada abad ke-9",
+                                                               "Candi ini terletak di Magelang"]
+    first = result["claims"][0]
+    assert first["chunk"] == 0 and first["status"] == "accurate"
+    assert TEXT[first["span"][0]:first["span"][1]] == first["claim"]
+    assert result["credibility_score"] == 50.0
+    assert result["warnings"] == ["no page for 'x'"]
+
+
+def test_no_verdicts_leaves_score_unset():
+    result = collect([("error", ValueError("boom"))])
+    assert result["claims"] == []
+    assert result["credibility_score"] is None
+    assert result["errors"] == ["boom"]
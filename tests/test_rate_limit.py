@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pytest
+
+from modules.rate_limit import BATCH, INTERACTIVE, RateLimitScheduler, TokenBucket, parse_duration
+
+# Headers as Groq sends them: requests are per day, tokens per minute
+GROQ_HEADERS = {
+    "x-ratelimit-limit-requests": "14400",
+    "x-ratelimit-limit-tokens": "18000",
+    "x-ratelimit-remaining-requests": "14370",
+    "x-ratelimit-remaining-tokens": "17997",
+    "x-ratelimit-reset-requests": "2m59.56s",
+    "x-ratelimit-reset-tokens": "7.66s",
+}
+
+
+class RateLimited(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("7.66s", 7.66), ("2m59.56s", 179.56), ("250ms", 0.25), ("1h2m", 3720.0), ("12", 12.0),
+    ("", None), (None, None), ("soon", None),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds) if seconds is not None else parse_duration(value) is None
+
+
+def test_bucket_waits_for_refill():
+    bucket = TokenBucket(capacity=2, rate=1.0)
+    now = bucket.updated
+    bucket.take(2, now)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1.0) == pytest.approx(0.0)
+
+
+def test_bucket_sync_only_lowers_level_and_sets_rate_from_reset():
+    bucket = TokenBucket(capacity=12000, rate=200.0)
+    now = bucket.updated
+    bucket.take(5000, now)
+    bucket.sync(limit=18000, remaining=17000, reset=10.0, now=now)
+    assert bucket.capacity == 18000
+    # Calls in flight are already taken locally, so the higher server count is ignored
+    assert bucket.level == pytest.approx(7000)
+    assert bucket.rate == pytest.approx(100.0)
+
+    bucket.sync(limit=None, remaining=1000, reset=None, now=now)
+    assert bucket.level == pytest.approx(1000)
+
+
+def test_update_keeps_per_minute_request_budget():
+    scheduler = RateLimitScheduler(requests_per_minute=30, tokens_per_minute=12000)
+    scheduler.update(GROQ_HEADERS)
+
+    assert scheduler.requests.capacity == 30
+    assert scheduler.requests.rate == pytest.approx(0.5)
+    assert scheduler.daily_requests.capacity == 14400
+    assert scheduler.daily_requests.level <= 14370
+    assert scheduler.daily_requests.rate == pytest.approx(30 / 179.56)
+    assert scheduler.tokens.capacity == 18000
+    assert scheduler.tokens.rate == pytest.approx(3 / 7.66)
+
+
+def test_requests_are_throttled_per_minute_after_update():
+    scheduler = RateLimitScheduler(requests_per_minute=2, tokens_per_minute=1e9)
+    scheduler.update(GROQ_HEADERS)
+    now = time.monotonic()
+    scheduler.requests.take(2, now)
+    assert scheduler.requests.wait_time(1, now) == pytest.approx(30.0, rel=0.01)
+
+
+def test_exhausted_daily_budget_blocks():
+    scheduler = RateLimitScheduler(requests_per_minute=1000, tokens_per_minute=1e9)
+    scheduler.update(dict(GROQ_HEADERS, **{"x-ratelimit-remaining-requests": "0",
+                                           "x-ratelimit-reset-requests": "1h"}))
+    now = time.monotonic()
+    # The used budget refills linearly until the reset: 14400 requests over an hour
+    assert scheduler.daily_requests.wait_time(1, now) == pytest.approx(0.25, rel=0.01)
+
+
+def test_update_ignores_missing_and_malformed_headers():
+    scheduler = RateLimitScheduler(requests_per_minute=30, tokens_per_minute=12000)
+    scheduler.update(None)
+    scheduler.update({"x-ratelimit-limit-tokens": "lots"})
+    assert scheduler.daily_requests is None
+    assert scheduler.tokens.capacity == 12000
+
+
+def test_429_pauses_queue_and_retries_after_retry_after():
+    scheduler = RateLimitScheduler(requests_per_minute=1e6, tokens_per_minute=1e9,
+                                   max_retries=2, base_delay=0.01)
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RateLimited(429, {"retry-after": "0.2"})
+        return "ok"
+
+    start = time.monotonic()
+    assert scheduler.call(flaky) == "ok"
+    assert len(attempts) == 2
+    assert attempts[1] - start >= 0.2
+    # The pause applies to every caller, not only the one that was throttled
+    assert scheduler._paused_until >= start + 0.2
+
+
+def test_other_callers_wait_out_a_429_pause():
+    scheduler = RateLimitScheduler(requests_per_minute=1e6, tokens_per_minute=1e9, base_delay=0.01)
+    scheduler._pause(0.2)
+    start = time.monotonic()
+    scheduler.call(lambda: None)
+    assert time.monotonic() - start >= 0.19
+
+
+def test_retries_run_out_and_other_errors_propagate():
+    scheduler = RateLimitScheduler(requests_per_minute=1e6, tokens_per_minute=1e9,
+                                   max_retries=1, base_delay=0.001)
+    calls = []
+
+    def always_503():
+        calls.append(1)
+        raise RateLimited(503)
+
+    with pytest.raises(RateLimited):
+        scheduler.call(always_503)
+    assert len(calls) == 2
+
+    def bad_request():
+        calls.append(1)
+        raise RateLimited(400)
+
+    with pytest.raises(RateLimited):
+        scheduler.call(bad_request)
+    assert len(calls) == 3
+
+    with pytest.raises(KeyError):
+        scheduler.call(lambda: {}["missing"])
+
+
+def test_interactive_calls_are_served_before_batch():
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=1e9)
+    scheduler.requests.take(scheduler.requests.level, time.monotonic())
+    order = []
+
+    def worker(priority, name):
+        scheduler.call(lambda: order.append(name), priority=priority)
+
+    threads = [threading.Thread(target=worker, args=(BATCH, "batch"))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=worker, args=(INTERACTIVE, "interactive")))
+    threads[1].start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert order == ["interactive", "batch"]
@@ -0,0 +1,96 @@
+import bz2
+import json
+
+import pytest
+
+pytest.importorskip("wikipedia")
+
+from modules.wiki_dump import (LocalDumpBackend, LocalDumpIndex, build_dump_index, iter_dump_pages,
+                               strip_wikitext)
+
+XML_DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/">
+  <page><title>Borobudur</title><ns>0</ns><revision><text>'''Borobudur''' adalah [[candi]] Buddha
+di [[Magelang|Kabupaten Magelang]].{{Infobox|nama=x}}<ref>Sumber</ref>
+
+== Sejarah ==
+Candi ini dibangun pada abad ke-9 oleh [[Wangsa Syailendra]].</text></revision></page>
+  <page><title>Candi Borobudur</title><ns>0</ns><revision><text>#ALIH [[Borobudur]]</text></revision></page>
+  <page><title>Templat:Info</title><ns>10</ns><revision><text>bukan artikel</text></revision></page>
+</mediawiki>"""
+
+PAGES = [
+    {"title": f"Kota {i}", "text": f"Kota {i} adalah kota di Indonesia. Kota ini terkenal dengan "
+                                   f"{'batik' if i == 3 else 'kuliner'} dan pantai."}
+    for i in range(40)
+]
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    dump = tmp_path / "dump.jsonl.bz2"
+    with bz2.open(dump, "wt", encoding="utf-8") as f:
+        for page in PAGES:
+            f.write(json.dumps(page) + "\n")
+    out = tmp_path / "id"
+    build_dump_index(str(dump), str(out), "id")
+    return out
+
+
+def test_strip_wikitext_keeps_text_and_headings():
+    text = strip_wikitext("'''Tebal''' [[a|b]] {{x|{{y}}}}<!-- c -->[https://e.org label]\n== H ==\n* item")
+    assert text == "Tebal b label\n== H ==\nitem"
+
+
+def test_xml_dump_yields_articles_and_redirects(tmp_path):
+    path = tmp_path / "dump.xml"
+    path.write_text(XML_DUMP, encoding="utf-8")
+    records = list(iter_dump_pages(str(path)))
+    assert [r["title"] for r in records] == ["Borobudur", "Candi Borobudur"]
+    assert records[0]["content"].startswith("Borobudur adalah candi Buddha\ndi Kabupaten Magelang.")
+    assert "Infobox" not in records[0]["content"] and "Sumber" not in records[0]["content"]
+    assert records[1] == {"title": "Candi Borobudur", "redirect": "Borobudur"}
+
+
+def test_title_lookup_is_case_insensitive_and_follows_redirects(tmp_path):
+    path = tmp_path / "dump.xml"
+    path.write_text(XML_DUMP, encoding="utf-8")
+    build_dump_index(str(path), str(tmp_path / "id"), "id")
+    index = LocalDumpIndex(str(tmp_path / "id"))
+    page = index.page("borobudur")
+    assert page["title"] == "Borobudur"
+    assert page["url"] == "https://id.wikipedia.org/wiki/Borobudur"
+    assert page["summary"].startswith("Borobudur adalah")
+    assert index.page("candi_borobudur") == page
+    assert index.page("Prambanan") is None
+
+
+def test_search_ranks_rare_terms_first(index_dir):
+    results = LocalDumpIndex(str(index_dir)).search("kota batik", k=3)
+    assert results[0][1]["title"] == "Kota 3"
+    assert results[0][0] > results[1][0]
+
+
+def test_common_terms_are_skipped_past_the_postings_cap(index_dir):
+    capped = LocalDumpIndex(str(index_dir), max_postings=10)
+    # "kota" is in all 40 passages, so only "batik" is scored
+    assert [page["title"] for _, page in capped.search("kota batik", k=5)] == ["Kota 3"]
+    # With only common terms, a bounded prefix of the rarest one is scored
+    assert len(capped.search("kota", k=50)) == 10
+
+
+def test_search_pages_skips_missing_pages_and_duplicates(index_dir):
+    backend = LocalDumpBackend(str(index_dir.parent))
+    index = backend.index("id")
+    lookup = index.page
+    index.page = lambda title: None if title == "Kota 3" else lookup(title)
+    pages = backend.search_pages("batik kuliner", "id", limit=3)
+    assert len(pages) == 3
+    assert "Kota 3" not in [page["title"] for page in pages]
+    assert len({page["title"] for page in pages}) == 3
+
+
+def test_missing_language_index(tmp_path):
+    backend = LocalDumpBackend(str(tmp_path))
+    assert backend.search_pages("apa saja", "en") == []
+    with pytest.raises(FileNotFoundError):
+        backend.page("Jakarta", "en")